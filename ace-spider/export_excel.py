@@ -5,12 +5,16 @@ import sys
 from datetime import datetime
 from pathlib import Path
 
-from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
 
-from crawlers.reporter import _format_budget
-from utils.config_loader import load_config
+# The write-only Excel engine is shared with the card backend.
+_REPO_ROOT = str(Path(__file__).resolve().parent.parent)
+if _REPO_ROOT not in sys.path:
+    sys.path.append(_REPO_ROOT)
+
+from backend.utils.excel_writer import StreamingExcelWriter  # noqa: E402
+from crawlers.reporter import _format_budget  # noqa: E402
+from utils.config_loader import load_config  # noqa: E402
 
 
 def load_latest_matched(config_path: str | None = None) -> dict:
@@ -28,27 +32,48 @@ def load_latest_matched(config_path: str | None = None) -> dict:
         return json.load(f), Path(matched_file).name
 
 
+def _register_styles(writer: StreamingExcelWriter) -> None:
+    """Register the shared named styles used by every sheet."""
+    body_font = Font(name="Microsoft JhengHei", size=10)
+    link_font = Font(name="Microsoft JhengHei", size=10, color="0563C1", underline="single")
+    bu_fonts = {
+        "bu1": Font(name="Microsoft JhengHei", size=10, bold=True, color="2E75B6"),
+        "bu2": Font(name="Microsoft JhengHei", size=10, bold=True, color="C55A11"),
+    }
+    thin_border = Border(bottom=Side(style="thin", color="D9D9D9"))
+    wrap = Alignment(wrap_text=True, vertical="center")
+    center = Alignment(horizontal="center", vertical="center")
+
+    writer.add_style("title", font=Font(name="Microsoft JhengHei", bold=True, size=14, color="1F4E79"),
+                     alignment=Alignment(vertical="center"))
+    writer.add_style("subtitle", font=Font(name="Microsoft JhengHei", size=10, color="666666"))
+    writer.add_style("section", font=Font(name="Microsoft JhengHei", bold=True, size=12, color="1F4E79"))
+    writer.add_style("header", font=Font(name="Microsoft JhengHei", bold=True, color="FFFFFF", size=11),
+                     fill=PatternFill("solid", fgColor="1F4E79"), alignment=center)
+    writer.add_style("label", font=Font(name="Microsoft JhengHei", bold=True, size=11))
+    writer.add_style("value", font=Font(name="Microsoft JhengHei", size=11))
+    writer.add_style("body", font=body_font)
+    writer.add_style("body_center", font=body_font, alignment=center)
+    writer.add_style("link_center", font=link_font, alignment=center)
+
+    # Overview rows: priority fill × (wrap / center / BU / link)
+    for priority, color in PRIORITY_FILLS.items():
+        fill = PatternFill("solid", fgColor=color)
+        writer.add_style(f"{priority}_wrap", font=body_font, fill=fill, border=thin_border, alignment=wrap)
+        writer.add_style(f"{priority}_center", font=body_font, fill=fill, border=thin_border, alignment=center)
+        writer.add_style(f"{priority}_link", font=link_font, fill=fill, border=thin_border, alignment=center)
+        for bu_key, font in bu_fonts.items():
+            writer.add_style(f"{priority}_{bu_key}", font=font, fill=fill, border=thin_border, alignment=center)
+
+
+PRIORITY_FILLS = {"high": "E2EFDA", "medium": "FFF2CC", "low": "F2F2F2"}
+WRAP_COLUMNS = (4, 9, 10, 11, 12)
+
+
 def create_excel_report(data: dict, source_file: str, config_path: str | None = None):
     """Create a formatted Excel report."""
-    wb = Workbook()
-
-    # ── Colors & Styles ──
-    HEADER_FILL = PatternFill("solid", fgColor="1F4E79")
-    HEADER_FONT = Font(name="Microsoft JhengHei", bold=True, color="FFFFFF", size=11)
-    TITLE_FONT = Font(name="Microsoft JhengHei", bold=True, size=14, color="1F4E79")
-    SUBTITLE_FONT = Font(name="Microsoft JhengHei", size=10, color="666666")
-    BODY_FONT = Font(name="Microsoft JhengHei", size=10)
-    LINK_FONT = Font(name="Microsoft JhengHei", size=10, color="0563C1", underline="single")
-    HIGH_FILL = PatternFill("solid", fgColor="E2EFDA")
-    MEDIUM_FILL = PatternFill("solid", fgColor="FFF2CC")
-    LOW_FILL = PatternFill("solid", fgColor="F2F2F2")
-    BU1_FONT = Font(name="Microsoft JhengHei", size=10, bold=True, color="2E75B6")
-    BU2_FONT = Font(name="Microsoft JhengHei", size=10, bold=True, color="C55A11")
-    THIN_BORDER = Border(
-        bottom=Side(style="thin", color="D9D9D9"),
-    )
-    WRAP = Alignment(wrap_text=True, vertical="center")
-    CENTER = Alignment(horizontal="center", vertical="center")
+    writer = StreamingExcelWriter()
+    _register_styles(writer)
 
     tenders = data.get("tenders", [])
     passed = [t for t in tenders if t.get("passes_filter")]
@@ -57,25 +82,6 @@ def create_excel_report(data: dict, source_file: str, config_path: str | None =
     # ═══════════════════════════════════════════
     # Sheet 1: 商機總覽 (Overview)
     # ═══════════════════════════════════════════
-    ws = wb.active
-    ws.title = "商機總覽"
-    ws.sheet_properties.tabColor = "1F4E79"
-
-    # Title
-    ws.merge_cells("A1:L1")
-    ws["A1"] = "ACE-SPIDER 採購商機分析報告"
-    ws["A1"].font = TITLE_FONT
-    ws["A1"].alignment = Alignment(vertical="center")
-    ws.row_dimensions[1].height = 30
-
-    # Subtitle
-    crawl_time = data.get("crawl_time", "")[:19].replace("T", " ")
-    ws.merge_cells("A2:L2")
-    ws["A2"] = f"報告時間：{datetime.now().strftime('%Y-%m-%d %H:%M')}　｜　爬取時間：{crawl_time}　｜　來源：{source_file}"
-    ws["A2"].font = SUBTITLE_FONT
-    ws.row_dimensions[2].height = 20
-
-    # Headers
     headers = [
         ("排名", 6),
         ("優先級", 8),
@@ -92,24 +98,34 @@ def create_excel_report(data: dict, source_file: str, config_path: str | None =
         ("截止日期", 14),
         ("連結", 12),
     ]
+    ws = writer.create_sheet(
+        "商機總覽", sample_rows=0, widths={col: width for col, (_, width) in enumerate(headers, 1)}
+    )
+    ws.tab_color = "1F4E79"
+    # Freeze panes (must be set before the first row in write-only mode)
+    ws.freeze("A5")
+
+    # Title
+    ws.merge("A1:L1")
+    ws.append(["ACE-SPIDER 採購商機分析報告"], style="title", height=30)
+
+    # Subtitle
+    crawl_time = data.get("crawl_time", "")[:19].replace("T", " ")
+    ws.merge("A2:L2")
+    ws.append(
+        [f"報告時間：{datetime.now().strftime('%Y-%m-%d %H:%M')}　｜　爬取時間：{crawl_time}　｜　來源：{source_file}"],
+        style="subtitle", height=20,
+    )
+
+    # Headers
+    ws.skip_to(4)
+    ws.append([name for name, _ in headers], style="header", height=24)
 
-    row = 4
-    for col, (name, width) in enumerate(headers, 1):
-        cell = ws.cell(row=row, column=col, value=name)
-        cell.font = HEADER_FONT
-        cell.fill = HEADER_FILL
-        cell.alignment = CENTER
-        ws.column_dimensions[get_column_letter(col)].width = width
-    ws.row_dimensions[row].height = 24
-
-    # Freeze panes
-    ws.freeze_panes = "A5"
     # Auto filter
-    ws.auto_filter.ref = f"A4:N{4 + len(passed)}"
+    ws.auto_filter(f"A4:N{4 + len(passed)}")
 
     # Data rows
     for i, t in enumerate(passed, 1):
-        row = 4 + i
         tag = t.get("tag_result") or {}
         contacts = t.get("matched_contacts", [])
         budget = t.get("budget")
@@ -156,47 +172,29 @@ def create_excel_report(data: dict, source_file: str, config_path: str | None =
             "點擊查看",
         ]
 
-        for col, val in enumerate(values, 1):
-            cell = ws.cell(row=row, column=col, value=val)
-            cell.font = BODY_FONT
-            cell.border = THIN_BORDER
-            cell.alignment = WRAP if col in (4, 9, 10, 11, 12) else CENTER
-
-        # Style: priority color
-        row_fill = {"high": HIGH_FILL, "medium": MEDIUM_FILL}.get(priority, LOW_FILL)
-        for col in range(1, len(values) + 1):
-            ws.cell(row=row, column=col).fill = row_fill
-
-        # Style: BU color
-        bu_cell = ws.cell(row=row, column=3)
+        # Style: priority color, BU color, hyperlink
+        row_key = priority if priority in PRIORITY_FILLS else "low"
+        styles = [
+            f"{row_key}_wrap" if col in WRAP_COLUMNS else f"{row_key}_center"
+            for col in range(1, len(values) + 1)
+        ]
         if bu in ("BU1", "both"):
-            bu_cell.font = BU1_FONT
+            styles[2] = f"{row_key}_bu1"
         elif bu == "BU2":
-            bu_cell.font = BU2_FONT
-
-        # Hyperlink
+            styles[2] = f"{row_key}_bu2"
         if url:
-            link_cell = ws.cell(row=row, column=14)
-            link_cell.hyperlink = url
-            link_cell.font = LINK_FONT
+            styles[13] = f"{row_key}_link"
 
-        ws.row_dimensions[row].height = 50
+        ws.append(values, style=styles, height=50, hyperlinks={14: url} if url else None)
 
     # ═══════════════════════════════════════════
     # Sheet 2: 統計摘要 (Summary)
     # ═══════════════════════════════════════════
-    ws2 = wb.create_sheet("統計摘要")
-    ws2.sheet_properties.tabColor = "2E75B6"
-
-    ws2.column_dimensions["A"].width = 20
-    ws2.column_dimensions["B"].width = 18
-    ws2.column_dimensions["C"].width = 14
-    ws2.column_dimensions["D"].width = 30
+    ws2 = writer.create_sheet("統計摘要", sample_rows=0, widths={1: 20, 2: 18, 3: 14, 4: 30})
+    ws2.tab_color = "2E75B6"
 
-    ws2.merge_cells("A1:D1")
-    ws2["A1"] = "統計摘要"
-    ws2["A1"].font = TITLE_FONT
-    ws2.row_dimensions[1].height = 30
+    ws2.merge("A1:D1")
+    ws2.append(["統計摘要"], style="title", height=30)
 
     # Overall stats
     stats = [
@@ -217,62 +215,52 @@ def create_excel_report(data: dict, source_file: str, config_path: str | None =
         ("GPT Token 消耗", f"{data.get('total_tokens_used', 0):,}"),
     ]
 
-    for i, (label, value) in enumerate(stats, 3):
-        ws2.cell(row=i, column=1, value=label).font = Font(name="Microsoft JhengHei", bold=True, size=11)
-        ws2.cell(row=i, column=2, value=value).font = Font(name="Microsoft JhengHei", size=11)
+    ws2.skip_to(3)
+    for label, value in stats:
+        ws2.append([label, value], style=["label", "value"])
 
     # Top 5 by ROI
-    ws2.merge_cells("A20:D20")
-    ws2["A20"] = "TOP 5 最高 ROI 標案"
-    ws2["A20"].font = Font(name="Microsoft JhengHei", bold=True, size=12, color="1F4E79")
+    ws2.skip_to(20)
+    ws2.merge("A20:D20")
+    ws2.append(["TOP 5 最高 ROI 標案"], style="section")
 
-    top_headers = ["標案名稱", "預算", "ROI", "BU"]
-    for col, h in enumerate(top_headers, 1):
-        cell = ws2.cell(row=21, column=col, value=h)
-        cell.font = HEADER_FONT
-        cell.fill = HEADER_FILL
-        cell.alignment = CENTER
+    ws2.append(["標案名稱", "預算", "ROI", "BU"], style="header")
 
     top_roi = sorted(passed, key=lambda t: t.get("roi_score", 0), reverse=True)[:5]
-    for i, t in enumerate(top_roi, 22):
+    for t in top_roi:
         tag = t.get("tag_result") or {}
         budget = t.get("budget", 0) or 0
-        ws2.cell(row=i, column=1, value=t.get("tender_name", "")).font = BODY_FONT
-        ws2.cell(row=i, column=2, value=_format_budget(budget)).font = BODY_FONT
-        ws2.cell(row=i, column=3, value=t.get("roi_score", 0)).font = BODY_FONT
-        ws2.cell(row=i, column=4, value=tag.get("bu_assignment", "")).font = BODY_FONT
+        ws2.append(
+            [t.get("tender_name", ""), _format_budget(budget), t.get("roi_score", 0), tag.get("bu_assignment", "")],
+            style="body",
+        )
 
     # ═══════════════════════════════════════════
     # Sheet 3: BU1 專屬 & Sheet 4: BU2 專屬
     # ═══════════════════════════════════════════
+    bu_headers = [
+        ("排名", 6), ("標案名稱", 45), ("機關名稱", 22), ("預算", 14),
+        ("Fit", 8), ("ROI", 8), ("技術標籤", 30), ("匹配聯繫人", 30), ("連結", 12),
+    ]
+    bu_styles = ["body_center", "body", "body", "body", "body_center", "body_center", "body", "body"]
+
     for bu_id, bu_name, tab_color in [("BU1", "BU1 區塊鏈", "C55A11"), ("BU2", "BU2 AI應用", "2E75B6")]:
-        ws_bu = wb.create_sheet(bu_name)
-        ws_bu.sheet_properties.tabColor = tab_color
+        ws_bu = writer.create_sheet(
+            bu_name, sample_rows=0, widths={col: width for col, (_, width) in enumerate(bu_headers, 1)}
+        )
+        ws_bu.tab_color = tab_color
+        ws_bu.freeze("A4")
 
         bu_tenders = [t for t in passed if (t.get("tag_result") or {}).get("bu_assignment") in (bu_id, "both")]
         bu_tenders.sort(key=lambda t: t.get("fit_score", 0), reverse=True)
 
-        ws_bu.merge_cells("A1:H1")
-        ws_bu["A1"] = f"{bu_name} 相關商機（{len(bu_tenders)} 筆）"
-        ws_bu["A1"].font = TITLE_FONT
-        ws_bu.row_dimensions[1].height = 30
-
-        bu_headers = [
-            ("排名", 6), ("標案名稱", 45), ("機關名稱", 22), ("預算", 14),
-            ("Fit", 8), ("ROI", 8), ("技術標籤", 30), ("匹配聯繫人", 30), ("連結", 12),
-        ]
-
-        for col, (name, width) in enumerate(bu_headers, 1):
-            cell = ws_bu.cell(row=3, column=col, value=name)
-            cell.font = HEADER_FONT
-            cell.fill = HEADER_FILL
-            cell.alignment = CENTER
-            ws_bu.column_dimensions[get_column_letter(col)].width = width
+        ws_bu.merge("A1:H1")
+        ws_bu.append([f"{bu_name} 相關商機（{len(bu_tenders)} 筆）"], style="title", height=30)
 
-        ws_bu.freeze_panes = "A4"
+        ws_bu.skip_to(3)
+        ws_bu.append([name for name, _ in bu_headers], style="header")
 
         for i, t in enumerate(bu_tenders, 1):
-            row = 3 + i
             tag = t.get("tag_result") or {}
             contacts = t.get("matched_contacts", [])
             budget = t.get("budget", 0) or 0
@@ -280,25 +268,23 @@ def create_excel_report(data: dict, source_file: str, config_path: str | None =
 
             contact_text = "、".join(f"{c['name']}（{c.get('position', '')}）" for c in contacts[:2])
 
-            ws_bu.cell(row=row, column=1, value=i).font = BODY_FONT
-            ws_bu.cell(row=row, column=1).alignment = CENTER
-            ws_bu.cell(row=row, column=2, value=t.get("tender_name", "")).font = BODY_FONT
-            ws_bu.cell(row=row, column=3, value=t.get("org_name", "")).font = BODY_FONT
-            ws_bu.cell(row=row, column=4, value=_format_budget(budget)).font = BODY_FONT
-            ws_bu.cell(row=row, column=5, value=t.get("fit_score", 0)).font = BODY_FONT
-            ws_bu.cell(row=row, column=5).alignment = CENTER
-            ws_bu.cell(row=row, column=6, value=t.get("roi_score", 0)).font = BODY_FONT
-            ws_bu.cell(row=row, column=6).alignment = CENTER
-            ws_bu.cell(row=row, column=7, value="、".join(tag.get("tech_tags", []))).font = BODY_FONT
-            ws_bu.cell(row=row, column=8, value=contact_text).font = BODY_FONT
-
-            link_cell = ws_bu.cell(row=row, column=9, value="查看" if url else "")
-            if url:
-                link_cell.hyperlink = url
-                link_cell.font = LINK_FONT
-                link_cell.alignment = CENTER
-
-            ws_bu.row_dimensions[row].height = 35
+            values = [
+                i,
+                t.get("tender_name", ""),
+                t.get("org_name", ""),
+                _format_budget(budget),
+                t.get("fit_score", 0),
+                t.get("roi_score", 0),
+                "、".join(tag.get("tech_tags", [])),
+                contact_text,
+                "查看" if url else "",
+            ]
+            ws_bu.append(
+                values,
+                style=bu_styles + (["link_center"] if url else [None]),
+                height=35,
+                hyperlinks={9: url} if url else None,
+            )
 
     # Save
     cfg = load_config(config_path)
@@ -306,7 +292,7 @@ def create_excel_report(data: dict, source_file: str, config_path: str | None =
     output_dir.mkdir(exist_ok=True)
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     output_path = output_dir / f"商機報告_{timestamp}.xlsx"
-    wb.save(output_path)
+    writer.save(str(output_path))
     return str(output_path)
 
 
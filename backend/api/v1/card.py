@@ -1,26 +1,44 @@
 from fastapi import APIRouter, Depends, UploadFile, File, Form, Query, HTTPException
 from sqlalchemy.orm import Session
-from backend.models.card import Card, CardORM
+from backend.models.card import BatchImportCheckpointORM, Card, CardORM
 from backend.services.card_service import (
     get_cards,
     get_card,
+    card_to_dict,
     create_card,
     update_card,
     delete_card,
     bulk_create_cards,
     get_cards_paginated,
+    get_cards_page_by_cursor,
+    resolve_card_fields,
+    iterate_cards,
+    count_cards_filtered,
     get_cards_count,
-    iterate_cards_for_stats,
     get_industry_breakdown,
     get_duplicate_groups,
     get_duplicate_group_by_id,
     review_duplicate_group,
 )
 from backend.services.industry_classification_service import IndustryClassificationService
-from backend.services.ocr_service import OCRService
-from backend.services.task_manager import task_manager
-from backend.services.card_enhancement_service import CardEnhancementService
-from backend.models.db import get_db
+from backend.services.task_manager import ACTIVE_STATUSES, task_manager
+from backend.services.card_stats_service import (
+    apply_card_stats_delta, card_stats_keys, get_card_stats, rebuild_card_stats
+)
+from backend.services.image_executor import (
+    ImageJobTimeoutError, ImageQueueFullError, crop_card_image, image_executor, rect_crop_image
+)
+from backend.services.image_store import image_store
+from backend.services.image_gc_service import collect_garbage, release_images
+from backend.api.v1.image import preview_image_url
+from backend.services.card_export_service import (
+    PARQUET_AVAILABLE, ZIP_DATA_FORMATS, iterate_export_cards, stream_csv, stream_export, stream_vcard,
+    stream_zip_export, write_cards_excel, write_cards_parquet
+)
+from backend.services.card_export_job_service import (
+    EXPORT_JOB_FORMATS, get_export_file, start_export_job
+)
+from backend.models.db import SessionLocal, get_db
 from backend.core.exceptions import (
     card_not_found_error,
     card_create_failed_error,
@@ -29,29 +47,24 @@ from backend.core.exceptions import (
     file_upload_failed_error
 )
 from backend.core.response import ResponseHandler
-from backend.core.cache import cache
+from backend.core.cache import cache, make_cache_key
+from backend.core.config import API_V1_PREFIX
 from backend.dependencies.auth import get_current_user
 from backend.schemas.card import CardCreate, CardUpdate, CardResponse, ClassificationRequest, ClassificationResult, ClassificationBatchResponse
 from backend.schemas.task import BatchClassifyRequest, BatchClassifyResponse, TaskStatusResponse, TaskCancelResponse
-from typing import Dict, List, Optional
+from typing import List, Optional
 import threading
-from fastapi.responses import StreamingResponse
-import csv
-import io
-import openpyxl
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
+import asyncio
 import logging
 import os
 from pathlib import Path
 from backend.services.wcxf_import_service import WcxfImportService
-import shutil
 from datetime import datetime
-import glob
 from PIL import Image
-import base64
 import json
 import tempfile
-import cv2
-import numpy as np
 
 
 
@@ -61,10 +74,17 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 STATS_CACHE_KEY = "cards_stats"
+CARDS_CACHE_TAG = "cards"
+# 游標分頁的總數 / 產業分布快取（依篩選條件簽章），名片異動時整組失效
+CARD_COUNTS_CACHE_TAG = "card_counts"
 
 def invalidate_card_stats_cache() -> None:
     """清除名片統計快取"""
     cache.delete(STATS_CACHE_KEY)
+    cache.invalidate_tag(CARD_COUNTS_CACHE_TAG)
+
+def card_cache_key(card_id: int) -> str:
+    return f"card_{card_id}"
 
 def is_all_industry(industry: Optional[str]) -> bool:
     if industry is None:
@@ -72,68 +92,49 @@ def is_all_industry(industry: Optional[str]) -> bool:
     s = str(industry).strip()
     return s == "" or s in ("全部", "全部產業", "all", "ALL")
 
-# 創建圖片存儲目錄
-UPLOAD_DIR = "output/card_images"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+async def save_uploaded_image(image: UploadFile):
+    """上傳原圖寫入圖片庫，返回 (路徑, 內容)；內容直接交給裁切管線解碼，不再從磁碟讀回"""
+    image_data = await image.read()
+    ext = os.path.splitext(image.filename or "")[1]
+    image_path = await asyncio.to_thread(image_store.put_bytes, image_data, ext)
+    return image_path, image_data
+
+def image_busy_response(e: Exception):
+    """圖片處理進程池忙碌或逾時"""
+    return ResponseHandler.error(message=str(e), error=e, status_code=503)
 
-def image_file_to_data_url(image_path: str) -> str:
-    with open(image_path, "rb") as f:
-        encoded = base64.b64encode(f.read()).decode("utf-8")
-    return f"data:image/jpeg;base64,{encoded}"
 
-def simple_rect_crop(
+async def simple_rect_crop(
     original_image_path: str,
-    upload_prefix: str,
-    crop_corners: Optional[str] = None
+    crop_corners: Optional[str] = None,
+    image_data: Optional[bytes] = None
 ):
-    """簡單矩形裁切（拍照用）— 不做透視矯正，只按 corners 的 bounding box 裁切"""
-    image = cv2.imread(original_image_path)
-    if image is None:
-        raise ValueError(f"無法讀取圖片: {original_image_path}")
+    """簡單矩形裁切（拍照用）— 不做透視矯正，只按 corners 的 bounding box 裁切
+    有 image_data（剛上傳的內容）時直接解碼，不再讀取原圖檔"""
+    parsed_corners = json.loads(crop_corners) if crop_corners else None
+
+    cropped_path, final_corners = await image_executor.run(
+        rect_crop_image,
+        image_data if image_data is not None else original_image_path,
+        parsed_corners
+    )
+    return cropped_path, json.dumps(final_corners, ensure_ascii=False)
 
-    if crop_corners:
-        parsed_corners = json.loads(crop_corners)
-        xs = [c[0] for c in parsed_corners]
-        ys = [c[1] for c in parsed_corners]
-        h, w = image.shape[:2]
-        left = max(0, int(min(xs)))
-        top = max(0, int(min(ys)))
-        right = min(w, int(max(xs)))
-        bottom = min(h, int(max(ys)))
-        cropped = image[top:bottom, left:right]
-        final_corners = [[left, top], [right, top], [right, bottom], [left, bottom]]
-    else:
-        cropped = image
-        h, w = image.shape[:2]
-        final_corners = [[0, 0], [w, 0], [w, h], [0, h]]
-
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    cropped_filename = f"{upload_prefix}_cropped_{timestamp}.jpg"
-    cropped_output_path = os.path.join(UPLOAD_DIR, cropped_filename)
-
-    cv2.imwrite(cropped_output_path, cropped)
-    return cropped_output_path, json.dumps(final_corners, ensure_ascii=False)
-
-
-def generate_cropped_image(
+
+async def generate_cropped_image(
     original_image_path: str,
-    upload_prefix: str,
-    crop_corners: Optional[str] = None
+    crop_corners: Optional[str] = None,
+    image_data: Optional[bytes] = None
 ):
     """透視矯正裁切（相簿上傳用）"""
     parsed_corners = None
     if crop_corners:
         parsed_corners = json.loads(crop_corners)
 
-    enhancer = CardEnhancementService()
-
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    cropped_filename = f"{upload_prefix}_cropped_{timestamp}.jpg"
-    cropped_output_path = os.path.join(UPLOAD_DIR, cropped_filename)
-
-    result = enhancer.process_image_with_metadata(
-        input_path=original_image_path,
-        output_path=cropped_output_path,
+    result = await image_executor.run(
+        crop_card_image,
+        image_data if image_data is not None else original_image_path,
+        store=True,
         scale_factor=0,
         auto_detect=(parsed_corners is None),
         corners=parsed_corners
@@ -145,32 +146,28 @@ def generate_cropped_image(
     return result["output_path"], json.dumps(result["corners"], ensure_ascii=False)
 
 
-def _crop_image_by_source(
+async def _crop_image_by_source(
     original_image_path: str,
-    upload_prefix: str,
     crop_corners: Optional[str] = None,
     image_source: Optional[str] = None,
-    cropped_temp_path: Optional[str] = None
+    cropped_temp_path: Optional[str] = None,
+    image_data: Optional[bytes] = None
 ):
     """根據圖片來源選擇裁切方式：
     1. 有 cropped_temp_path（上傳自動裁切，使用者未手動調整）→ 直接使用已裁切的圖
     2. camera（拍照）→ 簡單矩形裁切
     3. upload 且手動調整過（無 temp_path）→ 簡單矩形裁切
     """
-    # 有已裁切好的暫存圖 → 直接重新命名使用
-    if cropped_temp_path and os.path.exists(cropped_temp_path):
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        final_filename = f"{upload_prefix}_cropped_{timestamp}.jpg"
-        final_path = os.path.join(UPLOAD_DIR, final_filename)
-        shutil.move(cropped_temp_path, final_path)
+    # 裁切預覽已在圖片庫中 → 直接引用（只接受圖片庫物件路徑）
+    if image_store.is_object(cropped_temp_path) and os.path.exists(cropped_temp_path):
         corners_str = json.dumps(json.loads(crop_corners), ensure_ascii=False) if crop_corners else "[]"
-        return final_path, corners_str
+        return cropped_temp_path, corners_str
 
     # 拍照或手動調整過 → 簡單矩形裁切
-    return simple_rect_crop(
+    return await simple_rect_crop(
         original_image_path=original_image_path,
-        upload_prefix=upload_prefix,
-        crop_corners=crop_corners
+        crop_corners=crop_corners,
+        image_data=image_data
     )
 
 
@@ -228,6 +225,43 @@ def review_group(
         return ResponseHandler.error(message="標記審查失敗", error=e, status_code=400)
 
 
+def get_cursor_total(db: Session, filters: dict, total_mode: str) -> Optional[int]:
+    """
+    游標分頁的總數
+    - exact：每次重新計數
+    - cached：無篩選時直接讀統計摘要，有篩選時依條件簽章快取計數
+    - none：不計算
+    """
+    if total_mode == "none":
+        return None
+    if total_mode == "exact":
+        return count_cards_filtered(db, **filters)
+    has_filters = (
+        any(v not in (None, "") for k, v in filters.items() if k not in ("industry", "filter_status"))
+        or filters.get("industry") not in (None, "", "全部")
+        or filters.get("filter_status") in ("normal", "problem", "duplicate")
+    )
+    if not has_filters:
+        stats = cache.get_or_set(
+            STATS_CACHE_KEY, lambda: get_card_stats(db), ttl_minutes=3, tags=[CARDS_CACHE_TAG]
+        )
+        return stats["total"]
+    return cache.get_or_set(
+        make_cache_key("card_count", (), filters),
+        lambda: count_cards_filtered(db, **filters),
+        ttl_minutes=2, tags=[CARD_COUNTS_CACHE_TAG]
+    )
+
+
+def stream_all_cards(fields: Optional[List[str]] = None):
+    """串流用的名片迭代器；使用獨立會話，回應送出期間保持連線直到讀完"""
+    db = SessionLocal()
+    try:
+        yield from iterate_cards(db, fields=fields)
+    finally:
+        db.close()
+
+
 @router.get("/")
 def list_cards(
     skip: int = Query(0, ge=0, description="跳過記錄數"),
@@ -236,6 +270,12 @@ def list_cards(
     industry: Optional[str] = Query(None, description="产业分类过滤"),
     status: Optional[str] = Query("all", description="狀態篩選: all / normal / problem"),
     use_pagination: bool = Query(False, description="是否使用分頁"),
+    use_cursor: bool = Query(False, description="是否使用游標分頁（無限捲動，忽略 skip）"),
+    cursor: Optional[str] = Query(None, description="上一頁回傳的 next_cursor"),
+    total_mode: str = Query("cached", description="游標分頁總數: exact / cached / none"),
+    view: Optional[str] = Query(None, description="欄位投影: summary（略過 OCR 原文等大欄位）/ full"),
+    fields: Optional[str] = Query(None, description="逗號分隔的輸出欄位，優先於 view"),
+    output_format: str = Query("json", alias="format", description="非分頁輸出格式: json / ndjson"),
     # 高級篩選
     name_zh: Optional[str] = Query(None, description="中文姓名篩選"),
     name_en: Optional[str] = Query(None, description="英文姓名篩選"),
@@ -250,13 +290,55 @@ def list_cards(
     current_user: str = Depends(get_current_user)
 ):
     try:
-        if use_pagination:
+        try:
+            projection = resolve_card_fields(view, fields)
+        except ValueError as e:
+            return ResponseHandler.error(message=str(e), status_code=400)
+
+        if use_cursor or cursor:
+            filters = dict(
+                search=search, industry=industry, filter_status=status,
+                name_zh=name_zh, name_en=name_en, company=company, position=position,
+                date_from=date_from, date_to=date_to,
+                has_phone=has_phone, has_email=has_email, has_address=has_address,
+            )
+            try:
+                cards, next_cursor = get_cards_page_by_cursor(
+                    db, cursor=cursor, limit=limit, fields=projection, **filters
+                )
+            except ValueError as e:
+                return ResponseHandler.error(message=str(e), status_code=400)
+
+            total = get_cursor_total(db, filters, total_mode)
+            industry_breakdown = None
+            if is_all_industry(industry) and not cursor:
+                # 只在第一頁回傳產業分布，後續頁面維持固定成本
+                breakdown_filters = {k: v for k, v in filters.items() if k != "industry"}
+                industry_breakdown = cache.get_or_set(
+                    make_cache_key("card_breakdown", (), breakdown_filters),
+                    lambda: get_industry_breakdown(db, **breakdown_filters),
+                    ttl_minutes=2, tags=[CARD_COUNTS_CACHE_TAG]
+                )
+            return ResponseHandler.success(
+                data={
+                    "items": cards,
+                    "total": total,
+                    "total_mode": total_mode if total is not None else "none",
+                    "limit": limit,
+                    "next_cursor": next_cursor,
+                    "has_more": next_cursor is not None,
+                    "industry_breakdown": industry_breakdown
+                },
+                message="獲取名片列表成功"
+            )
+        elif use_pagination:
             # 使用分頁查詢（支持产业过滤 + 高級篩選）
             cards, total = get_cards_paginated(
                 db, skip=skip, limit=limit, search=search, industry=industry, filter_status=status,
                 name_zh=name_zh, name_en=name_en, company=company, position=position,
                 date_from=date_from, date_to=date_to,
                 has_phone=has_phone, has_email=has_email, has_address=has_address,
+                fields=projection,
             )
             industry_breakdown = None
             if is_all_industry(industry):
@@ -280,11 +362,11 @@ def list_cards(
                 message="獲取名片列表成功"
             )
         else:
-            # 保持向後兼容，返回所有數據
-            cards = get_cards(db)
-            return ResponseHandler.success(
-                data=cards,
-                message="獲取名片列表成功"
+            # 保持向後兼容，返回所有數據（串流輸出，記憶體用量不隨名片數增長）
+            return ResponseHandler.stream_list(
+                stream_all_cards(projection),
+                message="獲取名片列表成功",
+                ndjson=output_format == "ndjson"
             )
     except Exception as e:
         logger.error(f"獲取名片列表失敗: {str(e)}")
@@ -293,102 +375,68 @@ def list_cards(
             error=e
         )
 
+@router.get("/cache/stats")
+def get_cache_stats(current_user: str = Depends(get_current_user)):
+    """內存緩存命中 / 淘汰統計"""
+    return ResponseHandler.success(data=cache.get_stats(), message="獲取緩存統計成功")
+
 @router.get("/stats")
 def get_cards_stats(db: Session = Depends(get_db), current_user: str = Depends(get_current_user)):
-    """獲取名片統計數據 - 全局統計，不受篩選影響"""
-    cached_stats = cache.get(STATS_CACHE_KEY)
-    if cached_stats is not None:
+    """獲取名片統計數據 - 全局統計，不受篩選影響（讀取增量維護的 card_stats 摘要）"""
+    try:
+        stats_data = cache.get_or_set(
+            STATS_CACHE_KEY, lambda: get_card_stats(db), ttl_minutes=3, tags=[CARDS_CACHE_TAG]
+        )
+
         return ResponseHandler.success(
-            data=cached_stats,
+            data=stats_data,
             message="獲取統計數據成功"
         )
 
-    try:
-        def check_card_status_backend(card: Dict[str, Optional[str]]):
-            """後端統計用的狀態檢查邏輯，與前端 checkCardStatus 保持一致"""
-            missing_fields = []
-
-            # 檢查姓名 (中文OR英文)
-            name_zh = (card.get('name_zh') or '').strip()
-            name_en = (card.get('name_en') or '').strip()
-            if not (name_zh or name_en):
-                missing_fields.append('姓名')
-
-            # 檢查公司 (中文OR英文)
-            company_zh = (card.get('company_name_zh') or '').strip()
-            company_en = (card.get('company_name_en') or '').strip()
-            if not (company_zh or company_en):
-                missing_fields.append('公司')
-
-            # 檢查職位或部門 (職位或部門有其中一個即可)
-            position_zh = (card.get('position_zh') or '').strip()
-            position_en = (card.get('position_en') or '').strip()
-            position1_zh = (card.get('position1_zh') or '').strip()
-            position1_en = (card.get('position1_en') or '').strip()
-            has_position = bool(position_zh or position_en or position1_zh or position1_en)
-
-            dept1_zh = (card.get('department1_zh') or '').strip()
-            dept1_en = (card.get('department1_en') or '').strip()
-            dept2_zh = (card.get('department2_zh') or '').strip()
-            dept2_en = (card.get('department2_en') or '').strip()
-            dept3_zh = (card.get('department3_zh') or '').strip()
-            dept3_en = (card.get('department3_en') or '').strip()
-            has_department = bool(dept1_zh or dept1_en or dept2_zh or dept2_en or dept3_zh or dept3_en)
-
-            if not (has_position or has_department):
-                missing_fields.append('職位或部門')
-
-            # 檢查聯絡方式 (手機 OR 公司電話 OR Email OR Line ID，至少要有一個)
-            mobile = (card.get('mobile_phone') or '').strip()
-            phone1 = (card.get('company_phone1') or '').strip()
-            phone2 = (card.get('company_phone2') or '').strip()
-            email = (card.get('email') or '').strip()
-            line_id = (card.get('line_id') or '').strip()
-            if not (mobile or phone1 or phone2 or email or line_id):
-                missing_fields.append('聯絡方式')
-
-            return {
-                'status': 'normal' if len(missing_fields) == 0 else 'problem',
-                'missing_fields': missing_fields,
-                'missing_count': len(missing_fields)
-            }
+    except Exception as e:
+        logger.error(f"獲取統計數據失敗: {str(e)}")
+        return ResponseHandler.error(
+            message="獲取統計數據失敗",
+            error=e
+        )
 
-        total_count = 0
-        normal_count = 0
-        problem_count = 0
-        industry_stats: Dict[str, int] = {}
-
-        for card in iterate_cards_for_stats(db):
-            total_count += 1
-            card_status = check_card_status_backend(card)
-            if card_status['status'] == 'normal':
-                normal_count += 1
-            else:
-                problem_count += 1
-
-            # 統計產業分類
-            industry = (card.get('industry_category') or '').strip()
-            if industry:
-                industry_stats[industry] = industry_stats.get(industry, 0) + 1
-
-        stats_data = {
-            'total': total_count,
-            'normal': normal_count,
-            'problem': problem_count,
-            'industry_stats': industry_stats
-        }
-
-        cache.set(STATS_CACHE_KEY, stats_data, ttl_minutes=3)
+@router.post("/stats/rebuild")
+def rebuild_cards_stats(db: Session = Depends(get_db), current_user: str = Depends(get_current_user)):
+    """全表重建統計摘要，修正計數漂移"""
+    try:
+        stats_data = rebuild_card_stats(db)
+        invalidate_card_stats_cache()
 
         return ResponseHandler.success(
             data=stats_data,
-            message="獲取統計數據成功"
+            message="統計數據重建成功"
         )
 
     except Exception as e:
-        logger.error(f"獲取統計數據失敗: {str(e)}")
+        logger.error(f"重建統計數據失敗: {str(e)}")
         return ResponseHandler.error(
-            message="獲取統計數據失敗",
+            message="重建統計數據失敗",
+            error=e
+        )
+
+@router.post("/images/gc")
+def collect_card_images_garbage(
+    dry_run: bool = Query(False, description="只統計可清理的檔案，不刪除"),
+    db: Session = Depends(get_db),
+    current_user: str = Depends(get_current_user)
+):
+    """立即清理未被任何名片引用、且超過保留期的圖片（含未保存的裁切預覽）"""
+    try:
+        stats = collect_garbage(db, dry_run=dry_run)
+        return ResponseHandler.success(
+            data=stats,
+            message=f"{'可清理' if dry_run else '已清理'} {stats['removed']} 個未引用圖片"
+        )
+
+    except Exception as e:
+        logger.error(f"清理圖片失敗: {str(e)}")
+        return ResponseHandler.error(
+            message="清理圖片失敗",
             error=e
         )
 
@@ -400,22 +448,15 @@ async def crop_preview(
 ):
     """
     名片裁切預覽 API
-    回傳裁切後預覽圖與四點座標
+    回傳裁切後預覽圖 URL（/images/previews/...，可帶 w / fmt 取縮圖）與四點座標
     enhance=false: 輕量裁切（只做邊緣偵測+透視校正，快速預覽用）
     enhance=true: 完整增強（裁切+放大+降噪+銳化，OCR用）
     """
-    temp_input_path = None
-    temp_output_path = None
-
     try:
         if not file or not file.filename:
             return ResponseHandler.error(message="未提供圖片", status_code=400)
 
-        suffix = os.path.splitext(file.filename)[1] or ".jpg"
-
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_input:
-            shutil.copyfileobj(file.file, temp_input)
-            temp_input_path = temp_input.name
+        image_data = await file.read()
 
         parsed_corners = None
         if corners:
@@ -424,10 +465,11 @@ async def crop_preview(
         do_enhance = enhance and enhance.lower() == "true"
         scale_factor = 3 if do_enhance else 0
 
-        enhancer = CardEnhancementService()
-        result = enhancer.process_image_with_metadata(
-            input_path=temp_input_path,
-            output_path=None,
+        # 裁切結果寫入圖片庫，保存時以 cropped_temp_path 直接引用；未保存的預覽由定期清理刪除
+        result = await image_executor.run(
+            crop_card_image,
+            image_data,
+            store=True,
             scale_factor=scale_factor,
             auto_detect=(parsed_corners is None),
             corners=parsed_corners,
@@ -440,40 +482,24 @@ async def crop_preview(
                 status_code=500
             )
 
-        temp_output_path = result["output_path"]
-
-        # 將裁切結果搬到 uploads 目錄保留，供保存時直接使用
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-        preview_filename = f"preview_cropped_{timestamp}.jpg"
-        preview_saved_path = os.path.join(UPLOAD_DIR, preview_filename)
-        shutil.move(temp_output_path, preview_saved_path)
-        temp_output_path = None  # 已搬移，不需要 finally 清理
-
-        cropped_preview_base64 = image_file_to_data_url(preview_saved_path)
-
         return ResponseHandler.success(
             data={
                 "detected": result.get("detected", False),
                 "corners": result.get("corners"),
-                "cropped_preview_base64": cropped_preview_base64,
-                "cropped_temp_path": preview_saved_path,
+                "cropped_preview_url": preview_image_url(result["output_path"]),
+                "cropped_temp_path": result["output_path"],
                 "detection_method": result.get("detection_method", "unknown")
             },
             message="裁切預覽成功"
         )
 
+    except (ImageQueueFullError, ImageJobTimeoutError) as e:
+        return image_busy_response(e)
     except Exception as e:
         return ResponseHandler.error(
             message=f"裁切預覽失敗: {str(e)}",
             status_code=500
         )
-    finally:
-        # 只清理輸入暫存檔，裁切結果已搬到 uploads
-        if temp_input_path and os.path.exists(temp_input_path):
-            try:
-                os.remove(temp_input_path)
-            except Exception:
-                pass
 
 
 @router.put("/{card_id}/crop")
@@ -502,9 +528,8 @@ async def update_card_crop(
             return ResponseHandler.error(message=f"該名片沒有{side}面原圖", status_code=400)
 
         # 用原圖重新裁切
-        cropped_path, final_corners = generate_cropped_image(
+        cropped_path, final_corners = await generate_cropped_image(
             original_image_path=image_path,
-            upload_prefix=side,
             crop_corners=corners
         )
 
@@ -516,16 +541,13 @@ async def update_card_crop(
         db.refresh(db_card)
 
         # 清除緩存
-        cache.delete(f"card_{card_id}")
+        cache.delete(card_cache_key(card_id))
 
         # 回傳更新後的完整資料
-        card_dict = Card.model_validate(db_card).model_dump()
-        for key in card_dict:
-            if hasattr(card_dict[key], 'isoformat'):
-                card_dict[key] = card_dict[key].isoformat()
-
-        return ResponseHandler.success(data=card_dict, message="裁切更新成功")
+        return ResponseHandler.success(data=card_to_dict(db_card), message="裁切更新成功")
 
+    except (ImageQueueFullError, ImageJobTimeoutError) as e:
+        return image_busy_response(e)
     except Exception as e:
         return ResponseHandler.error(message=f"裁切更新失敗: {str(e)}", status_code=500)
 
@@ -534,7 +556,7 @@ async def update_card_crop(
 def read_card(card_id: int, db: Session = Depends(get_db), current_user: str = Depends(get_current_user)):
     try:
         # 嘗試從緩存獲取
-        cache_key = f"card_{card_id}"
+        cache_key = card_cache_key(card_id)
         cached_card = cache.get(cache_key)
         if cached_card:
             return ResponseHandler.success(
@@ -550,7 +572,7 @@ def read_card(card_id: int, db: Session = Depends(get_db), current_user: str = D
             )
         
         # 緩存結果
-        cache.set(cache_key, card, ttl_minutes=10)
+        cache.set(cache_key, card, ttl_minutes=10, tags=[CARDS_CACHE_TAG])
         
         return ResponseHandler.success(
             data=card,
@@ -629,35 +651,25 @@ async def add_card(
         final_back_crop_corners = None
         
         if front_image and front_image.filename:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            front_filename = f"front_{timestamp}_{front_image.filename}"
-            front_image_path = os.path.join(UPLOAD_DIR, front_filename)
-
-            with open(front_image_path, "wb") as buffer:
-                shutil.copyfileobj(front_image.file, buffer)
+            front_image_path, front_image_data = await save_uploaded_image(front_image)
 
-            front_cropped_image_path, final_front_crop_corners = _crop_image_by_source(
+            front_cropped_image_path, final_front_crop_corners = await _crop_image_by_source(
                 original_image_path=front_image_path,
-                upload_prefix="front",
                 crop_corners=front_crop_corners,
                 image_source=front_image_source,
-                cropped_temp_path=front_cropped_temp_path
+                cropped_temp_path=front_cropped_temp_path,
+                image_data=front_image_data
             )
 
         if back_image and back_image.filename:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            back_filename = f"back_{timestamp}_{back_image.filename}"
-            back_image_path = os.path.join(UPLOAD_DIR, back_filename)
+            back_image_path, back_image_data = await save_uploaded_image(back_image)
 
-            with open(back_image_path, "wb") as buffer:
-                shutil.copyfileobj(back_image.file, buffer)
-
-            back_cropped_image_path, final_back_crop_corners = _crop_image_by_source(
+            back_cropped_image_path, final_back_crop_corners = await _crop_image_by_source(
                 original_image_path=back_image_path,
-                upload_prefix="back",
                 crop_corners=back_crop_corners,
                 image_source=back_image_source,
-                cropped_temp_path=back_cropped_temp_path
+                cropped_temp_path=back_cropped_temp_path,
+                image_data=back_image_data
             )
         
         # 創建名片數據對象
@@ -707,6 +719,8 @@ async def add_card(
             status_code=201
         )
         
+    except (ImageQueueFullError, ImageJobTimeoutError) as e:
+        return image_busy_response(e)
     except Exception as e:
         logger.error(f"創建名片失敗: {str(e)}")
         return ResponseHandler.error(
@@ -787,44 +801,32 @@ async def edit_card(
         final_back_crop_corners = existing_card.get('back_crop_corners')
 
         if front_image and front_image.filename:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            front_filename = f"front_{timestamp}_{front_image.filename}"
-            front_image_path = os.path.join(UPLOAD_DIR, front_filename)
-
-            with open(front_image_path, "wb") as buffer:
-                shutil.copyfileobj(front_image.file, buffer)
+            front_image_path, front_image_data = await save_uploaded_image(front_image)
 
-            front_cropped_image_path, final_front_crop_corners = generate_cropped_image(
+            front_cropped_image_path, final_front_crop_corners = await generate_cropped_image(
                 original_image_path=front_image_path,
-                upload_prefix="front",
-                crop_corners=front_crop_corners
+                crop_corners=front_crop_corners,
+                image_data=front_image_data
             )
         elif front_crop_corners and front_image_path:
             # 沒上傳新圖但有新的裁切座標 → 用原圖重新裁切
-            front_cropped_image_path, final_front_crop_corners = generate_cropped_image(
+            front_cropped_image_path, final_front_crop_corners = await generate_cropped_image(
                 original_image_path=front_image_path,
-                upload_prefix="front",
                 crop_corners=front_crop_corners
             )
 
         if back_image and back_image.filename:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            back_filename = f"back_{timestamp}_{back_image.filename}"
-            back_image_path = os.path.join(UPLOAD_DIR, back_filename)
-
-            with open(back_image_path, "wb") as buffer:
-                shutil.copyfileobj(back_image.file, buffer)
+            back_image_path, back_image_data = await save_uploaded_image(back_image)
 
-            back_cropped_image_path, final_back_crop_corners = generate_cropped_image(
+            back_cropped_image_path, final_back_crop_corners = await generate_cropped_image(
                 original_image_path=back_image_path,
-                upload_prefix="back",
-                crop_corners=back_crop_corners
+                crop_corners=back_crop_corners,
+                image_data=back_image_data
             )
         elif back_crop_corners and back_image_path:
             # 沒上傳新圖但有新的裁切座標 → 用原圖重新裁切
-            back_cropped_image_path, final_back_crop_corners = generate_cropped_image(
+            back_cropped_image_path, final_back_crop_corners = await generate_cropped_image(
                 original_image_path=back_image_path,
-                upload_prefix="back",
                 crop_corners=back_crop_corners
             )
         
@@ -877,8 +879,7 @@ async def edit_card(
             )
         
         # 清除緩存
-        cache_key = f"card_{card_id}"
-        cache.delete(cache_key)
+        cache.delete(card_cache_key(card_id))
         invalidate_card_stats_cache()
         
         return ResponseHandler.success(
@@ -886,6 +887,8 @@ async def edit_card(
             message="名片更新成功"
         )
         
+    except (ImageQueueFullError, ImageJobTimeoutError) as e:
+        return image_busy_response(e)
     except Exception as e:
         logger.error(f"更新名片失敗: {str(e)}")
         return ResponseHandler.error(
@@ -906,12 +909,15 @@ def delete_all_cards(db: Session = Depends(get_db), current_user: str = Depends(
                 message="沒有名片需要刪除"
             )
         
-        # 直接使用 SQL 刪除所有記錄
+        # 直接使用 SQL 刪除所有記錄（批量導入檢查點一併清空，之後可重新導入）
         deleted_count = db.query(CardORM).delete()
+        db.query(BatchImportCheckpointORM).delete()
         db.commit()
+        rebuild_card_stats(db)
         
-        # 清除所有相關緩存
-        cache.clear()
+        # 清除所有名片相關緩存（含計數與匯出重用等 card_counts 標記的快取）
+        cache.invalidate_tag(CARDS_CACHE_TAG)
+        invalidate_card_stats_cache()
         
         logger.info(f"成功刪除 {deleted_count}/{total_count} 張名片")
         
@@ -942,24 +948,21 @@ def remove_card(card_id: int, db: Session = Depends(get_db), current_user: str =
                 status_code=404
             )
         
-        # 刪除相關圖片檔案
-        image_fields = ['front_image_path', 'back_image_path',
-                        'front_cropped_image_path', 'back_cropped_image_path']
-        for field in image_fields:
-            path = card.get(field)
-            if path and os.path.exists(path):
-                try:
-                    os.remove(path)
-                    logger.info(f"已刪除圖片: {path}")
-                except Exception as e:
-                    logger.warning(f"刪除圖片失敗 {path}: {e}")
-
         if not delete_card(db, card_id):
             return ResponseHandler.error(
                 message="刪除名片失敗",
                 status_code=400
             )
 
+        # 刪除相關圖片檔案（圖片庫中相同內容可能被其他名片共用，只刪除已無引用的檔案）
+        image_fields = ['front_image_path', 'back_image_path',
+                        'front_cropped_image_path', 'back_cropped_image_path']
+        try:
+            release_images(db, [card.get(field) for field in image_fields])
+        except Exception as e:
+            logger.warning(f"釋放名片圖片失敗 card_id={card_id}: {e}")
+
+        cache.delete(card_cache_key(card_id))
         invalidate_card_stats_cache()
         return ResponseHandler.success(
             message="名片刪除成功"
@@ -974,7 +977,8 @@ def remove_card(card_id: int, db: Session = Depends(get_db), current_user: str =
 
 @router.get("/export/download")
 def export_cards(
-    format: str = Query("csv", enum=["csv", "excel", "vcard"]),
+    format: str = Query("csv", enum=["csv", "excel", "vcard", "zip", "parquet"]),
+    data_format: str = Query("csv", enum=list(ZIP_DATA_FORMATS), description="ZIP 內資料表格式"),
     search: Optional[str] = Query(None, description="搜索關鍵詞"),
     industry: Optional[str] = Query(None, description="產業分類篩選"),
     status: Optional[str] = Query(None, description="狀態篩選: all / normal / problem"),
@@ -988,93 +992,31 @@ def export_cards(
     has_phone: Optional[bool] = Query(None, description="有無電話"),
     has_email: Optional[bool] = Query(None, description="有無Email"),
     has_address: Optional[bool] = Query(None, description="有無地址"),
+    updated_since: Optional[datetime] = Query(None, description="增量匯出：只匯出此時間（ISO 8601）之後更新的名片"),
     db: Session = Depends(get_db),
     current_user: str = Depends(get_current_user)
 ):
-    """匯出名片數據，支持篩選條件（含高級篩選）"""
+    """匯出名片數據，支持篩選條件（含高級篩選）；帶 updated_since 時為增量匯出"""
+    if format == "parquet" and not PARQUET_AVAILABLE:
+        raise HTTPException(status_code=501, detail="伺服器未安裝 pyarrow，無法匯出 parquet")
     try:
         logger.info(f"開始匯出，格式: {format}, search={search}, industry={industry}, status={status}")
 
-        # 有篩選條件時用分頁查詢（不限筆數），否則取全部
-        has_filter = (search or (industry and industry != '全部') or (status and status != 'all')
-                      or name_zh or name_en or company or position
-                      or date_from or date_to
-                      or has_phone is not None or has_email is not None or has_address is not None)
-        if has_filter:
-            cards, total = get_cards_paginated(
-                db, skip=0, limit=999999,
-                search=search,
-                industry=industry if industry and industry != '全部' else None,
-                filter_status=status if status and status != 'all' else None,
-                name_zh=name_zh, name_en=name_en, company=company, position=position,
-                date_from=date_from, date_to=date_to,
-                has_phone=has_phone, has_email=has_email, has_address=has_address,
-            )
-        else:
-            cards = get_cards(db)
-
-        logger.info(f"找到 {len(cards)} 張名片")
+        filters = dict(
+            search=search, industry=industry, filter_status=status,
+            name_zh=name_zh, name_en=name_en, company=company, position=position,
+            date_from=date_from, date_to=date_to,
+            has_phone=has_phone, has_email=has_email, has_address=has_address,
+            updated_since=updated_since,
+        )
 
         # 檔名日期
         today = datetime.now().strftime("%Y-%m-%d")
 
-        # 33 個欄位定義（中文標頭 + DB 欄位名）
-        export_columns = [
-            ('ID', 'id'),
-            ('姓名（中文）', 'name_zh'),
-            ('姓名（英文）', 'name_en'),
-            ('公司名稱（中文）', 'company_name_zh'),
-            ('公司名稱（英文）', 'company_name_en'),
-            ('職位（中文）', 'position_zh'),
-            ('職位（英文）', 'position_en'),
-            ('職位1（中文）', 'position1_zh'),
-            ('職位1（英文）', 'position1_en'),
-            ('部門1（中文）', 'department1_zh'),
-            ('部門1（英文）', 'department1_en'),
-            ('部門2（中文）', 'department2_zh'),
-            ('部門2（英文）', 'department2_en'),
-            ('部門3（中文）', 'department3_zh'),
-            ('部門3（英文）', 'department3_en'),
-            ('手機', 'mobile_phone'),
-            ('公司電話1', 'company_phone1'),
-            ('公司電話2', 'company_phone2'),
-            ('傳真', 'fax'),
-            ('Email', 'email'),
-            ('Line ID', 'line_id'),
-            ('WeChat ID', 'wechat_id'),
-            ('公司地址1（中文）', 'company_address1_zh'),
-            ('公司地址1（英文）', 'company_address1_en'),
-            ('公司地址2（中文）', 'company_address2_zh'),
-            ('公司地址2（英文）', 'company_address2_en'),
-            ('備註1', 'note1'),
-            ('備註2', 'note2'),
-            ('產業分類', 'industry_category'),
-            ('分類信心度', 'classification_confidence'),
-            ('分類原因', 'classification_reason'),
-            ('建立時間', 'created_at'),
-            ('更新時間', 'updated_at'),
-        ]
-
-        def get_export_value(card, field):
-            value = card.get(field, '') or ''
-            if field == 'classification_confidence' and value:
-                try:
-                    return f'{float(value)*100:.0f}%'
-                except:
-                    pass
-            return value
-
         if format == "csv":
-            output = io.StringIO()
-            writer = csv.writer(output)
-            writer.writerow([header for header, _ in export_columns])
-            for card in cards:
-                writer.writerow([get_export_value(card, field) for _, field in export_columns])
-            output.seek(0)
-            content = output.getvalue().encode('utf-8-sig')
-
+            # 逐批讀取並逐列輸出，第一個位元組立即送出
             return StreamingResponse(
-                io.BytesIO(content),
+                stream_export(stream_csv, filters),
                 media_type="text/csv",
                 headers={
                     "Content-Disposition": f"attachment; filename=cards_{today}.csv",
@@ -1084,118 +1026,48 @@ def export_cards(
 
         elif format == "excel":
             try:
-                from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-
-                wb = openpyxl.Workbook()
-                ws = wb.active
-                ws.title = "名片資料"
-
-                # 樣式定義
-                header_font = Font(name='Microsoft JhengHei', bold=True, color='FFFFFF', size=11)
-                header_fill = PatternFill(start_color='1F4E79', end_color='1F4E79', fill_type='solid')
-                header_alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-                light_blue_fill = PatternFill(start_color='D6E4F0', end_color='D6E4F0', fill_type='solid')
-                white_fill = PatternFill(start_color='FFFFFF', end_color='FFFFFF', fill_type='solid')
-                thin_border = Border(
-                    left=Side(style='thin', color='B0B0B0'),
-                    right=Side(style='thin', color='B0B0B0'),
-                    top=Side(style='thin', color='B0B0B0'),
-                    bottom=Side(style='thin', color='B0B0B0'),
-                )
-                data_font = Font(name='Microsoft JhengHei', size=10)
-                data_alignment = Alignment(vertical='center', wrap_text=False)
-
-                # 寫標頭
-                for col_idx, (header, _) in enumerate(export_columns, 1):
-                    cell = ws.cell(row=1, column=col_idx, value=header)
-                    cell.font = header_font
-                    cell.fill = header_fill
-                    cell.alignment = header_alignment
-                    cell.border = thin_border
-
-                # 寫資料
-                for row_idx, card in enumerate(cards, 2):
-                    fill = light_blue_fill if row_idx % 2 == 0 else white_fill
-                    for col_idx, (_, field) in enumerate(export_columns, 1):
-                        value = get_export_value(card, field)
-                        cell = ws.cell(row=row_idx, column=col_idx, value=value)
-                        cell.font = data_font
-                        cell.fill = fill
-                        cell.alignment = data_alignment
-                        cell.border = thin_border
-
-                # 自動調整欄寬（中文雙倍寬，最寬 45）
-                for column in ws.columns:
-                    max_length = 0
-                    col_letter = column[0].column_letter
-                    for cell in column:
-                        try:
-                            text = str(cell.value or '')
-                            length = len(text) + sum(1 for c in text if ord(c) > 127)
-                            if length > max_length:
-                                max_length = length
-                        except:
-                            pass
-                    ws.column_dimensions[col_letter].width = min(max_length + 3, 45)
-
-                # 凍結第一列 + 設定列高
-                ws.freeze_panes = 'A2'
-                ws.row_dimensions[1].height = 30
-                for row_idx in range(2, len(cards) + 2):
-                    ws.row_dimensions[row_idx].height = 22
-
-                output = io.BytesIO()
-                wb.save(output)
-                output.seek(0)
-
+                # write_only 逐列寫入暫存檔，回應送完後刪除
+                excel_path = write_cards_excel(iterate_export_cards(db, filters))
                 logger.info("EXCEL文件生成成功")
 
-                return StreamingResponse(
-                    output,
+                return FileResponse(
+                    excel_path,
                     media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                    headers={
-                        "Content-Disposition": f"attachment; filename=cards_{today}.xlsx",
-                        "Content-Type": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                    }
+                    filename=f"cards_{today}.xlsx",
+                    background=BackgroundTask(os.remove, excel_path)
                 )
 
             except Exception as e:
                 logger.error(f"生成EXCEL文件時發生錯誤: {str(e)}")
                 raise HTTPException(status_code=500, detail=f"EXCEL生成失敗: {str(e)}")
-                
+
         elif format == "vcard":
-            output = io.StringIO()
-            for card in cards:
-                output.write(f"BEGIN:VCARD\nVERSION:3.0\n")
-                if card.get('name_zh'):
-                    output.write(f"FN:{card.get('name_zh')}\n")
-                if card.get('company_name_zh'):
-                    output.write(f"ORG:{card.get('company_name_zh')}\n")
-                if card.get('position_zh'):
-                    output.write(f"TITLE:{card.get('position_zh')}\n")
-                if card.get('company_phone1'):
-                    output.write(f"TEL;TYPE=WORK,VOICE:{card.get('company_phone1')}\n")
-                if card.get('mobile_phone'):
-                    output.write(f"TEL;TYPE=CELL:{card.get('mobile_phone')}\n")
-                if card.get('email'):
-                    output.write(f"EMAIL;TYPE=INTERNET:{card.get('email')}\n")
-                if card.get('company_address1_zh'):
-                    address = card.get('company_address1_zh')
-                    if card.get('company_address2_zh'):
-                        address += f" {card.get('company_address2_zh')}"
-                    output.write(f"ADR;TYPE=WORK:;;{address};;;;\n")
-                output.write("END:VCARD\n")
-            output.seek(0)
-            content = output.getvalue().encode('utf-8')
-            
             return StreamingResponse(
-                io.BytesIO(content),
+                stream_export(stream_vcard, filters),
                 media_type="text/vcard",
                 headers={
                     "Content-Disposition": f"attachment; filename=cards_{today}.vcf",
                     "Content-Type": "text/vcard; charset=utf-8"
                 }
             )
+
+        elif format == "parquet":
+            # 原生型別欄位，供分析工具直接讀取；同樣寫入暫存檔後回傳
+            parquet_path = write_cards_parquet(iterate_export_cards(db, filters, raw=True))
+            return FileResponse(
+                parquet_path,
+                media_type="application/vnd.apache.parquet",
+                filename=f"cards_{today}.parquet",
+                background=BackgroundTask(os.remove, parquet_path)
+            )
+
+        elif format == "zip":
+            # 資料表 + 正反面圖片，邊讀邊打包送出
+            return StreamingResponse(
+                stream_zip_export(filters, data_format),
+                media_type="application/zip",
+                headers={"Content-Disposition": f"attachment; filename=cards_{today}.zip"}
+            )
         else:
             raise HTTPException(status_code=400, detail="不支援的匯出格式")
             
@@ -1203,152 +1075,127 @@ def export_cards(
         logger.error(f"匯出過程中發生錯誤: {str(e)}")
         raise HTTPException(status_code=500, detail=f"匯出失敗: {str(e)}")
 
+@router.post("/export")
+def create_export_job(
+    format: str = Query("csv", enum=list(EXPORT_JOB_FORMATS)),
+    data_format: str = Query("csv", enum=list(ZIP_DATA_FORMATS), description="ZIP 內資料表格式"),
+    search: Optional[str] = Query(None, description="搜索關鍵詞"),
+    industry: Optional[str] = Query(None, description="產業分類篩選"),
+    status: Optional[str] = Query(None, description="狀態篩選: all / normal / problem"),
+    # 高級篩選
+    name_zh: Optional[str] = Query(None, description="中文姓名篩選"),
+    name_en: Optional[str] = Query(None, description="英文姓名篩選"),
+    company: Optional[str] = Query(None, description="公司篩選"),
+    position: Optional[str] = Query(None, description="職位篩選"),
+    date_from: Optional[str] = Query(None, description="導入日期起 (YYYY-MM-DD)"),
+    date_to: Optional[str] = Query(None, description="導入日期迄 (YYYY-MM-DD)"),
+    has_phone: Optional[bool] = Query(None, description="有無電話"),
+    has_email: Optional[bool] = Query(None, description="有無Email"),
+    has_address: Optional[bool] = Query(None, description="有無地址"),
+    updated_since: Optional[datetime] = Query(None, description="增量匯出：只匯出此時間（ISO 8601）之後更新的名片"),
+    db: Session = Depends(get_db),
+    current_user: str = Depends(get_current_user)
+):
+    """
+    建立背景匯出任務（後台任務）
+
+    立即返回 task_id，進度透過 /cards/tasks/{task_id} 查詢，完成後由 download_url 下載（支援 Range 續傳）；
+    相同篩選條件與格式在短時間內重複請求時重用既有任務與檔案。
+    """
+    if format == "parquet" and not PARQUET_AVAILABLE:
+        return ResponseHandler.error(message="伺服器未安裝 pyarrow，無法匯出 parquet", status_code=501)
+    try:
+        filters = dict(
+            search=search, industry=industry, filter_status=status,
+            name_zh=name_zh, name_en=name_en, company=company, position=position,
+            date_from=date_from, date_to=date_to,
+            has_phone=has_phone, has_email=has_email, has_address=has_address,
+            updated_since=updated_since,
+        )
+        task_id, reused = start_export_job(
+            format, filters,
+            count_rows=lambda: count_cards_filtered(db, **filters),
+            tags=[CARDS_CACHE_TAG, CARD_COUNTS_CACHE_TAG],
+            options={"data_format": data_format} if format == "zip" else None,
+        )
+
+        task_status = task_manager.get_status(task_id)
+        task_status.update({
+            "reused": reused,
+            "download_url": f"{API_V1_PREFIX}/cards/export/{task_id}/download",
+        })
+        return ResponseHandler.success(
+            data=task_status,
+            message="沿用既有匯出任務" if reused else "匯出任務已創建"
+        )
+
+    except Exception as e:
+        logger.error(f"建立匯出任務失敗: {str(e)}")
+        return ResponseHandler.error(message="建立匯出任務失敗", error=e)
+
+@router.get("/export/{task_id}/download")
+def download_export_file(task_id: str, current_user: str = Depends(get_current_user)):
+    """下載背景匯出檔案（Content-Length / ETag / Range，可續傳）"""
+    export_file = get_export_file(task_id)
+    if not export_file:
+        task = task_manager.get_task(task_id)
+        if task and task.status.value in ACTIVE_STATUSES:
+            return ResponseHandler.error(message="匯出尚未完成", status_code=409)
+        return ResponseHandler.error(message=f"找不到匯出檔案 {task_id}", status_code=404)
+
+    export_date = (export_file["created_at"] or datetime.now()).strftime("%Y-%m-%d")
+    return FileResponse(
+        export_file["path"],
+        media_type=export_file["media_type"],
+        filename=f"cards_{export_date}.{export_file['extension']}",
+    )
+
 @router.post("/batch-import")
-async def batch_import_cards(db: Session = Depends(get_db), current_user: str = Depends(get_current_user)):
+def batch_import_cards(current_user: str = Depends(get_current_user)):
     """
-    使用集成到OCRService的批量導入功能 - 整合智能批量處理
+    資料夾智能批量導入（後台任務）
+
+    立即返回 task_id，逐張進度透過 /cards/tasks/{task_id} 查詢；
+    已導入過的圖片（依內容雜湊檢查點）會自動跳過，任務中斷後可直接重新發起。
     """
     try:
-        from backend.services.card_enhancement_service import BatchProcessingService
-        
-        # 初始化服務
-        ocr_service = OCRService()
-        batch_service = BatchProcessingService(ocr_service.card_enhancer)
-        
-        # 批量處理資料夾
-        batch_folder = "ocr_card_background/uploads"
-        
-        if not os.path.exists(batch_folder):
+        from backend.services.batch_import_service import (
+            BATCH_IMPORT_FOLDER, BatchImportJob, list_batch_images
+        )
+
+        if not os.path.exists(BATCH_IMPORT_FOLDER):
             return ResponseHandler.error(
-                message=f"批量導入資料夾不存在: {batch_folder}",
+                message=f"批量導入資料夾不存在: {BATCH_IMPORT_FOLDER}",
                 status_code=404
             )
-        
-        # 獲取所有圖片文件
-        image_files = []
-        for ext in ['.jpg', '.jpeg', '.png']:
-            image_files.extend(glob.glob(os.path.join(batch_folder, f'*{ext}')))
-            image_files.extend(glob.glob(os.path.join(batch_folder, f'*{ext.upper()}')))
-        
+
+        image_files = list_batch_images(BATCH_IMPORT_FOLDER)
         if not image_files:
             return ResponseHandler.error(
-                message=f"在 {batch_folder} 中未找到任何圖片文件",
+                message=f"在 {BATCH_IMPORT_FOLDER} 中未找到任何圖片文件",
                 status_code=404
             )
-        
-        logger.info(f"找到 {len(image_files)} 張圖片準備智能批量處理")
-        
-        # 記錄開始時的記憶體狀況
-        batch_service.log_memory_status("批量導入開始前")
-        
-        success_count = 0
-        error_list = []
-        
-        # 使用智能批量處理進行OCR和數據庫操作
-        try:
-            processed_count = 0
-            
-            # 分批處理圖片
-            for image_file in image_files:
-                try:
-                    processed_count += 1
-                    
-                    # 記憶體檢查和清理
-                    if batch_service.should_cleanup_memory():
-                        batch_service.cleanup_memory()
-                        logger.info(f"處理第 {processed_count}/{len(image_files)} 張時執行記憶體清理")
-                    
-                    logger.info(f"處理第 {processed_count}/{len(image_files)} 張圖片: {os.path.basename(image_file)}")
-                    
-                    # 使用OCRService處理圖片
-                    ocr_result = ocr_service.process_single_image(image_file)
-                    
-                    if not ocr_result or not any(ocr_result.values()):
-                        error_list.append(f"{os.path.basename(image_file)}: OCR處理返回空結果")
-                        continue
-                    
-                    # 檢查必要欄位
-                    name_zh = ocr_result.get('name_zh', '').strip()
-                    if not name_zh:
-                        # 如果沒有姓名，嘗試使用文件名作為姓名
-                        filename = os.path.basename(image_file)
-                        name_zh = os.path.splitext(filename)[0]
-                        logger.info(f"使用文件名作為姓名: {name_zh}")
-                    
-                    # 複製圖片到正式存儲位置
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    filename = os.path.basename(image_file)
-                    new_filename = f"batch_{timestamp}_{processed_count:03d}_{filename}"
-                    new_image_path = os.path.join(UPLOAD_DIR, new_filename)
-                    shutil.copy2(image_file, new_image_path)
-                
-                    # 直接使用OCR結果的標準化格式
-                    card_data = Card(
-                        name_zh=name_zh,
-                        name_en=ocr_result.get('name_en', ''),
-                        company_name_zh=ocr_result.get('company_name_zh', ''),
-                        company_name_en=ocr_result.get('company_name_en', ''),
-                        position_zh=ocr_result.get('position_zh', ''),
-                        position_en=ocr_result.get('position_en', ''),
-                        position1_zh=ocr_result.get('position1_zh', ''),
-                        position1_en=ocr_result.get('position1_en', ''),
-                        department1_zh=ocr_result.get('department1_zh', ''),
-                        department1_en=ocr_result.get('department1_en', ''),
-                        department2_zh=ocr_result.get('department2_zh', ''),
-                        department2_en=ocr_result.get('department2_en', ''),
-                        department3_zh=ocr_result.get('department3_zh', ''),
-                        department3_en=ocr_result.get('department3_en', ''),
-                        mobile_phone=ocr_result.get('mobile_phone', ''),
-                        company_phone1=ocr_result.get('company_phone1', ''),
-                        company_phone2=ocr_result.get('company_phone2', ''),
-                        fax=ocr_result.get('fax', ''),
-                        email=ocr_result.get('email', ''),
-                        line_id=ocr_result.get('line_id', ''),
-                        wechat_id=ocr_result.get('wechat_id', ''),
-                        company_address1_zh=ocr_result.get('company_address1_zh', ''),
-                        company_address1_en=ocr_result.get('company_address1_en', ''),
-                        company_address2_zh=ocr_result.get('company_address2_zh', ''),
-                        company_address2_en=ocr_result.get('company_address2_en', ''),
-                        note1=f'智能批量導入 - {filename}',
-                        note2=f'標準化欄位+OCR識別，字段數: {len(ocr_result)}',
-                        front_image_path=new_image_path,
-                        front_ocr_text=json.dumps(ocr_result, ensure_ascii=False)
-                    )
-                    
-                    # 保存到數據庫
-                    created_card = create_card(db, card_data)
-                    success_count += 1
-                    logger.info(f"成功創建名片: {created_card.get('name_zh', '未知')} (ID: {created_card.get('id', '未知')})")
-                    
-                except Exception as e:
-                    error_msg = f"{os.path.basename(image_file)}: {str(e)}"
-                    error_list.append(error_msg)
-                    logger.error(f"處理圖片失敗: {error_msg}")
-                    continue
-        
-        finally:
-            # 記錄結束時的記憶體狀況和最終清理
-            batch_service.log_memory_status("批量導入結束後")
-            batch_service.cleanup_memory()
-        
-        invalidate_card_stats_cache()
-        # 返回處理結果
-        result_message = f"批量導入完成！成功處理 {success_count}/{len(image_files)} 張名片"
-        if error_list:
-            result_message += f"，失敗 {len(error_list)} 張"
-        
+
+        task_id = task_manager.create_task(total=len(image_files), task_type="batch_import")
+        logger.info(f"創建批量導入任務: task_id={task_id}, total={len(image_files)}")
+
+        job = BatchImportJob(
+            task_id,
+            image_files,
+            on_cards_changed=invalidate_card_stats_cache,
+        )
+        thread = threading.Thread(target=job.run, daemon=True)
+        thread.start()
+
         return ResponseHandler.success(
             data={
+                "task_id": task_id,
+                "status": "processing",
                 "total_files": len(image_files),
-                "processed": processed_count,
-                "success": success_count,
-                "errors": len(error_list),
-                "error_details": error_list[:10],  # 只返回前10個錯誤
-                "total_processed": success_count
             },
-            message=result_message
+            message=f"批量導入任務已創建，共 {len(image_files)} 張圖片"
         )
-        
+
     except Exception as e:
         logger.error(f"批量導入過程中發生錯誤: {str(e)}")
         return ResponseHandler.error(
@@ -1466,7 +1313,7 @@ async def text_import_cards(file: UploadFile = File(...), db: Session = Depends(
             
             # 建立現有名片緩存
             existing_cards_cache = {}
-            all_existing_cards = get_cards(db)
+            all_existing_cards = get_cards(db, fields=["name_zh", "company_name_zh", "mobile_phone"])
             for existing_card in all_existing_cards:
                 key = f"{existing_card.get('name_zh', '')}|{existing_card.get('company_name_zh', '')}|{existing_card.get('mobile_phone', '')}"
                 existing_cards_cache[key] = existing_card
@@ -1755,10 +1602,12 @@ def classify_cards_batch_async(
                         if result and result['success']:
                             card = bg_db.query(CardORM).filter(CardORM.id == result['card_id']).first()
                             if card:
+                                old_stats_keys = card_stats_keys(card)
                                 card.industry_category = result['industry_category']
                                 card.classification_confidence = result['confidence']
                                 card.classification_reason = result['reason']
                                 card.classified_at = datetime.utcnow()
+                                apply_card_stats_delta(bg_db, old_stats_keys, card_stats_keys(card))
 
                     bg_db.commit()
                     invalidate_card_stats_cache()
@@ -1811,16 +1660,17 @@ def classify_single_card(card_id: int, db: Session = Depends(get_db), current_us
         result = classifier.classify_single(company, position)
 
         # 更新数据库
+        old_stats_keys = card_stats_keys(card)
         card.industry_category = result['category']
         card.classification_confidence = result['confidence']
         card.classification_reason = result['reason']
         card.classified_at = datetime.utcnow()
+        apply_card_stats_delta(db, old_stats_keys, card_stats_keys(card))
 
         db.commit()
 
         # 清除缓存
-        cache_key = f"card_{card_id}"
-        cache.delete(cache_key)
+        cache.delete(card_cache_key(card_id))
         invalidate_card_stats_cache()
 
         return ResponseHandler.success(
@@ -0,0 +1,108 @@
+"""
+名片圖片端點：原圖與縮圖 / WebP 衍生圖
+
+GET /images/uploads/{file_path}?w=320&fmt=webp     對應 /static/uploads/{file_path}
+GET /images/card_data/{file_path}?w=320&fmt=webp   對應 /static/card_data/{file_path}
+GET /images/previews/{file_name}?w=640             裁切預覽圖（圖片庫物件，檔名為內容雜湊）
+
+未帶 w 時直接回傳原圖；帶 w 時回傳對齊到允許寬度的衍生圖。
+只能以檔案路徑存取（與靜態目錄相同的曝光範圍），不提供以名片 ID 取圖：
+名片 ID 是連續整數，可被逐一列舉；圖片庫檔名則是無法猜測的內容雜湊。
+"""
+
+import mimetypes
+import os
+import re
+from typing import Optional
+
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import FileResponse, Response
+from backend.core.config import IMAGE_DERIVATIVE_MAX_AGE, UPLOAD_DIR
+from backend.core.response import ResponseHandler
+from backend.services.image_derivative_service import DERIVATIVE_FORMATS, get_derivative, snap_width
+from backend.services.image_executor import ImageJobTimeoutError, ImageQueueFullError
+from backend.services.image_store import image_store
+
+router = APIRouter()
+
+PREVIEW_NAME_RE = re.compile(r"([0-9a-f]{64})\.jpg")
+CACHE_CONTROL = f"public, max-age={IMAGE_DERIVATIVE_MAX_AGE}"
+# 與 main.py 的靜態目錄掛載一致：/static/uploads、/static/card_data
+IMAGE_ROOTS = {"uploads": UPLOAD_DIR, "card_data": "card_data"}
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".bmp"}
+
+
+def preview_image_url(preview_path: str) -> str:
+    """裁切預覽圖的 URL"""
+    return f"/images/previews/{os.path.basename(preview_path)}"
+
+
+def resolve_image_path(root: str, file_path: str) -> Optional[str]:
+    """靜態目錄內的圖片實際路徑；不在目錄內（路徑穿越）或不是圖片時返回 None"""
+    base = os.path.realpath(IMAGE_ROOTS[root])
+    full = os.path.realpath(os.path.join(base, file_path))
+    if os.path.commonpath([base, full]) != base:
+        return None
+    if os.path.splitext(full)[1].lower() not in IMAGE_EXTENSIONS:
+        return None
+    return full
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+async def image_response(request: Request, source_path: str, width: Optional[int], fmt: str):
+    """原圖或衍生圖回應（ETag + Cache-Control，If-None-Match 命中時回應 304）"""
+    if not source_path or not os.path.isfile(source_path):
+        return ResponseHandler.error(message="圖片不存在", status_code=404)
+
+    if width is None:
+        media_type = mimetypes.guess_type(source_path)[0] or "application/octet-stream"
+        return FileResponse(source_path, media_type=media_type, headers={"Cache-Control": CACHE_CONTROL})
+
+    try:
+        path, key = await get_derivative(source_path, snap_width(width), fmt)
+    except (ImageQueueFullError, ImageJobTimeoutError) as e:
+        return ResponseHandler.error(message=str(e), error=e, status_code=503)
+    except ValueError as e:
+        return ResponseHandler.error(message=str(e), status_code=422)
+
+    etag = f'"{key}"'
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=DERIVATIVE_FORMATS[fmt][1], headers=headers)
+
+
+@router.get("/previews/{file_name}")
+async def preview_image(
+    file_name: str,
+    request: Request,
+    w: Optional[int] = Query(None, ge=16, le=4096, description="輸出寬度（對齊到允許寬度）"),
+    fmt: str = Query("jpeg", pattern="^(webp|jpeg)$", description="輸出格式"),
+):
+    """裁切預覽圖"""
+    match = PREVIEW_NAME_RE.fullmatch(file_name)
+    if not match:
+        return ResponseHandler.error(message="圖片不存在", status_code=404)
+    return await image_response(request, image_store.path_for(match.group(1), ".jpg"), w, fmt)
+
+
+@router.get("/{root}/{file_path:path}")
+async def static_image(
+    root: str,
+    file_path: str,
+    request: Request,
+    w: Optional[int] = Query(None, ge=16, le=4096, description="輸出寬度（對齊到允許寬度）"),
+    fmt: str = Query("webp", pattern="^(webp|jpeg)$", description="輸出格式"),
+):
+    """靜態目錄中的名片圖片（路徑同 /static/{root}/...）"""
+    source_path = resolve_image_path(root, file_path) if root in IMAGE_ROOTS else None
+    if source_path is None:
+        return ResponseHandler.error(message="圖片不存在", status_code=404)
+    return await image_response(request, source_path, w, fmt)
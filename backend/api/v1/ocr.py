@@ -1,6 +1,7 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from pydantic import BaseModel
-from backend.services.ocr_service import OCRService
+from backend.services.ocr_service import OCRService, get_model_cache_stats
+from backend.services.ocr_result_cache import get_ocr_result_cache_stats
 from typing import Optional
 
 router = APIRouter()
@@ -25,11 +26,25 @@ async def parse_ocr_fields(request: OCRParseRequest):
     智能解析OCR文字到標準化欄位
     """
     try:
-        parsed_fields = ocr_service.parse_ocr_to_fields(request.ocr_text, request.side)
+        parsed_fields = await ocr_service.parse_ocr_to_fields_async(request.ocr_text, request.side)
         return {
             "success": True, 
             "parsed_fields": parsed_fields,
             "side": request.side
         }
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"OCR解析失敗: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"OCR解析失敗: {str(e)}")
+
+@router.get("/model-cache/stats")
+def model_cache_stats():
+    """
+    OCR 模型 ID 快取命中統計
+    """
+    return {"success": True, "data": get_model_cache_stats()}
+
+@router.get("/result-cache/stats")
+def result_cache_stats():
+    """
+    OCR 結果快取（圖片雜湊）命中統計
+    """
+    return {"success": True, "data": get_ocr_result_cache_stats()}
@@ -1,80 +1,380 @@
 # -*- coding: utf-8 -*-
 """
-簡單的內存緩存實現
+內存緩存實現
+
+有上限的 LRU + TTL 緩存：
+- 依筆數與估算位元組數限制容量，超出時淘汰最久未使用的項目
+- 背景線程定期清除過期項目
+- 以標籤（tag）批次失效，取代逐鍵字串比對
+- get_or_set 合併同一鍵的並發未命中請求，只計算一次
+- 提供命中 / 未命中 / 淘汰等統計
+- 可選共享後端（CACHE_BACKEND=sqlite / redis），多個 worker 共用緩存並同步失效
 """
-from datetime import datetime, timedelta
-from typing import Any, Dict
+import functools
+import logging
+import sys
 import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Set
+
+from backend.core.cache_backends import (
+    EVENT_CLEAR, EVENT_DELETE, EVENT_PATTERN, EVENT_TAG, MISSING, CacheBackend, create_cache_backend
+)
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_MISSING = MISSING
+
+
+def _estimate_size(value: Any, depth: int = 0) -> int:
+    """粗略估算物件佔用的位元組數（容器遞迴兩層以內）"""
+    size = sys.getsizeof(value)
+    if depth >= 2:
+        return size
+    if isinstance(value, dict):
+        size += sum(_estimate_size(k, depth + 1) + _estimate_size(v, depth + 1) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(_estimate_size(v, depth + 1) for v in value)
+    return size
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "size", "tags")
+
+    def __init__(self, value: Any, expires_at: float, size: int, tags: Set[str]):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+        self.tags = tags
+
+
+class _Flight:
+    """進行中的計算，供同鍵的並發請求等待結果"""
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class LRUCache:
+    """
+    線程安全的 LRU + TTL 內存緩存
+
+    Args:
+        max_entries: 最大筆數
+        max_bytes: 估算位元組上限
+        sweep_interval: 背景過期清理間隔秒數（0 表示不啟動）
+        backend: 共享後端；設定後本地緩存作為一級緩存，寫入與失效同步到共享後端
+        event_poll_interval: 輪詢其他 worker 失效事件的最短間隔秒數
+    """
+
+    def __init__(self, max_entries: int = 2000, max_bytes: int = 64 * 1024 * 1024,
+                 sweep_interval: float = 60.0, backend: Optional[CacheBackend] = None,
+                 event_poll_interval: float = 0.2):
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max(1, max_bytes)
+        self.sweep_interval = sweep_interval
+        self.backend = backend
+        self.event_poll_interval = event_poll_interval
+        self._last_event_poll = 0.0
+        self._cache: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        self._inflight: Dict[str, _Flight] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._sweeper: Optional[threading.Thread] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.coalesced = 0
+        self.shared_hits = 0
+        self.backend_errors = 0
+
+    # ---- 內部操作（呼叫前需持有鎖） ----
+
+    def _remove(self, key: str) -> Optional[_Entry]:
+        entry = self._cache.pop(key, None)
+        if entry is None:
+            return None
+        self._bytes -= entry.size
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+        return entry
+
+    def _evict_overflow(self) -> None:
+        while self._cache and (len(self._cache) > self.max_entries or self._bytes > self.max_bytes):
+            oldest_key = next(iter(self._cache))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def _ensure_sweeper(self) -> None:
+        if self.sweep_interval <= 0 or (self._sweeper and self._sweeper.is_alive()):
+            return
+        self._sweeper = threading.Thread(target=self._sweep_loop, name="cache-expiry-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def _sweep_loop(self) -> None:
+        while True:
+            time.sleep(self.sweep_interval)
+            self.sweep_expired()
+
+    # ---- 共享後端 ----
+
+    def _call_backend(self, method: str, *args) -> Any:
+        """呼叫共享後端，失敗時只記錄，不影響本地緩存"""
+        try:
+            return getattr(self.backend, method)(*args)
+        except Exception as e:
+            self.backend_errors += 1
+            logger.warning(f"共享緩存後端 {method} 失敗: {e}")
+            return None
+
+    def _broadcast(self, method: str, kind: str, target: str = "") -> None:
+        if self.backend is not None:
+            if method:
+                self._call_backend(method, *((target,) if target else ()))
+            self._call_backend("publish", kind, target)
+
+    def sync_events(self, force: bool = False) -> None:
+        """套用其他 worker 發布的失效事件"""
+        if self.backend is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_event_poll < self.event_poll_interval:
+            return
+        self._last_event_poll = now
+        events = self._call_backend("poll_events") or []
+        if not events:
+            return
+        with self._lock:
+            for kind, target in events:
+                if kind == EVENT_DELETE:
+                    self._remove(target)
+                elif kind == EVENT_TAG:
+                    for key in list(self._tags.get(target, ())):
+                        self._remove(key)
+                elif kind == EVENT_PATTERN:
+                    for key in [k for k in self._cache if target in k]:
+                        self._remove(key)
+                elif kind == EVENT_CLEAR:
+                    self._cache.clear()
+                    self._tags.clear()
+                    self._bytes = 0
+
+    def _set_local(self, key: str, value: Any, ttl_seconds: float, tags: Iterable[str]) -> None:
+        size = _estimate_size(value)
+        if size > self.max_bytes:
+            return
+        tag_set = set(tags or ())
+        expires_at = time.monotonic() + max(ttl_seconds, 0)
+
+        with self._lock:
+            self._remove(key)
+            self._cache[key] = _Entry(value, expires_at, size, tag_set)
+            self._bytes += size
+            for tag in tag_set:
+                self._tags.setdefault(tag, set()).add(key)
+            self._evict_overflow()
+            self._ensure_sweeper()
+
+    # ---- 公開介面 ----
 
-class SimpleCache:
-    """線程安全的簡單內存緩存"""
-    
-    def __init__(self):
-        self._cache: Dict[str, Any] = {}
-        self._expires_at: Dict[str, datetime] = {}
-        self._lock = threading.Lock()
-    
     def get(self, key: str, default: Any = None) -> Any:
         """獲取緩存值"""
+        self.sync_events()
         with self._lock:
-            if key in self._cache:
-                expires_at = self._expires_at.get(key)
-                if expires_at and datetime.now() <= expires_at:
-                    return self._cache[key]
-                # 過期則刪除
-                del self._cache[key]
-                self._expires_at.pop(key, None)
-            return default
-    
-    def set(self, key: str, value: Any, ttl_minutes: int = 5) -> None:
-        """設置緩存值"""
-        with self._lock:
-            self._cache[key] = value
-            # 存儲到期時間，確保自訂TTL生效
-            ttl_delta = timedelta(minutes=max(ttl_minutes, 0))
-            self._expires_at[key] = datetime.now() + ttl_delta if ttl_minutes else datetime.now()
-    
+            entry = self._cache.get(key)
+            if entry is not None:
+                if time.monotonic() <= entry.expires_at:
+                    self._cache.move_to_end(key)
+                    self.hits += 1
+                    return entry.value
+                # 過期則刪除
+                self._remove(key)
+                self.expirations += 1
+            if self.backend is None:
+                self.misses += 1
+                return default
+
+        # 本地未命中時查詢共享後端（其他 worker 已計算的結果）
+        shared = self._call_backend("get", key)
+        if shared and shared[0] is not MISSING:
+            value, ttl_left, tags = shared
+            self._set_local(key, value, ttl_left, tags)
+            with self._lock:
+                self.hits += 1
+                self.shared_hits += 1
+            return value
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def set(self, key: str, value: Any, ttl_minutes: int = 5, tags: Optional[Iterable[str]] = None) -> None:
+        """
+        設置緩存值
+
+        Args:
+            key: 緩存鍵
+            value: 緩存值
+            ttl_minutes: 存活分鐘數（0 表示立即過期）
+            tags: 失效標籤，可透過 invalidate_tag 批次清除
+        """
+        tag_list = list(tags or ())
+        ttl_seconds = max(ttl_minutes, 0) * 60
+        self._set_local(key, value, ttl_seconds, tag_list)
+        if self.backend is not None:
+            self._call_backend("set", key, value, ttl_seconds, tag_list)
+            # 其他 worker 的舊本地副本失效，下次讀取改從共享後端取得
+            self._call_backend("publish", EVENT_DELETE, key)
+
+    def get_or_set(self, key: str, factory: Callable[[], Any], ttl_minutes: int = 5,
+                   tags: Optional[Iterable[str]] = None) -> Any:
+        """
+        讀取緩存，未命中時呼叫 factory 計算並寫入
+
+        同一鍵的並發未命中只會由第一個請求計算，其餘請求等待並共用結果。
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = factory()
+            self.set(key, flight.value, ttl_minutes, tags)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+
     def delete(self, key: str) -> None:
-        """刪除緩存值"""
-        with self._lock:
-            if key in self._cache:
-                del self._cache[key]
-                self._expires_at.pop(key, None)
-    
+        """刪除緩存值"""
+        with self._lock:
+            self._remove(key)
+        self._broadcast("delete", EVENT_DELETE, key)
+
     def clear(self) -> None:
-        """清空所有緩存"""
-        with self._lock:
-            self._cache.clear()
-            self._expires_at.clear()
-    
+        """清空所有緩存"""
+        with self._lock:
+            self._cache.clear()
+            self._tags.clear()
+            self._bytes = 0
+        self._broadcast("clear", EVENT_CLEAR)
+
+    def invalidate_tag(self, *tags: str) -> int:
+        """使帶有指定標籤的緩存失效，返回清除筆數"""
+        removed = 0
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    if self._remove(key) is not None:
+                        removed += 1
+        for tag in tags:
+            self._broadcast("invalidate_tag", EVENT_TAG, tag)
+        return removed
+
     def invalidate_pattern(self, pattern: str) -> None:
-        """使匹配模式的緩存失效"""
-        with self._lock:
-            keys_to_delete = [k for k in self._cache.keys() if pattern in k]
-            for key in keys_to_delete:
-                del self._cache[key]
-                self._expires_at.pop(key, None)
+        """使鍵名包含指定字串的緩存失效（需掃描全部鍵，優先使用 invalidate_tag）"""
+        with self._lock:
+            for key in [k for k in self._cache if pattern in k]:
+                self._remove(key)
+        self._broadcast("invalidate_pattern", EVENT_PATTERN, pattern)
+
+    def sweep_expired(self) -> int:
+        """清除所有已過期項目，返回清除筆數"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [k for k, entry in self._cache.items() if entry.expires_at < now]
+            for key in expired:
+                self._remove(key)
+            self.expirations += len(expired)
+        return len(expired)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """緩存統計"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._cache),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "tags": len(self._tags),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "coalesced": self.coalesced,
+                "backend": type(self.backend).__name__ if self.backend else "local",
+                "shared_hits": self.shared_hits,
+                "backend_errors": self.backend_errors,
+            }
+
 
 # 全局緩存實例
-cache = SimpleCache()
+cache = LRUCache(
+    max_entries=settings.CACHE_MAX_ENTRIES,
+    max_bytes=settings.CACHE_MAX_MB * 1024 * 1024,
+    sweep_interval=settings.CACHE_SWEEP_INTERVAL,
+    backend=create_cache_backend(settings.CACHE_BACKEND, settings.CACHE_SQLITE_PATH, settings.CACHE_REDIS_URL),
+    event_poll_interval=settings.CACHE_EVENT_POLL_INTERVAL_MS / 1000.0,
+)
+
+
+def _is_session(value: Any) -> bool:
+    try:
+        from sqlalchemy.orm import Session
+    except ImportError:
+        return False
+    return isinstance(value, Session)
+
+
+def make_cache_key(key_prefix: str, args: tuple, kwargs: dict) -> str:
+    """以參數產生緩存鍵，略過 SQLAlchemy Session 等每次請求都不同的物件"""
+    parts = [repr(a) for a in args if not _is_session(a)]
+    parts += [f"{k}={v!r}" for k, v in sorted(kwargs.items()) if not _is_session(v)]
+    return f"{key_prefix}:{':'.join(parts)}"
+
 
 # 緩存裝飾器
-def cached(key_prefix: str, ttl_minutes: int = 5):
-    """緩存裝飾器"""
+def cached(key_prefix: str, ttl_minutes: int = 5, tags: Optional[Iterable[str]] = None):
+    """緩存裝飾器（並發未命中只計算一次）"""
+    tag_list = list(tags or ())
+
     def decorator(func):
+        @functools.wraps(func)
         def wrapper(*args, **kwargs):
             # 生成緩存鍵
-            cache_key = f"{key_prefix}:{args}:{kwargs}"
-            
-            # 嘗試從緩存獲取
-            cached_value = cache.get(cache_key)
-            if cached_value is not None:
-                return cached_value
-            
-            # 執行函數並緩存結果
-            result = func(*args, **kwargs)
-            cache.set(cache_key, result, ttl_minutes)
-            return result
-        
+            cache_key = make_cache_key(key_prefix, args, kwargs)
+            return cache.get_or_set(cache_key, lambda: func(*args, **kwargs), ttl_minutes, tag_list)
+
         return wrapper
-    return decorator
+    return decorator
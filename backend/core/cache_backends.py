@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+共享緩存後端
+
+讓多個 uvicorn worker（或多個副本）共用緩存內容並同步失效事件：
+- SQLiteCacheBackend：本機共享的 SQLite 檔（單機多 worker）
+- RedisCacheBackend：任何 Redis 協議相容的服務（需安裝 redis 套件）
+
+每個 worker 仍保留自己的 LRUCache 作為一級緩存；
+刪除 / 標籤失效 / 清空時寫入共享存儲並發布事件，其他 worker 輪詢到事件後同步清除本地項目。
+"""
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+# 事件類型
+EVENT_DELETE = "delete"
+EVENT_TAG = "tag"
+EVENT_PATTERN = "pattern"
+EVENT_CLEAR = "clear"
+
+Event = Tuple[str, str]
+
+
+def _dumps(value: Any, tags: Iterable[str]) -> bytes:
+    return pickle.dumps((value, list(tags)), protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _loads(data: bytes) -> Tuple[Any, List[str]]:
+    value, tags = pickle.loads(data)
+    return value, tags
+
+
+class CacheBackend:
+    """共享緩存後端介面"""
+
+    def __init__(self):
+        # 區分事件來源，避免處理自己發布的事件
+        self.origin = uuid.uuid4().hex
+
+    def get(self, key: str) -> Tuple[Any, float, List[str]]:
+        """返回 (值, 剩餘存活秒數, 標籤)，未命中時值為 MISSING"""
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl_seconds: float, tags: Iterable[str]) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def invalidate_tag(self, tag: str) -> None:
+        raise NotImplementedError
+
+    def invalidate_pattern(self, pattern: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def publish(self, kind: str, target: str = "") -> None:
+        """發布失效事件給其他 worker"""
+        raise NotImplementedError
+
+    def poll_events(self) -> List[Event]:
+        """取得其他 worker 發布的新事件"""
+        raise NotImplementedError
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """以 SQLite 檔共享緩存與失效事件（同一台機器的多個 worker）"""
+
+    EVENT_RETENTION_SECONDS = 600
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                cache_key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS cache_tags (
+                tag TEXT NOT NULL,
+                cache_key TEXT NOT NULL,
+                PRIMARY KEY (tag, cache_key)
+            );
+            CREATE TABLE IF NOT EXISTS cache_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                origin TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                target TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_cache_entries_expires ON cache_entries (expires_at);
+        """)
+        self._conn.commit()
+        row = self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM cache_events").fetchone()
+        self._last_event_id = row[0]
+        self._last_prune = time.time()
+
+    def get(self, key: str) -> Tuple[Any, float, List[str]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache_entries WHERE cache_key = ?", (key,)
+            ).fetchone()
+        if not row or row[1] < now:
+            return MISSING, 0.0, []
+        value, tags = _loads(row[0])
+        return value, row[1] - now, tags
+
+    def set(self, key: str, value: Any, ttl_seconds: float, tags: Iterable[str]) -> None:
+        tags = list(tags)
+        data = _dumps(value, tags)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (cache_key, value, expires_at) VALUES (?, ?, ?)",
+                (key, data, time.time() + ttl_seconds)
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO cache_tags (tag, cache_key) VALUES (?, ?)",
+                [(tag, key) for tag in tags]
+            )
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries WHERE cache_key = ?", (key,))
+            self._conn.execute("DELETE FROM cache_tags WHERE cache_key = ?", (key,))
+            self._conn.commit()
+
+    def invalidate_tag(self, tag: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM cache_entries WHERE cache_key IN (SELECT cache_key FROM cache_tags WHERE tag = ?)",
+                (tag,)
+            )
+            self._conn.execute("DELETE FROM cache_tags WHERE tag = ?", (tag,))
+            self._conn.commit()
+
+    def invalidate_pattern(self, pattern: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries WHERE instr(cache_key, ?) > 0", (pattern,))
+            self._conn.execute("DELETE FROM cache_tags WHERE instr(cache_key, ?) > 0", (pattern,))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries")
+            self._conn.execute("DELETE FROM cache_tags")
+            self._conn.commit()
+
+    def publish(self, kind: str, target: str = "") -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO cache_events (origin, kind, target, created_at) VALUES (?, ?, ?, ?)",
+                (self.origin, kind, target, now)
+            )
+            if now - self._last_prune > self.EVENT_RETENTION_SECONDS:
+                # 順便清除舊事件與過期項目
+                self._conn.execute("DELETE FROM cache_events WHERE created_at < ?",
+                                   (now - self.EVENT_RETENTION_SECONDS,))
+                self._conn.execute("DELETE FROM cache_entries WHERE expires_at < ?", (now,))
+                self._last_prune = now
+            self._conn.commit()
+
+    def poll_events(self) -> List[Event]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, origin, kind, target FROM cache_events WHERE id > ? ORDER BY id",
+                (self._last_event_id,)
+            ).fetchall()
+        if not rows:
+            return []
+        self._last_event_id = rows[-1][0]
+        return [(kind, target) for _, origin, kind, target in rows if origin != self.origin]
+
+
+class RedisCacheBackend(CacheBackend):
+    """以 Redis 協議服務共享緩存，失效事件透過 pub/sub 廣播"""
+
+    def __init__(self, url: str, prefix: str = "cardcache:"):
+        super().__init__()
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND=redis 需要安裝 redis 套件") from e
+
+        self.prefix = prefix
+        self.channel = f"{prefix}events"
+        self._client = redis.Redis.from_url(url)
+        self._events: deque = deque()
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(**{self.channel: self._on_message})
+        self._listener = self._pubsub.run_in_thread(sleep_time=0.5, daemon=True)
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}k:{key}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}t:{tag}"
+
+    def _on_message(self, message) -> None:
+        try:
+            origin, kind, target = message["data"].decode("utf-8").split("\n", 2)
+        except (ValueError, AttributeError):
+            return
+        if origin != self.origin:
+            self._events.append((kind, target))
+
+    def get(self, key: str) -> Tuple[Any, float, List[str]]:
+        pipe = self._client.pipeline()
+        pipe.get(self._key(key))
+        pipe.pttl(self._key(key))
+        data, pttl = pipe.execute()
+        if data is None:
+            return MISSING, 0.0, []
+        value, tags = _loads(data)
+        return value, max(pttl, 0) / 1000.0, tags
+
+    def set(self, key: str, value: Any, ttl_seconds: float, tags: Iterable[str]) -> None:
+        tags = list(tags)
+        ttl_ms = max(int(ttl_seconds * 1000), 1)
+        pipe = self._client.pipeline()
+        pipe.set(self._key(key), _dumps(value, tags), px=ttl_ms)
+        for tag in tags:
+            pipe.sadd(self._tag_key(tag), key)
+        pipe.execute()
+
+    def delete(self, key: str) -> None:
+        self._client.delete(self._key(key))
+
+    def invalidate_tag(self, tag: str) -> None:
+        keys = self._client.smembers(self._tag_key(tag))
+        pipe = self._client.pipeline()
+        for key in keys:
+            pipe.delete(self._key(key.decode("utf-8")))
+        pipe.delete(self._tag_key(tag))
+        pipe.execute()
+
+    def invalidate_pattern(self, pattern: str) -> None:
+        keys = list(self._client.scan_iter(match=f"{self.prefix}k:*{pattern}*"))
+        for i in range(0, len(keys), 500):
+            self._client.delete(*keys[i:i + 500])
+
+    def clear(self) -> None:
+        keys = list(self._client.scan_iter(match=f"{self.prefix}[kt]:*"))
+        for i in range(0, len(keys), 500):
+            self._client.delete(*keys[i:i + 500])
+
+    def publish(self, kind: str, target: str = "") -> None:
+        self._client.publish(self.channel, f"{self.origin}\n{kind}\n{target}")
+
+    def poll_events(self) -> List[Event]:
+        events = []
+        while self._events:
+            events.append(self._events.popleft())
+        return events
+
+
+def create_cache_backend(name: str, sqlite_path: str, redis_url: str) -> Optional[CacheBackend]:
+    """依 CACHE_BACKEND 建立共享後端；local 時返回 None（僅使用本地緩存）"""
+    name = (name or "local").lower()
+    try:
+        if name == "sqlite":
+            return SQLiteCacheBackend(sqlite_path)
+        if name == "redis":
+            return RedisCacheBackend(redis_url)
+    except Exception as e:
+        logger.error(f"共享緩存後端 {name} 初始化失敗，改用本地緩存: {e}")
+        return None
+    if name != "local":
+        logger.warning(f"未知的緩存後端 {name}，改用本地緩存")
+    return None
@@ -45,6 +45,15 @@ WORKERS = get_env_int('WORKERS', 1)
 DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///./cards.db')
 DB_ECHO = get_env_bool('DB_ECHO', False)
 
+# 內存緩存設定
+CACHE_MAX_ENTRIES = get_env_int('CACHE_MAX_ENTRIES', 2000)
+CACHE_MAX_MB = get_env_int('CACHE_MAX_MB', 64)
+CACHE_SWEEP_INTERVAL = get_env_int('CACHE_SWEEP_INTERVAL', 60)  # 過期清理間隔秒數
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'sqlite' if WORKERS > 1 else 'local')  # local / sqlite / redis
+CACHE_SQLITE_PATH = os.getenv('CACHE_SQLITE_PATH', 'output/shared_cache.db')
+CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+CACHE_EVENT_POLL_INTERVAL_MS = get_env_int('CACHE_EVENT_POLL_INTERVAL_MS', 200)  # 失效事件輪詢間隔
+
 # API 設定
 API_V1_PREFIX = os.getenv('API_V1_PREFIX', '/api/v1')
 
@@ -63,6 +72,14 @@ ALLOWED_FILE_TYPES = get_env_list('ALLOWED_FILE_TYPES', ['.jpg', '.jpeg', '.png'
 OCR_API_URL = os.getenv('OCR_API_URL', 'http://0.0.0.0:23333/v1')
 OCR_API_KEY = os.getenv('OCR_API_KEY', 'YOUR_API_KEY')
 OCR_TIMEOUT = get_env_int('OCR_TIMEOUT', 30)
+OCR_MODEL_CACHE_TTL = get_env_int('OCR_MODEL_CACHE_TTL', 300)  # 模型ID快取秒數
+OCR_MODEL_REFRESH_MARGIN = get_env_int('OCR_MODEL_REFRESH_MARGIN', 30)  # 到期前背景刷新秒數
+OCR_RESULT_CACHE_ENABLED = get_env_bool('OCR_RESULT_CACHE_ENABLED', True)  # 以圖片雜湊快取OCR結果
+OCR_RESULT_CACHE_PATH = os.getenv('OCR_RESULT_CACHE_PATH', 'output/ocr_result_cache.db')
+OCR_RESULT_CACHE_MAX_ENTRIES = get_env_int('OCR_RESULT_CACHE_MAX_ENTRIES', 10000)
+OCR_RESULT_CACHE_MAX_MB = get_env_int('OCR_RESULT_CACHE_MAX_MB', 200)
+OCR_RESULT_CACHE_MAX_AGE_HOURS = get_env_int('OCR_RESULT_CACHE_MAX_AGE_HOURS', 720)  # 30天
+OCR_RESULT_CACHE_VERSION = os.getenv('OCR_RESULT_CACHE_VERSION', '1')  # 更換模型時可遞增使舊快取失效
 
 # 卡片增強設定
 USE_CARD_ENHANCEMENT = get_env_bool('USE_CARD_ENHANCEMENT', True)
@@ -70,11 +87,45 @@ USE_OPENCV = get_env_bool('USE_OPENCV', True)
 CARD_ENHANCEMENT_SCALE_FACTOR = get_env_int('CARD_ENHANCEMENT_SCALE_FACTOR', 3)
 CARD_ENHANCEMENT_AUTO_DETECT = get_env_bool('CARD_ENHANCEMENT_AUTO_DETECT', True)
 CARD_ENHANCEMENT_MANUAL_COORDS = get_env_list('CARD_ENHANCEMENT_MANUAL_COORDS', ['150', '440', '1130', '840'])
+CARD_DETECTION_MAX_SIDE = get_env_int('CARD_DETECTION_MAX_SIDE', 1000)  # 名片偵測用縮圖的長邊像素，0 表示在原圖上偵測
+CARD_DETECTION_REFINE = get_env_bool('CARD_DETECTION_REFINE', True)  # 角點映射回原圖後在小視窗內微調
 
 # 批量處理設定
 BATCH_PROCESSING_SIZE = get_env_int('BATCH_PROCESSING_SIZE', 5)
 MEMORY_THRESHOLD = get_env_int('MEMORY_THRESHOLD', 85)  # 85%
 BATCH_PROCESSING_ENABLED = get_env_bool('BATCH_PROCESSING_ENABLED', True)
+BATCH_OCR_CONCURRENCY = get_env_int('BATCH_OCR_CONCURRENCY', 4)  # 批量OCR最大並行數
+BATCH_OCR_MIN_INTERVAL_MS = get_env_int('BATCH_OCR_MIN_INTERVAL_MS', 0)  # 派發最小間隔(毫秒)
+OCR_BATCH_MAX_CONNECTIONS = get_env_int('OCR_BATCH_MAX_CONNECTIONS', 20)  # 批量OCR HTTP 連線池上限
+
+# 圖片處理進程池設定
+IMAGE_PROCESS_WORKERS = get_env_int('IMAGE_PROCESS_WORKERS', max(1, (os.cpu_count() or 1) // max(1, WORKERS)))  # 每個 worker 的工作進程數（預設平分 CPU），0 表示改在執行緒中處理
+IMAGE_PROCESS_QUEUE_SIZE = get_env_int('IMAGE_PROCESS_QUEUE_SIZE', 32)  # 執行中以外可等待的工作數，超過即回應 503
+IMAGE_PROCESS_TIMEOUT = get_env_int('IMAGE_PROCESS_TIMEOUT', 60)  # 單一圖片處理工作逾時秒數
+IMAGE_PROCESS_START_METHOD = os.getenv('IMAGE_PROCESS_START_METHOD', 'spawn')  # spawn / forkserver / fork
+
+# 圖片衍生圖（縮圖）設定
+IMAGE_DERIVATIVE_DIR = os.getenv('IMAGE_DERIVATIVE_DIR', 'output/image_cache')  # 衍生圖磁碟快取目錄
+IMAGE_DERIVATIVE_CACHE_MB = get_env_int('IMAGE_DERIVATIVE_CACHE_MB', 512)  # 快取總大小上限(MB)
+IMAGE_DERIVATIVE_WIDTHS = [int(w) for w in get_env_list('IMAGE_DERIVATIVE_WIDTHS', ['160', '320', '640', '1280'])]  # 允許的輸出寬度
+IMAGE_DERIVATIVE_QUALITY = get_env_int('IMAGE_DERIVATIVE_QUALITY', 80)  # WebP / JPEG 品質
+IMAGE_DERIVATIVE_MAX_AGE = get_env_int('IMAGE_DERIVATIVE_MAX_AGE', 86400)  # Cache-Control max-age 秒數
+
+# 名片圖片庫清理設定（圖片以內容雜湊存於 UPLOAD_DIR，未被名片引用的檔案定期清理）
+IMAGE_GC_GRACE_HOURS = get_env_int('IMAGE_GC_GRACE_HOURS', 6)  # 未引用檔案（含裁切預覽）保留時數
+IMAGE_GC_INTERVAL_HOURS = get_env_int('IMAGE_GC_INTERVAL_HOURS', 6)  # 自動清理間隔時數，0 表示停用
+
+# 後台任務設定
+TASK_STORE_BACKEND = os.getenv('TASK_STORE_BACKEND', 'sql' if WORKERS > 1 else 'memory')  # memory / sql
+TASK_HEARTBEAT_INTERVAL = get_env_int('TASK_HEARTBEAT_INTERVAL', 15)  # 執行中任務心跳間隔秒數
+TASK_HEARTBEAT_TIMEOUT = get_env_int('TASK_HEARTBEAT_TIMEOUT', 120)  # 心跳逾時視為工作進程失聯
+TASK_RETENTION_HOURS = get_env_int('TASK_RETENTION_HOURS', 24)  # 已結束任務保留時數
+TASK_PRUNE_INTERVAL = get_env_int('TASK_PRUNE_INTERVAL', 600)  # 自動清理間隔秒數
+
+# 背景匯出設定
+EXPORT_DIR = os.getenv('EXPORT_DIR', 'output/exports')  # 匯出檔案目錄
+EXPORT_REUSE_MINUTES = get_env_int('EXPORT_REUSE_MINUTES', 10)  # 相同篩選+格式在此時間內重用既有匯出
+EXPORT_FILE_RETENTION_HOURS = get_env_int('EXPORT_FILE_RETENTION_HOURS', 24)  # 匯出檔案保留時數
 
 # 序號管理設定
 SERIAL_CONFIG_FILE = os.getenv('SERIAL_CONFIG_FILE', 'config/serials.json')
@@ -126,6 +177,10 @@ def print_settings_summary():
     print(f"批量處理: {'✅ 啟用' if BATCH_PROCESSING_ENABLED else '❌ 禁用'}")
     print(f"批次大小: {BATCH_PROCESSING_SIZE}")
     print(f"記憶體閾值: {MEMORY_THRESHOLD}%")
+    print(f"OCR並行數: {BATCH_OCR_CONCURRENCY}")
+    print(f"圖片處理進程: {IMAGE_PROCESS_WORKERS or '執行緒模式'}")
+    print(f"任務存儲: {TASK_STORE_BACKEND}")
+    print(f"緩存後端: {CACHE_BACKEND}")
     print(f"{'='*50}\n")
 
 def check_environment():
@@ -137,6 +192,12 @@ def check_environment():
     
     if OCR_API_KEY == 'YOUR_API_KEY':
         issues.append("OCR_API_KEY 需要設置")
+
+    if WORKERS > 1 and CACHE_BACKEND == 'local':
+        issues.append("多個 WORKERS 時 CACHE_BACKEND 應設為 sqlite 或 redis，否則緩存失效無法同步")
+
+    if WORKERS > 1 and TASK_STORE_BACKEND == 'memory':
+        issues.append("多個 WORKERS 時 TASK_STORE_BACKEND 應設為 sql，否則任務狀態無法跨進程查詢")
     
     if issues:
         print("⚠️  配置問題:")
@@ -155,6 +216,13 @@ class Settings:
     PORT = PORT
     WORKERS = WORKERS
     DATABASE_URL = DATABASE_URL
+    CACHE_MAX_ENTRIES = CACHE_MAX_ENTRIES
+    CACHE_MAX_MB = CACHE_MAX_MB
+    CACHE_SWEEP_INTERVAL = CACHE_SWEEP_INTERVAL
+    CACHE_BACKEND = CACHE_BACKEND
+    CACHE_SQLITE_PATH = CACHE_SQLITE_PATH
+    CACHE_REDIS_URL = CACHE_REDIS_URL
+    CACHE_EVENT_POLL_INTERVAL_MS = CACHE_EVENT_POLL_INTERVAL_MS
     API_V1_PREFIX = API_V1_PREFIX
     CORS_ORIGINS = CORS_ORIGINS
     CORS_CREDENTIALS = CORS_CREDENTIALS
@@ -168,6 +236,14 @@ class Settings:
     OCR_API_URL = OCR_API_URL
     OCR_API_KEY = OCR_API_KEY
     OCR_TIMEOUT = OCR_TIMEOUT
+    OCR_MODEL_CACHE_TTL = OCR_MODEL_CACHE_TTL
+    OCR_MODEL_REFRESH_MARGIN = OCR_MODEL_REFRESH_MARGIN
+    OCR_RESULT_CACHE_ENABLED = OCR_RESULT_CACHE_ENABLED
+    OCR_RESULT_CACHE_PATH = OCR_RESULT_CACHE_PATH
+    OCR_RESULT_CACHE_MAX_ENTRIES = OCR_RESULT_CACHE_MAX_ENTRIES
+    OCR_RESULT_CACHE_MAX_MB = OCR_RESULT_CACHE_MAX_MB
+    OCR_RESULT_CACHE_MAX_AGE_HOURS = OCR_RESULT_CACHE_MAX_AGE_HOURS
+    OCR_RESULT_CACHE_VERSION = OCR_RESULT_CACHE_VERSION
     OCR_PORT = OCR_PORT
     OCR_HOST = OCR_HOST
     OCR_UPLOAD_FOLDER = OCR_UPLOAD_FOLDER
@@ -180,11 +256,45 @@ class Settings:
     CARD_ENHANCEMENT_SCALE_FACTOR = CARD_ENHANCEMENT_SCALE_FACTOR
     CARD_ENHANCEMENT_AUTO_DETECT = CARD_ENHANCEMENT_AUTO_DETECT
     CARD_ENHANCEMENT_MANUAL_COORDS = CARD_ENHANCEMENT_MANUAL_COORDS
+    CARD_DETECTION_MAX_SIDE = CARD_DETECTION_MAX_SIDE
+    CARD_DETECTION_REFINE = CARD_DETECTION_REFINE
     
     # 批量處理設定
     BATCH_PROCESSING_SIZE = BATCH_PROCESSING_SIZE
     MEMORY_THRESHOLD = MEMORY_THRESHOLD
     BATCH_PROCESSING_ENABLED = BATCH_PROCESSING_ENABLED
+    BATCH_OCR_CONCURRENCY = BATCH_OCR_CONCURRENCY
+    BATCH_OCR_MIN_INTERVAL_MS = BATCH_OCR_MIN_INTERVAL_MS
+    OCR_BATCH_MAX_CONNECTIONS = OCR_BATCH_MAX_CONNECTIONS
+
+    # 圖片處理進程池設定
+    IMAGE_PROCESS_WORKERS = IMAGE_PROCESS_WORKERS
+    IMAGE_PROCESS_QUEUE_SIZE = IMAGE_PROCESS_QUEUE_SIZE
+    IMAGE_PROCESS_TIMEOUT = IMAGE_PROCESS_TIMEOUT
+    IMAGE_PROCESS_START_METHOD = IMAGE_PROCESS_START_METHOD
+
+    # 圖片衍生圖（縮圖）設定
+    IMAGE_DERIVATIVE_DIR = IMAGE_DERIVATIVE_DIR
+    IMAGE_DERIVATIVE_CACHE_MB = IMAGE_DERIVATIVE_CACHE_MB
+    IMAGE_DERIVATIVE_WIDTHS = IMAGE_DERIVATIVE_WIDTHS
+    IMAGE_DERIVATIVE_QUALITY = IMAGE_DERIVATIVE_QUALITY
+    IMAGE_DERIVATIVE_MAX_AGE = IMAGE_DERIVATIVE_MAX_AGE
+
+    # 名片圖片庫清理設定
+    IMAGE_GC_GRACE_HOURS = IMAGE_GC_GRACE_HOURS
+    IMAGE_GC_INTERVAL_HOURS = IMAGE_GC_INTERVAL_HOURS
+
+    # 後台任務設定
+    TASK_STORE_BACKEND = TASK_STORE_BACKEND
+    TASK_HEARTBEAT_INTERVAL = TASK_HEARTBEAT_INTERVAL
+    TASK_HEARTBEAT_TIMEOUT = TASK_HEARTBEAT_TIMEOUT
+    TASK_RETENTION_HOURS = TASK_RETENTION_HOURS
+    TASK_PRUNE_INTERVAL = TASK_PRUNE_INTERVAL
+
+    # 背景匯出設定
+    EXPORT_DIR = EXPORT_DIR
+    EXPORT_REUSE_MINUTES = EXPORT_REUSE_MINUTES
+    EXPORT_FILE_RETENTION_HOURS = EXPORT_FILE_RETENTION_HOURS
     
     # 序號管理設定
     SERIAL_CONFIG_FILE = SERIAL_CONFIG_FILE
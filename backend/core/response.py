@@ -1,9 +1,49 @@
-from typing import Any, Optional, Dict, List
+from typing import Any, Optional, Dict, Iterable, Iterator, List
 from pydantic import BaseModel
 from fastapi import status
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+import json
 import traceback
-from datetime import datetime
+from datetime import date, datetime
+from decimal import Decimal
+
+try:
+    import orjson
+except ImportError:  # 未安裝時退回標準庫 json
+    orjson = None
+
+# 串流輸出時累積到此大小才送出一個區塊
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+def _json_default(obj: Any) -> Any:
+    """orjson / json 無法直接編碼的型別"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_json(content: Any) -> bytes:
+    """編碼為 UTF-8 JSON（優先使用 orjson）"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_json_default
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """以 orjson 編碼的 JSONResponse，名片列表等大量資料的回應可明顯降低 CPU"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
+
 
 class APIResponse(BaseModel):
     """統一的 API 響應模型"""
@@ -12,10 +52,10 @@ class APIResponse(BaseModel):
     message: Optional[str] = None
     error: Optional[Dict[str, Any]] = None
     timestamp: str = datetime.now().isoformat()
-    
+
 class ResponseHandler:
     """API 響應處理器"""
-    
+
     @staticmethod
     def success(
         data: Any = None,
@@ -23,16 +63,18 @@ class ResponseHandler:
         status_code: int = status.HTTP_200_OK
     ) -> JSONResponse:
         """成功響應"""
-        response = APIResponse(
-            success=True,
-            data=data,
-            message=message
-        )
-        return JSONResponse(
+        # 直接組出與 APIResponse 相同結構的字典，避免 pydantic 再走訪一次整份 data
+        return FastJSONResponse(
             status_code=status_code,
-            content=response.model_dump()
+            content={
+                "success": True,
+                "data": data,
+                "message": message,
+                "error": None,
+                "timestamp": datetime.now().isoformat(),
+            }
         )
-    
+
     @staticmethod
     def error(
         message: str = "操作失敗",
@@ -45,24 +87,25 @@ class ResponseHandler:
             "message": str(error) if error else message,
             "type": type(error).__name__ if error else "Error"
         }
-        
+
         if details:
             error_detail.update(details)
-            
+
         # 在開發環境中包含堆棧跟踪
         if error and hasattr(error, '__traceback__'):
             error_detail["traceback"] = traceback.format_exc()
-        
-        response = APIResponse(
-            success=False,
-            message=message,
-            error=error_detail
-        )
-        return JSONResponse(
+
+        return FastJSONResponse(
             status_code=status_code,
-            content=response.model_dump()
+            content={
+                "success": False,
+                "data": None,
+                "message": message,
+                "error": error_detail,
+                "timestamp": datetime.now().isoformat(),
+            }
         )
-    
+
     @staticmethod
     def paginated(
         data: List[Any],
@@ -79,8 +122,56 @@ class ResponseHandler:
             "per_page": per_page,
             "total_pages": (total + per_page - 1) // per_page
         }
-        
+
         return ResponseHandler.success(
             data=pagination_data,
             message=message
-        )
\ No newline at end of file
+        )
+
+    @staticmethod
+    def stream_list(
+        items: Iterable[Any],
+        message: str = "操作成功",
+        ndjson: bool = False
+    ) -> StreamingResponse:
+        """
+        串流列表響應，逐筆編碼輸出，不在記憶體中組出完整陣列
+        - JSON：與 success() 相同的外層結構，data 為陣列
+        - NDJSON：每行一筆資料
+        """
+        if ndjson:
+            return StreamingResponse(
+                _chunked(dumps_json(item) + b"\n" for item in items),
+                media_type="application/x-ndjson"
+            )
+        return StreamingResponse(
+            _stream_json_envelope(items, message),
+            media_type="application/json"
+        )
+
+
+def _chunked(pieces: Iterable[bytes]) -> Iterator[bytes]:
+    """合併小片段為約 STREAM_CHUNK_BYTES 的區塊"""
+    buffer: List[bytes] = []
+    size = 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= STREAM_CHUNK_BYTES:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def _stream_json_envelope(items: Iterable[Any], message: str) -> Iterator[bytes]:
+    def pieces() -> Iterator[bytes]:
+        yield b'{"success":true,"data":['
+        for index, item in enumerate(items):
+            if index:
+                yield b","
+            yield dumps_json(item)
+        tail = {"message": message, "error": None, "timestamp": datetime.now().isoformat()}
+        yield b"]," + dumps_json(tail)[1:]
+
+    return _chunked(pieces())
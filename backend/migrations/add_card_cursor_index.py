@@ -0,0 +1,50 @@
+"""
+新增游標分頁用的 (created_at, id) 複合索引，並補齊 created_at 為空的舊名片
+
+執行：
+python -c "from backend.migrations.add_card_cursor_index import upgrade; upgrade()"
+"""
+
+from sqlalchemy import create_engine, text
+import os
+import sys
+
+
+def upgrade():
+    database_url = os.getenv('DATABASE_URL', 'sqlite:///./cards.db')
+    engine = create_engine(database_url)
+
+    print("開始新增游標分頁索引...")
+
+    with engine.connect() as conn:
+        # 游標條件 (created_at, id) < (:c, :i) 只列出 created_at 非空的名片
+        result = conn.execute(text(
+            "UPDATE cards SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP) WHERE created_at IS NULL"
+        ))
+        conn.commit()
+        print(f"已補齊 created_at: {result.rowcount} 筆")
+
+        try:
+            conn.execute(text("CREATE INDEX idx_created_id ON cards (created_at, id)"))
+            conn.commit()
+            print("已建立索引: idx_created_id")
+        except Exception:
+            conn.rollback()
+            print("略過索引: idx_created_id，可能已存在")
+
+
+def downgrade():
+    database_url = os.getenv('DATABASE_URL', 'sqlite:///./cards.db')
+    engine = create_engine(database_url)
+
+    with engine.connect() as conn:
+        conn.execute(text("DROP INDEX IF EXISTS idx_created_id"))
+        conn.commit()
+    print("已移除索引: idx_created_id")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "downgrade":
+        downgrade()
+    else:
+        upgrade()
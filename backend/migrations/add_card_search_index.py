@@ -0,0 +1,44 @@
+"""
+建立名片全文搜尋索引並以既有資料填充
+- SQLite：cards_fts（FTS5 trigram）虛擬表與同步觸發器
+- PostgreSQL：pg_trgm 擴充與 GIN 表達式索引
+
+執行：
+python -c "from backend.migrations.add_card_search_index import upgrade; upgrade()"
+"""
+
+from sqlalchemy import create_engine, text
+import os
+import sys
+
+from backend.services.card_search_service import FTS_TABLE, PG_INDEX, ensure_search_index
+
+
+def upgrade():
+    database_url = os.getenv('DATABASE_URL', 'sqlite:///./cards.db')
+    engine = create_engine(database_url)
+
+    print("開始建立名片全文搜尋索引...")
+    backend = ensure_search_index(engine, rebuild=True)
+    print(f"名片全文搜尋索引建立完成，搜尋後端: {backend}")
+
+
+def downgrade():
+    database_url = os.getenv('DATABASE_URL', 'sqlite:///./cards.db')
+    engine = create_engine(database_url)
+
+    with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            for suffix in ("ai", "ad", "au"):
+                conn.execute(text(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}"))
+            conn.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
+        elif engine.dialect.name == "postgresql":
+            conn.execute(text(f"DROP INDEX IF EXISTS {PG_INDEX}"))
+    print("已移除名片全文搜尋索引")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "downgrade":
+        downgrade()
+    else:
+        upgrade()
@@ -0,0 +1,43 @@
+"""
+新增增量匯出用的 (updated_at, id) 複合索引
+
+執行：
+python -c "from backend.migrations.add_card_updated_index import upgrade; upgrade()"
+"""
+
+from sqlalchemy import create_engine, text
+import os
+import sys
+
+
+def upgrade():
+    database_url = os.getenv('DATABASE_URL', 'sqlite:///./cards.db')
+    engine = create_engine(database_url)
+
+    print("開始新增增量匯出索引...")
+
+    with engine.connect() as conn:
+        try:
+            conn.execute(text("CREATE INDEX idx_updated_id ON cards (updated_at, id)"))
+            conn.commit()
+            print("已建立索引: idx_updated_id")
+        except Exception:
+            conn.rollback()
+            print("略過索引: idx_updated_id，可能已存在")
+
+
+def downgrade():
+    database_url = os.getenv('DATABASE_URL', 'sqlite:///./cards.db')
+    engine = create_engine(database_url)
+
+    with engine.connect() as conn:
+        conn.execute(text("DROP INDEX IF EXISTS idx_updated_id"))
+        conn.commit()
+    print("已移除索引: idx_updated_id")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "downgrade":
+        downgrade()
+    else:
+        upgrade()
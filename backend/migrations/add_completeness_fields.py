@@ -0,0 +1,93 @@
+"""
+新增名片資料完整度欄位（completeness_status / missing_fields）並回填既有資料
+
+執行：
+python -c "from backend.migrations.add_completeness_fields import upgrade; upgrade()"
+"""
+
+from sqlalchemy import create_engine, text
+import os
+import sys
+
+from backend.services.card_stats_service import completeness_status, compute_missing_fields
+
+STATUS_COLUMNS = [
+    "name_zh", "name_en", "company_name_zh", "company_name_en",
+    "position_zh", "position_en", "position1_zh", "position1_en",
+    "department1_zh", "department1_en", "department2_zh", "department2_en",
+    "department3_zh", "department3_en",
+    "mobile_phone", "company_phone1", "company_phone2", "email", "line_id",
+]
+
+
+def upgrade(batch_size: int = 1000):
+    database_url = os.getenv('DATABASE_URL', 'sqlite:///./cards.db')
+    engine = create_engine(database_url)
+
+    print("開始新增資料完整度欄位...")
+
+    # Step 1: Add new columns
+    fields_to_add = [
+        ("completeness_status", "VARCHAR(10)", "資料完整度 normal / problem"),
+        ("missing_fields", "INTEGER DEFAULT 0", "缺失欄位位元遮罩"),
+    ]
+
+    with engine.connect() as conn:
+        for field_name, field_type, field_desc in fields_to_add:
+            try:
+                conn.execute(text(f"ALTER TABLE cards ADD COLUMN {field_name} {field_type}"))
+                conn.commit()
+                print(f"已新增欄位: {field_name} ({field_desc})")
+            except Exception:
+                conn.rollback()
+                print(f"略過欄位: {field_name}，可能已存在")
+
+        # Step 2: Create index for status filtering + created_at ordering
+        try:
+            conn.execute(text("CREATE INDEX idx_completeness_created ON cards (completeness_status, created_at)"))
+            conn.commit()
+            print("已建立索引: idx_completeness_created")
+        except Exception:
+            conn.rollback()
+            print("略過索引: idx_completeness_created，可能已存在")
+
+        # Step 3: Backfill existing rows in id batches
+        print("開始回填既有名片的完整度...")
+        columns = ", ".join(STATUS_COLUMNS)
+        last_id = 0
+        updated_count = 0
+        while True:
+            rows = conn.execute(
+                text(f"SELECT id, {columns} FROM cards WHERE id > :last_id ORDER BY id LIMIT :limit"),
+                {"last_id": last_id, "limit": batch_size}
+            ).mappings().fetchall()
+            if not rows:
+                break
+
+            params = []
+            for row in rows:
+                mask = compute_missing_fields(dict(row))
+                params.append({"id": row["id"], "status": completeness_status(mask), "mask": mask})
+
+            conn.execute(
+                text("UPDATE cards SET completeness_status = :status, missing_fields = :mask WHERE id = :id"),
+                params
+            )
+            conn.commit()
+            updated_count += len(params)
+            last_id = rows[-1]["id"]
+            print(f"已回填 {updated_count} 張名片")
+
+    print(f"資料完整度欄位新增完成，共回填 {updated_count} 張名片")
+
+
+def downgrade():
+    print("SQLite 不方便直接 DROP COLUMN。")
+    print("如需回退，建議先還原資料庫備份。")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "downgrade":
+        downgrade()
+    else:
+        upgrade()
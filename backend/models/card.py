@@ -68,12 +68,36 @@ class CardORM(Base):
     duplicate_group_id = Column(String(32), index=True)  # md5(name_zh|company_name_zh)
     reviewed_at = Column(DateTime)                        # 重複審查時間
 
+    # 資料完整度（寫入時計算）
+    completeness_status = Column(String(10))              # normal / problem
+    missing_fields = Column(Integer, default=0)           # 缺失欄位位元遮罩：1姓名 2公司 4職位或部門 8聯絡方式
+
     # 複合索引，優化常見查詢
     __table_args__ = (
         Index('idx_name_company', 'name_zh', 'company_name_zh'),  # 姓名+公司複合索引
         Index('idx_name_phone', 'name_zh', 'mobile_phone'),       # 姓名+手機複合索引
+        Index('idx_completeness_created', 'completeness_status', 'created_at'),  # 狀態篩選+時間排序
+        Index('idx_created_id', 'created_at', 'id'),  # 游標分頁 (created_at, id)
+        Index('idx_updated_id', 'updated_at', 'id'),  # 增量匯出 updated_since
     )
 
+class CardStatsORM(Base):
+    """名片統計摘要（total / status:* / industry:* 計數），隨名片寫入增量維護"""
+    __tablename__ = "card_stats"
+    stat_key = Column(String(100), primary_key=True)   # 例如 total、status:normal、industry:旅宿
+    count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+class BatchImportCheckpointORM(Base):
+    """批量導入檢查點：以圖片內容雜湊記錄已導入的檔案，任務重啟時跳過"""
+    __tablename__ = "batch_import_checkpoints"
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), unique=True, index=True, nullable=False)  # 圖片內容 SHA-256
+    source_path = Column(String(500))                                          # 原始檔案路徑
+    card_id = Column(Integer, index=True)                                      # 建立的名片 ID
+    task_id = Column(String(36))                                               # 導入任務 ID
+    imported_at = Column(DateTime, default=datetime.datetime.utcnow)
+
 class Card(BaseModel):
     id: Optional[int] = None
     
@@ -136,4 +160,8 @@ class Card(BaseModel):
     duplicate_group_id: Optional[str] = None
     reviewed_at: Optional[datetime.datetime] = None
 
+    # 資料完整度
+    completeness_status: Optional[str] = None
+    missing_fields: Optional[int] = None
+
     model_config = {"from_attributes": True}
\ No newline at end of file
@@ -0,0 +1,35 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, Index
+from backend.models.db import Base
+import datetime
+
+
+class TaskORM(Base):
+    """後台任務（SQL 任務存儲模式，跨 worker 進程共享）"""
+    __tablename__ = "background_tasks"
+    task_id = Column(String(36), primary_key=True)
+    task_type = Column(String(50), default="")
+    status = Column(String(20), index=True)
+    total = Column(Integer, default=0)
+    completed = Column(Integer, default=0)
+    failed = Column(Integer, default=0)
+    skipped = Column(Integer, default=0)
+    error_message = Column(Text, default="")
+    result = Column(Text)                          # 結果摘要 JSON
+    cancelled = Column(Boolean, default=False)
+    owner = Column(String(100))                    # 執行中的工作進程 (host:pid)
+    created_at = Column(DateTime, default=datetime.datetime.now)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime, index=True)
+    heartbeat_at = Column(DateTime, index=True)    # 最近一次心跳
+
+
+class TaskItemORM(Base):
+    """後台任務逐項進度明細"""
+    __tablename__ = "background_task_items"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    task_id = Column(String(36), nullable=False)
+    payload = Column(Text)                         # 明細 JSON
+
+    __table_args__ = (
+        Index('idx_task_items_task_id', 'task_id', 'id'),
+    )
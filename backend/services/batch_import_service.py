@@ -0,0 +1,247 @@
+"""
+資料夾批量導入服務
+
+以 task_manager 背景任務執行資料夾的智能批量導入：
+- 立即回傳 task_id，逐張圖片的進度透過 /cards/tasks/{task_id} 查詢
+- 以圖片內容 SHA-256 寫入檢查點表，任務重啟後自動跳過已導入的圖片
+- 圖片以同一雜湊寫入內容定址圖片庫（image_store），不另外複製一份帶時間戳的檔案
+"""
+
+import asyncio
+import glob
+import hashlib
+import json
+import logging
+import os
+from typing import Callable, Dict, List, Optional, Set
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from backend.models.card import BatchImportCheckpointORM, Card, CardORM
+from backend.services.batch_ocr_engine import ConcurrentBatchOCR
+from backend.services.card_service import create_card
+from backend.services.image_store import image_store
+from backend.services.task_manager import task_manager
+
+logger = logging.getLogger(__name__)
+
+BATCH_IMPORT_FOLDER = "ocr_card_background/uploads"
+IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png']
+
+# 從 OCR 結果直接對應到 Card 的標準化欄位（name_zh 另外處理）
+CARD_OCR_FIELDS = [
+    'name_en', 'company_name_zh', 'company_name_en',
+    'position_zh', 'position_en', 'position1_zh', 'position1_en',
+    'department1_zh', 'department1_en', 'department2_zh', 'department2_en',
+    'department3_zh', 'department3_en',
+    'mobile_phone', 'company_phone1', 'company_phone2', 'fax',
+    'email', 'line_id', 'wechat_id',
+    'company_address1_zh', 'company_address1_en',
+    'company_address2_zh', 'company_address2_en',
+]
+
+
+def list_batch_images(folder: str = BATCH_IMPORT_FOLDER) -> List[str]:
+    """列出資料夾中的圖片檔（依檔名排序，確保重啟後順序一致）"""
+    image_files = set()
+    for ext in IMAGE_EXTENSIONS:
+        image_files.update(glob.glob(os.path.join(folder, f'*{ext}')))
+        image_files.update(glob.glob(os.path.join(folder, f'*{ext.upper()}')))
+    return sorted(image_files)
+
+
+def compute_file_hash(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """計算檔案內容的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def prune_stale_checkpoints(db: Session) -> int:
+    """刪除名片已不存在的檢查點（例如刪除名片前留下的舊資料），返回刪除筆數"""
+    existing_card = db.query(CardORM.id).filter(CardORM.id == BatchImportCheckpointORM.card_id).exists()
+    removed = db.query(BatchImportCheckpointORM).filter(~existing_card).delete(synchronize_session=False)
+    db.commit()
+    return removed
+
+
+def get_imported_hashes(db: Session, hashes: List[str]) -> Set[str]:
+    """查詢已有檢查點、且名片仍存在的內容雜湊"""
+    imported = set()
+    unique_hashes = list(set(hashes))
+    # 分批查詢，避免 IN 子句過長
+    for i in range(0, len(unique_hashes), 500):
+        chunk = unique_hashes[i:i + 500]
+        rows = db.query(BatchImportCheckpointORM.content_hash).join(
+            CardORM, CardORM.id == BatchImportCheckpointORM.card_id
+        ).filter(
+            BatchImportCheckpointORM.content_hash.in_(chunk)
+        ).all()
+        imported.update(row[0] for row in rows)
+    return imported
+
+
+def add_checkpoint(db: Session, content_hash: str, source_path: str, card_id: Optional[int],
+                   task_id: Optional[str] = None) -> None:
+    """加入導入檢查點（不 commit，與名片在同一交易中寫入；同一雜湊已存在時於 commit 拋出 IntegrityError）"""
+    db.add(BatchImportCheckpointORM(
+        content_hash=content_hash,
+        source_path=source_path,
+        card_id=card_id,
+        task_id=task_id,
+    ))
+
+
+def build_card_from_ocr(ocr_result: Dict, image_path: str, filename: str) -> Card:
+    """依 OCR 標準化結果建立 Card"""
+    name_zh = (ocr_result.get('name_zh') or '').strip()
+    if not name_zh:
+        # 如果沒有姓名，使用文件名作為姓名
+        name_zh = os.path.splitext(filename)[0]
+        logger.info(f"使用文件名作為姓名: {name_zh}")
+
+    return Card(
+        name_zh=name_zh,
+        **{field: ocr_result.get(field, '') for field in CARD_OCR_FIELDS},
+        note1=f'智能批量導入 - {filename}',
+        note2=f'標準化欄位+OCR識別，字段數: {len(ocr_result)}',
+        front_image_path=image_path,
+        front_ocr_text=json.dumps(ocr_result, ensure_ascii=False)
+    )
+
+
+class BatchImportJob:
+    """
+    資料夾批量導入背景任務
+
+    Args:
+        task_id: task_manager 任務 ID
+        image_files: 待導入的圖片路徑
+        on_cards_changed: 有名片寫入後呼叫（例如清除統計快取）
+    """
+
+    def __init__(self, task_id: str, image_files: List[str],
+                 on_cards_changed: Optional[Callable[[], None]] = None):
+        self.task_id = task_id
+        self.image_files = image_files
+        self.on_cards_changed = on_cards_changed
+        self.success_count = 0
+        self.skipped_count = 0
+        self.error_list: List[str] = []
+
+    def run(self) -> None:
+        """在背景執行緒中執行（自帶事件迴圈）"""
+        asyncio.run(self._run())
+
+    async def _run(self) -> None:
+        from backend.models.db import SessionLocal
+        from backend.services.ocr_service import OCRService, close_batch_http_client
+        from backend.services.card_enhancement_service import BatchProcessingService
+
+        task_manager.start_task(self.task_id)
+        db = SessionLocal()
+        try:
+            # 以內容雜湊比對檢查點，跳過已導入的圖片
+            file_hashes = {}
+            for image_file in self.image_files:
+                file_hashes[image_file] = await asyncio.to_thread(compute_file_hash, image_file)
+            # 名片已被刪除的舊檢查點先清掉，否則同一雜湊無法再寫入新的檢查點
+            stale = prune_stale_checkpoints(db)
+            if stale:
+                logger.info(f"批量導入任務 {self.task_id}: 清除 {stale} 筆名片已刪除的檢查點")
+            imported = get_imported_hashes(db, list(file_hashes.values()))
+
+            pending = []
+            seen_hashes = set()
+            for image_file in self.image_files:
+                content_hash = file_hashes[image_file]
+                if content_hash in imported or content_hash in seen_hashes:
+                    self.skipped_count += 1
+                    task_manager.update_progress(self.task_id, skipped=True, item={
+                        "filename": os.path.basename(image_file),
+                        "status": "skipped",
+                        "message": "已導入，跳過",
+                    })
+                else:
+                    seen_hashes.add(content_hash)
+                    pending.append(image_file)
+
+            if self.skipped_count:
+                logger.info(f"批量導入任務 {self.task_id}: 跳過 {self.skipped_count} 張已導入圖片")
+
+            ocr_service = OCRService()
+            batch_service = BatchProcessingService(ocr_service.card_enhancer)
+
+            async def on_result(index, image_file, ocr_result):
+                """依檔案順序寫入資料庫並記錄檢查點"""
+                filename = os.path.basename(image_file)
+                item = {"filename": filename}
+                try:
+                    if not ocr_result or not any(ocr_result.values()):
+                        raise ValueError("OCR處理返回空結果")
+
+                    # 複製圖片進圖片庫（沿用檢查點的內容雜湊，相同內容只存一份）
+                    new_image_path = await asyncio.to_thread(
+                        image_store.put_file, image_file, content_hash=file_hashes[image_file]
+                    )
+
+                    # 名片與檢查點同一交易寫入：中斷時兩者皆未寫入，重新發起時不會產生重複名片
+                    created_card = create_card(
+                        db,
+                        build_card_from_ocr(ocr_result, new_image_path, filename),
+                        add_related=lambda db_card: add_checkpoint(
+                            db, file_hashes[image_file], image_file, db_card.id, self.task_id
+                        ),
+                    )
+
+                    self.success_count += 1
+                    item.update({"status": "success", "card_id": created_card.get('id')})
+                    task_manager.update_progress(self.task_id, success=True, item=item)
+                    logger.info(f"成功創建名片: {created_card.get('name_zh', '未知')} (ID: {created_card.get('id', '未知')})")
+
+                except IntegrityError:
+                    # 同一內容已由其他任務導入（檢查點唯一鍵衝突），名片一併回滾
+                    db.rollback()
+                    self.skipped_count += 1
+                    item.update({"status": "skipped", "message": "已導入，跳過"})
+                    task_manager.update_progress(self.task_id, skipped=True, item=item)
+
+                except Exception as e:
+                    db.rollback()
+                    self.error_list.append(f"{filename}: {str(e)}")
+                    item.update({"status": "failed", "error": str(e)})
+                    task_manager.update_progress(self.task_id, success=False, item=item)
+                    logger.error(f"處理圖片失敗: {filename}: {str(e)}")
+
+            engine = ConcurrentBatchOCR(
+                ocr_service.process_single_image_async,
+                batch_service=batch_service,
+            )
+            await engine.run(
+                pending,
+                result_callback=on_result,
+                should_stop=lambda: task_manager.is_cancelled(self.task_id),
+            )
+
+            if self.success_count and self.on_cards_changed:
+                self.on_cards_changed()
+
+            task_manager.set_result(self.task_id, {
+                "total_files": len(self.image_files),
+                "success": self.success_count,
+                "skipped": self.skipped_count,
+                "errors": len(self.error_list),
+                "error_details": self.error_list[:10],  # 只返回前10個錯誤
+            })
+            if not task_manager.is_cancelled(self.task_id):
+                task_manager.complete_task(self.task_id)
+
+        except Exception as e:
+            logger.error(f"批量導入任務失敗: task_id={self.task_id}, error={str(e)}")
+            task_manager.complete_task(self.task_id, error_message=str(e))
+        finally:
+            db.close()
+            await close_batch_http_client()
@@ -0,0 +1,237 @@
+"""
+並行批量 OCR 引擎
+
+以有上限的 worker pool 並行處理圖片，取代逐張處理 + 固定隨機延遲：
+- AdaptiveRateLimiter：依 OCR API 回應自動調整派發間隔（成功縮短、失敗加倍）
+- 依 BatchProcessingService 的記憶體檢查動態降低並行數
+- 結果依輸入順序回傳，並逐檔送出進度事件
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from backend.core.config import settings
+from backend.services.card_enhancement_service import BatchProcessingService
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class AdaptiveRateLimiter:
+    """
+    自適應速率限制器（AIMD）
+
+    每次派發前呼叫 wait()；成功時線性縮短間隔，失敗時倍增間隔，
+    讓批量 OCR 在 API 正常時全速執行，被限流或逾時時自動退避。
+    """
+
+    def __init__(
+        self,
+        min_interval: float = 0.0,
+        max_interval: float = 5.0,
+        decrease_step: float = 0.05,
+        increase_factor: float = 2.0,
+        failure_floor: float = 0.5,
+    ):
+        self.min_interval = max(min_interval, 0.0)
+        self.max_interval = max(max_interval, self.min_interval)
+        self.decrease_step = decrease_step
+        self.increase_factor = increase_factor
+        self.failure_floor = failure_floor
+        self.interval = self.min_interval
+        self._next_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        """等待到下一個可派發的時間點"""
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_at - now
+            if delay > 0:
+                await asyncio.sleep(delay)
+                now = time.monotonic()
+            self._next_at = now + self.interval
+
+    def record_success(self) -> None:
+        self.interval = max(self.min_interval, self.interval - self.decrease_step)
+
+    def record_failure(self) -> None:
+        self.interval = min(
+            self.max_interval,
+            max(self.interval * self.increase_factor, self.failure_floor),
+        )
+
+
+class ConcurrentBatchOCR:
+    """
+    有上限的並行批量處理引擎
+
+    Args:
+        process_func: 單張處理協程，回傳結果；回傳 None 或拋出例外視為失敗
+        max_concurrency: 最大並行數（預設 BATCH_OCR_CONCURRENCY）
+        batch_service: 提供記憶體檢查的 BatchProcessingService
+        rate_limiter: 派發速率限制器
+    """
+
+    def __init__(
+        self,
+        process_func: Callable[[str], Awaitable[Any]],
+        max_concurrency: Optional[int] = None,
+        batch_service: Optional[BatchProcessingService] = None,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+        memory_check_interval: float = 1.0,
+    ):
+        self.process_func = process_func
+        self.max_concurrency = max(1, max_concurrency or settings.BATCH_OCR_CONCURRENCY)
+        self.batch_service = batch_service or BatchProcessingService()
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter(
+            min_interval=settings.BATCH_OCR_MIN_INTERVAL_MS / 1000.0
+        )
+        self.memory_check_interval = memory_check_interval
+        self.concurrency = self.max_concurrency
+        self._active = 0
+        self._condition: Optional[asyncio.Condition] = None
+        self._last_memory_check = 0.0
+
+    def _adjust_concurrency(self) -> None:
+        """記憶體壓力時並行數減半，恢復後逐步加回"""
+        now = time.monotonic()
+        if now - self._last_memory_check < self.memory_check_interval:
+            return
+        self._last_memory_check = now
+
+        if self.batch_service.should_cleanup_memory():
+            self.batch_service.cleanup_memory()
+            reduced = max(1, self.concurrency // 2)
+            if reduced != self.concurrency:
+                logger.warning(f"記憶體壓力過高，並行數 {self.concurrency} → {reduced}")
+            self.concurrency = reduced
+        elif self.concurrency < self.max_concurrency:
+            self.concurrency += 1
+
+    async def _acquire(self) -> None:
+        async with self._condition:
+            while True:
+                self._adjust_concurrency()
+                if self._active < self.concurrency:
+                    self._active += 1
+                    return
+                try:
+                    await asyncio.wait_for(self._condition.wait(), timeout=self.memory_check_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _release(self) -> None:
+        async with self._condition:
+            self._active -= 1
+            self._condition.notify()
+
+    async def run(
+        self,
+        items: List[str],
+        progress_callback: Optional[ProgressCallback] = None,
+        result_callback: Optional[Callable[[int, str, Any], Awaitable[None]]] = None,
+        should_stop: Optional[Callable[[], bool]] = None,
+    ) -> List[Any]:
+        """
+        並行處理所有項目
+
+        Args:
+            items: 待處理的圖片路徑
+            progress_callback: 每完成一張即呼叫（完成順序）
+            result_callback: 依輸入順序呼叫 (index, item, result)，適合依序寫入資料庫
+            should_stop: 回傳 True 時停止派發新工作（例如任務被取消）
+
+        Returns:
+            與 items 同順序的結果列表（失敗為 None）
+        """
+        total = len(items)
+        results: List[Any] = [None] * total
+        if total == 0:
+            return results
+
+        self._condition = asyncio.Condition()
+        queue: asyncio.Queue = asyncio.Queue()
+        for index, item in enumerate(items):
+            queue.put_nowait((index, item))
+
+        finished = [False] * total
+        state = {"completed": 0, "next_emit": 0}
+        emit_lock = asyncio.Lock()
+
+        async def emit_in_order() -> None:
+            # 只送出連續完成的前綴，確保 result_callback 依輸入順序
+            async with emit_lock:
+                while state["next_emit"] < total and finished[state["next_emit"]]:
+                    index = state["next_emit"]
+                    state["next_emit"] += 1
+                    if result_callback:
+                        try:
+                            await result_callback(index, items[index], results[index])
+                        except Exception as e:
+                            logger.error(f"結果回呼失敗 {os.path.basename(items[index])}: {e}")
+
+        async def worker() -> None:
+            while True:
+                try:
+                    index, item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                if should_stop and should_stop():
+                    return
+
+                await self._acquire()
+                try:
+                    await self.rate_limiter.wait()
+                    try:
+                        result = await self.process_func(item)
+                    except Exception as e:
+                        logger.error(f"處理圖片異常 {os.path.basename(item)}: {e}")
+                        result = None
+                finally:
+                    await self._release()
+
+                if result is None:
+                    self.rate_limiter.record_failure()
+                else:
+                    self.rate_limiter.record_success()
+
+                results[index] = result
+                finished[index] = True
+                state["completed"] += 1
+
+                if progress_callback:
+                    try:
+                        await progress_callback({
+                            'current': state["completed"],
+                            'total': total,
+                            'index': index,
+                            'filename': os.path.basename(item),
+                            'success': result is not None,
+                            'result': result,
+                            'concurrency': self.concurrency,
+                        })
+                    except Exception as e:
+                        logger.error(f"進度回呼失敗: {e}")
+
+                await emit_in_order()
+
+        self.batch_service.log_memory_status("並行批量處理開始前")
+        logger.info(f"開始並行批量處理: 共 {total} 個檔案，最大並行數 {self.max_concurrency}")
+
+        workers = [asyncio.create_task(worker()) for _ in range(min(self.max_concurrency, total))]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+            self.batch_service.log_memory_status("並行批量處理完成後")
+            self.batch_service.cleanup_memory()
+
+        success = sum(1 for r in results if r is not None)
+        logger.info(f"並行批量處理完成: 成功 {success}/{total}")
+        return results
@@ -9,6 +9,9 @@ from typing import Optional, Tuple, List
 import os
 from PIL import Image
 
+from backend.core.config import CARD_DETECTION_MAX_SIDE, CARD_DETECTION_REFINE
+from backend.utils.detection_scale import downscale_for_detection, refine_corners, upscale_corners
+
 
 class CardDetector:
     """名片检测器：实现四角定位、透视变换和图像增强"""
@@ -17,6 +20,8 @@ class CardDetector:
         self.min_card_area = 10000  # 最小名片面积
         self.target_width = 1200  # 目标输出宽度
         self.target_dpi = 300  # 目标DPI
+        self.detection_max_side = CARD_DETECTION_MAX_SIDE  # 检测用缩图的长边，0 表示在原图上检测
+        self.refine_detected_corners = CARD_DETECTION_REFINE  # 角点映射回原图后在小窗口内微调
         
     def detect_card_corners(self, image: np.ndarray) -> Optional[np.ndarray]:
         """
@@ -26,11 +31,15 @@ class CardDetector:
             image: 输入图像（numpy数组）
             
         Returns:
-            四个角点坐标，失败返回None
+            四个角点坐标（原图坐标），失败返回None
         """
         try:
+            # 在缩图上检测，最小面积按缩放比例换算
+            small, scale = downscale_for_detection(image, self.detection_max_side)
+            min_area = self.min_card_area / (scale[0] * scale[1])
+
             # 转换为灰度图
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
             
             # 高斯模糊去噪
             blurred = cv2.GaussianBlur(gray, (5, 5), 0)
@@ -55,7 +64,7 @@ class CardDetector:
             
             for contour in contours:
                 area = cv2.contourArea(contour)
-                if area < self.min_card_area:
+                if area < min_area:
                     continue
                     
                 # 多边形逼近
@@ -68,9 +77,11 @@ class CardDetector:
                     best_contour = approx
             
             if best_contour is not None:
-                # 重新排序角点（左上、右上、右下、左下）
-                corners = self._order_points(best_contour.reshape(4, 2))
-                return corners
+                # 映射回原图并重新排序角点（左上、右上、右下、左下）
+                corners = upscale_corners(best_contour.reshape(4, 2), scale, image.shape)
+                if self.refine_detected_corners:
+                    corners = refine_corners(image, corners, scale)
+                return self._order_points(corners)
             
             return None
             
@@ -234,6 +245,37 @@ class CardDetector:
             print(f"图像增强失败: {e}")
             return image
     
+    def process_card_array(self, image: np.ndarray) -> np.ndarray:
+        """
+        已解码图像的处理流程：角点检测、透视变换、分辨率提升
+        
+        Args:
+            image: 输入图像（numpy数组）
+            
+        Returns:
+            处理后的图像
+        """
+        # 检测名片角点
+        corners = self.detect_card_corners(image)
+        
+        if corners is not None:
+            # 执行透视变换
+            transformed = self.perspective_transform(image, corners)
+            print(f"成功检测并校正名片，原始尺寸: {image.shape[:2]}, 校正后: {transformed.shape[:2]}")
+        else:
+            # 如果检测失败，使用原图
+            print("名片边缘检测失败，使用原图进行处理")
+            transformed = image
+        
+        # 提升分辨率和增强图像
+        return self.enhance_resolution(transformed)
+    
+    def save_image(self, image: np.ndarray, output_path: str) -> None:
+        """以PIL保存为高DPI JPEG（OpenCV使用BGR，需先转换为RGB）"""
+        enhanced_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        pil_image = Image.fromarray(enhanced_rgb)
+        pil_image.save(output_path, "JPEG", quality=95, dpi=(self.target_dpi, self.target_dpi))
+    
     def process_card_image(self, image_path: str) -> Tuple[bool, str]:
         """
         完整的名片处理流程
@@ -250,30 +292,11 @@ class CardDetector:
             if image is None:
                 return False, "无法读取图像"
             
-            # 检测名片角点
-            corners = self.detect_card_corners(image)
-            
-            if corners is not None:
-                # 执行透视变换
-                transformed = self.perspective_transform(image, corners)
-                print(f"成功检测并校正名片，原始尺寸: {image.shape[:2]}, 校正后: {transformed.shape[:2]}")
-            else:
-                # 如果检测失败，使用原图
-                print("名片边缘检测失败，使用原图进行处理")
-                transformed = image
-            
-            # 提升分辨率和增强图像
-            enhanced = self.enhance_resolution(transformed)
+            enhanced = self.process_card_array(image)
             
             # 保存处理后的图像
             output_path = os.path.splitext(image_path)[0] + "_opencv_enhanced.jpg"
-            
-            # 转换为RGB（OpenCV使用BGR）
-            enhanced_rgb = cv2.cvtColor(enhanced, cv2.COLOR_BGR2RGB)
-            
-            # 使用PIL保存，设置高DPI
-            pil_image = Image.fromarray(enhanced_rgb)
-            pil_image.save(output_path, "JPEG", quality=95, dpi=(self.target_dpi, self.target_dpi))
+            self.save_image(enhanced, output_path)
             
             print(f"图像处理完成，输出尺寸: {enhanced.shape[:2]}, 保存路径: {output_path}")
             return True, output_path
@@ -15,6 +15,9 @@ import gc
 import psutil
 from datetime import datetime
 
+from backend.core.config import CARD_DETECTION_MAX_SIDE, CARD_DETECTION_REFINE
+from backend.utils.detection_scale import downscale_for_detection, refine_corners, upscale_corners
+
 # 設置日誌
 logger = logging.getLogger(__name__)
 
@@ -33,6 +36,9 @@ class CardEnhancementService:
         """
         self.manual_coords = manual_coords or [150, 440, 1130, 840]  # 預設座標
         self.enabled = os.getenv("USE_CARD_ENHANCEMENT", "true").lower() == "true"
+        # 偵測在長邊 detection_max_side 的縮圖上進行，角點再映射回原圖
+        self.detection_max_side = CARD_DETECTION_MAX_SIDE
+        self.refine_detected_corners = CARD_DETECTION_REFINE
         logger.info(f"卡片增強服務初始化，啟用狀態: {self.enabled}")
     
     def detect_card_edges(self, image: np.ndarray) -> Optional[np.ndarray]:
@@ -43,10 +49,11 @@ class CardEnhancementService:
             image: OpenCV 圖片數組
             
         Returns:
-            名片四個角點座標，失敗時返回 None
+            名片四個角點座標（原圖座標），失敗時返回 None
         """
         try:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            small, scale = downscale_for_detection(image, self.detection_max_side)
+            gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
             
             # 增強對比度
             clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8,8))
@@ -81,12 +88,13 @@ class CardEnhancementService:
             if aspect_ratio < 1.3 or aspect_ratio > 2.0:
                 return None
                 
-            return np.array([
+            # 外接矩形不是實際角點，不做角點微調
+            return upscale_corners(np.array([
                 [x, y],
                 [x + w, y],
                 [x + w, y + h],
                 [x, y + h]
-            ], dtype=np.float32)
+            ], dtype=np.float32), scale, image.shape)
             
         except Exception as e:
             logger.error(f"邊緣檢測失敗: {e}")
@@ -104,7 +112,6 @@ class CardEnhancementService:
         """
         try:
             h, w = image.shape[:2]
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
             
             # 方法1: 嘗試邊緣檢測
             corners = self.detect_card_edges(image)
@@ -113,6 +120,8 @@ class CardEnhancementService:
                 x2, y2 = int(corners[2][0]), int(corners[2][1])
                 return [x1, y1, x2, y2]
             
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
             # 方法2: 基於亮度變化檢測內容區域
             row_means = np.mean(gray, axis=1)
             col_means = np.mean(gray, axis=0)
@@ -181,12 +190,15 @@ class CardEnhancementService:
         approxPolyDP 角點偏差太大時自動 fallback 到 minAreaRect
         回傳四角座標 np.ndarray shape(4,2)，支援傾斜校正
         找不到時回傳 None（前端顯示原圖，使用者手動裁切）
+        偵測在縮圖上進行，角點映射回原圖後再微調，外擴以原圖尺寸計算
         """
         try:
             h, w = image.shape[:2]
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            small, scale = downscale_for_detection(image, self.detection_max_side)
+            small_h, small_w = small.shape[:2]
+            gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
             blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-            image_area = h * w
+            image_area = small_h * small_w
 
             # 自動 Canny 閾值（根據圖片中位數亮度）
             median = np.median(gray)
@@ -254,11 +266,16 @@ class CardEnhancementService:
                     max_diff = max(max_diff, min(dists))
 
                 # 偏差 < 圖片短邊的 5% 就認為可靠
-                threshold = min(w, h) * 0.05
+                threshold = min(small_w, small_h) * 0.05
                 if max_diff < threshold:
                     corners = poly_corners
                     chosen = "approxPolyDP"
 
+            # minAreaRect 是擬合出的外接框（圓角名片的框角不在名片上），只微調 approxPolyDP 角點
+            corners = upscale_corners(corners, scale, image.shape)
+            if self.refine_detected_corners and chosen == "approxPolyDP":
+                corners = refine_corners(image, corners, scale)
+
             # 外擴
             cx = np.mean(corners[:, 0])
             cy = np.mean(corners[:, 1])
@@ -394,6 +411,60 @@ class CardEnhancementService:
             logger.error(f"圖片增強失敗: {e}")
             return image
     
+    def detect_corners(
+        self,
+        image: np.ndarray,
+        auto_detect: bool = True,
+        corners: Optional[List[List[float]]] = None,
+        tight_crop: bool = False
+    ) -> Tuple[np.ndarray, bool, str]:
+        """
+        決定裁切用的四角座標
+
+        Args:
+            image: OpenCV 圖片數組
+            auto_detect: 未傳入 corners 時是否自動偵測（否則使用手動預設矩形）
+            corners: 前端傳入的四點座標
+            tight_crop: 使用貼合偵測（裁切預覽）
+
+        Returns:
+            (四角座標, 是否偵測成功, 偵測方式)
+        """
+        final_corners = None
+        detected = False
+        detection_method = "manual"
+
+        if corners:
+            logger.debug("使用前端傳入的四點座標")
+            final_corners = np.array(corners, dtype=np.float32)
+        elif auto_detect:
+            logger.debug(f"使用 OpenCV 偵測 (tight={tight_crop})")
+            if tight_crop:
+                tight_corners = self.auto_detect_coordinates_tight(image)
+                if tight_corners is not None:
+                    final_corners = tight_corners
+                    detected = True
+                    detection_method = "opencv_tight"
+                else:
+                    coords = self.auto_detect_coordinates(image)
+                    final_corners = self._box_to_corners(coords)
+                    detection_method = "opencv_fallback"
+            else:
+                detected_corners = self.detect_card_edges(image)
+                if detected_corners is not None:
+                    final_corners = detected_corners.astype(np.float32)
+                    detected = True
+                    detection_method = "opencv_edge"
+                else:
+                    coords = self.auto_detect_coordinates(image)
+                    final_corners = self._box_to_corners(coords)
+                    detection_method = "opencv_fallback"
+        else:
+            logger.debug("使用手動預設矩形座標")
+            final_corners = self._box_to_corners(self.manual_coords)
+
+        return final_corners, detected, detection_method
+
     def process_image_with_metadata(
         self,
         input_path: str,
@@ -428,38 +499,9 @@ class CardEnhancementService:
                     "message": "failed to read image"
                 }
 
-            final_corners = None
-            detected = False
-            detection_method = "manual"
-
-            if corners:
-                logger.debug("使用前端傳入的四點座標")
-                final_corners = np.array(corners, dtype=np.float32)
-            elif auto_detect:
-                logger.debug(f"使用 OpenCV 偵測 (tight={tight_crop})")
-                if tight_crop:
-                    tight_corners = self.auto_detect_coordinates_tight(image)
-                    if tight_corners is not None:
-                        final_corners = tight_corners
-                        detected = True
-                        detection_method = "opencv_tight"
-                    else:
-                        coords = self.auto_detect_coordinates(image)
-                        final_corners = self._box_to_corners(coords)
-                        detection_method = "opencv_fallback"
-                else:
-                    detected_corners = self.detect_card_edges(image)
-                    if detected_corners is not None:
-                        final_corners = detected_corners.astype(np.float32)
-                        detected = True
-                        detection_method = "opencv_edge"
-                    else:
-                        coords = self.auto_detect_coordinates(image)
-                        final_corners = self._box_to_corners(coords)
-                        detection_method = "opencv_fallback"
-            else:
-                logger.debug("使用手動預設矩形座標")
-                final_corners = self._box_to_corners(self.manual_coords)
+            final_corners, detected, detection_method = self.detect_corners(
+                image, auto_detect=auto_detect, corners=corners, tight_crop=tight_crop
+            )
 
             cropped = self.perspective_transform(image, final_corners)
 
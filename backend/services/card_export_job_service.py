@@ -0,0 +1,252 @@
+"""
+名片背景匯出任務
+
+大量匯出改以 task_manager 背景任務寫入磁碟，不再受單一請求（反向代理逾時）限制：
+- 進度以批次（EXPORT_CHUNK_ROWS 筆）回報，透過 /cards/tasks/{task_id} 查詢
+- 完成的檔案由下載端點以 FileResponse 提供（Content-Length / ETag / Range 續傳）
+- 相同篩選條件 + 格式在 EXPORT_REUSE_MINUTES 內重用既有任務與檔案
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from backend.core.cache import cache
+from backend.core.config import EXPORT_DIR, EXPORT_FILE_RETENTION_HOURS, EXPORT_REUSE_MINUTES
+from backend.models.db import SessionLocal
+from backend.services.card_export_service import (
+    EXPORT_CHUNK_ROWS, CardSource, iterate_export_cards, stream_csv, stream_vcard, stream_zip,
+    write_cards_excel, write_cards_parquet
+)
+from backend.services.task_manager import ACTIVE_STATUSES, TaskStatus, task_manager
+
+logger = logging.getLogger(__name__)
+
+EXPORT_TASK_TYPE = "card_export"
+
+# 背景匯出支援的格式：副檔名、Content-Type、寫檔函式 (open_cards, path, **options) -> None、讀取輪數
+EXPORT_JOB_FORMATS: Dict[str, Dict[str, Any]] = {}
+
+
+def _write_bytes(path: str, chunks: Iterable[bytes]) -> None:
+    with open(path, 'wb') as f:
+        for chunk in chunks:
+            f.write(chunk)
+
+
+def register_export_format(name: str, extension: str, media_type: str,
+                           write: Callable[..., None], passes: int = 1) -> None:
+    """登錄背景匯出格式（passes：寫檔時讀取名片的輪數，用於計算進度總數）"""
+    EXPORT_JOB_FORMATS[name] = {
+        "extension": extension, "media_type": media_type, "write": write, "passes": passes,
+    }
+
+
+register_export_format(
+    'csv', 'csv', 'text/csv; charset=utf-8',
+    lambda open_cards, path: _write_bytes(path, stream_csv(open_cards())),
+)
+register_export_format(
+    'excel', 'xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    lambda open_cards, path: write_cards_excel(open_cards(), path),
+)
+register_export_format(
+    'vcard', 'vcf', 'text/vcard; charset=utf-8',
+    lambda open_cards, path: _write_bytes(path, stream_vcard(open_cards())),
+)
+register_export_format(
+    'zip', 'zip', 'application/zip',
+    lambda open_cards, path, data_format='csv': _write_bytes(path, stream_zip(open_cards, data_format)),
+    passes=2,
+)
+register_export_format(
+    'parquet', 'parquet', 'application/vnd.apache.parquet',
+    lambda open_cards, path: write_cards_parquet(open_cards(raw=True), path),
+)
+
+
+class ExportCancelled(Exception):
+    """匯出任務已被取消"""
+
+
+def export_job_signature(fmt: str, filters: Dict[str, Any], options: Optional[Dict[str, Any]] = None) -> str:
+    """篩選條件 + 格式（+ 格式選項）的簽章，用於重用相同的匯出"""
+    payload = json.dumps(
+        {"format": fmt, "filters": filters, "options": options or {}},
+        sort_keys=True, default=str, ensure_ascii=False,
+    )
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def export_file_path(task_id: str, fmt: str, export_dir: str = EXPORT_DIR) -> str:
+    return os.path.join(export_dir, f"{task_id}.{EXPORT_JOB_FORMATS[fmt]['extension']}")
+
+
+def prune_export_files(export_dir: str = EXPORT_DIR,
+                       max_age_hours: int = EXPORT_FILE_RETENTION_HOURS) -> int:
+    """刪除超過保留時數的匯出檔案，返回刪除數量"""
+    if not os.path.isdir(export_dir):
+        return 0
+    cutoff = time.time() - max_age_hours * 3600
+    removed = 0
+    for entry in os.scandir(export_dir):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except OSError as e:
+            logger.warning(f"清理匯出檔案失敗: {entry.path}: {e}")
+    return removed
+
+
+class CardExportJob:
+    """
+    名片匯出背景任務：先寫入 .part 暫存檔，完成後原子改名
+
+    Args:
+        task_id: task_manager 任務 ID
+        fmt: 匯出格式（EXPORT_JOB_FORMATS 的鍵）
+        filters: 篩選條件（參數同 filter_cards_query）
+        options: 格式選項（例如 zip 的 data_format）
+        export_dir: 匯出檔案目錄
+    """
+
+    def __init__(self, task_id: str, fmt: str, filters: Dict[str, Any],
+                 options: Optional[Dict[str, Any]] = None, export_dir: str = EXPORT_DIR):
+        self.task_id = task_id
+        self.fmt = fmt
+        self.filters = filters
+        self.options = options or {}
+        self.export_dir = export_dir
+        self.rows = 0
+
+    def _track(self, cards: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """逐批回報進度並檢查取消（每一輪讀取各自計數）"""
+        rows = 0
+        for card in cards:
+            yield card
+            rows += 1
+            if rows % EXPORT_CHUNK_ROWS == 0:
+                task_manager.update_progress(self.task_id)
+                if task_manager.is_cancelled(self.task_id):
+                    raise ExportCancelled()
+        if rows % EXPORT_CHUNK_ROWS:
+            task_manager.update_progress(self.task_id)
+        self.rows = rows
+
+    def run(self) -> None:
+        """在背景執行緒中執行"""
+        task_manager.start_task(self.task_id)
+        path = export_file_path(self.task_id, self.fmt, self.export_dir)
+        part_path = f"{path}.part"
+        db = SessionLocal()
+        try:
+            os.makedirs(self.export_dir, exist_ok=True)
+            open_cards: CardSource = lambda fields=None, **kwargs: self._track(
+                iterate_export_cards(db, self.filters, fields, **kwargs)
+            )
+            EXPORT_JOB_FORMATS[self.fmt]["write"](open_cards, part_path, **self.options)
+            os.replace(part_path, path)
+
+            task_manager.set_result(self.task_id, {
+                "format": self.fmt,
+                "options": self.options,
+                "rows": self.rows,
+                "file_name": os.path.basename(path),
+                "size": os.path.getsize(path),
+            })
+            task_manager.complete_task(self.task_id)
+            logger.info(f"匯出任務完成: task_id={self.task_id}, format={self.fmt}, rows={self.rows}")
+
+        except ExportCancelled:
+            logger.info(f"匯出任務已取消: task_id={self.task_id}")
+        except Exception as e:
+            logger.error(f"匯出任務失敗: task_id={self.task_id}, error={str(e)}")
+            task_manager.complete_task(self.task_id, error_message=str(e))
+        finally:
+            db.close()
+            if os.path.exists(part_path):
+                os.remove(part_path)
+
+
+_start_lock = threading.Lock()
+
+
+def _is_reusable(task_id: str) -> bool:
+    task = task_manager.get_task(task_id)
+    if not task or task.task_type != EXPORT_TASK_TYPE:
+        return False
+    if task.status.value in ACTIVE_STATUSES:
+        return True
+    return task.status == TaskStatus.COMPLETED and get_export_file(task_id) is not None
+
+
+def start_export_job(fmt: str, filters: Dict[str, Any], count_rows: Callable[[], int],
+                     tags: Optional[List[str]] = None,
+                     options: Optional[Dict[str, Any]] = None) -> Tuple[str, bool]:
+    """
+    建立（或重用）背景匯出任務
+
+    Args:
+        fmt: 匯出格式
+        filters: 篩選條件
+        count_rows: 計算符合筆數（用於進度總數）
+        tags: 重用紀錄的快取標籤，名片異動時讓舊匯出失效
+        options: 格式選項（傳給寫檔函式）
+
+    Returns:
+        (task_id, 是否重用既有任務)
+    """
+    if fmt not in EXPORT_JOB_FORMATS:
+        raise ValueError(f"不支援的匯出格式: {fmt}")
+
+    cache_key = f"export_job:{export_job_signature(fmt, filters, options)}"
+    with _start_lock:
+        task_id = cache.get(cache_key)
+        if task_id and _is_reusable(task_id):
+            logger.info(f"重用匯出任務: task_id={task_id}, format={fmt}")
+            return task_id, True
+
+        prune_export_files()
+        total_rows = count_rows()
+        task_id = task_manager.create_task(
+            total=math.ceil(total_rows / EXPORT_CHUNK_ROWS) * EXPORT_JOB_FORMATS[fmt]["passes"],
+            task_type=EXPORT_TASK_TYPE,
+        )
+        task_manager.set_result(task_id, {"format": fmt, "options": options or {}, "rows": total_rows})
+        cache.set(cache_key, task_id, ttl_minutes=EXPORT_REUSE_MINUTES, tags=tags)
+
+    logger.info(f"創建匯出任務: task_id={task_id}, format={fmt}, rows={total_rows}")
+    thread = threading.Thread(target=CardExportJob(task_id, fmt, filters, options).run, daemon=True)
+    thread.start()
+    return task_id, False
+
+
+def get_export_file(task_id: str) -> Optional[Dict[str, Any]]:
+    """
+    已完成匯出任務的檔案資訊
+
+    Returns:
+        {"path", "format", "media_type", "extension", "created_at"}；任務不存在、未完成或檔案已清理時為 None
+    """
+    task = task_manager.get_task(task_id)
+    if not task or task.task_type != EXPORT_TASK_TYPE or task.status != TaskStatus.COMPLETED:
+        return None
+    fmt = (task.result or {}).get("format")
+    if fmt not in EXPORT_JOB_FORMATS:
+        return None
+    path = export_file_path(task_id, fmt)
+    if not os.path.isfile(path):
+        return None
+    return {
+        "path": path,
+        "format": fmt,
+        "media_type": EXPORT_JOB_FORMATS[fmt]["media_type"],
+        "extension": EXPORT_JOB_FORMATS[fmt]["extension"],
+        "created_at": task.created_at,
+    }
@@ -0,0 +1,427 @@
+"""
+名片匯出服務
+
+以伺服器端游標分批讀取名片（Query.yield_per），逐列產生 CSV / vCard 位元組區塊，
+回應可立即開始傳送，記憶體用量與匯出筆數無關；
+Excel 以 write_only 引擎逐列寫入暫存檔；
+ZIP 將資料表與名片圖片一起串流打包，圖片以 STORED 原樣寫入不再壓縮；
+Parquet 以原生型別（時間戳記、浮點信心度、類別型產業）分批寫入暫存檔，供分析用途。
+
+篩選條件帶 updated_since 時為增量匯出，依 (updated_at, id) 遞增排序。
+"""
+
+import csv
+import io
+import operator
+import os
+import tempfile
+import zipfile
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+from sqlalchemy.orm import Session
+
+from backend.models.card import CardORM
+from backend.models.db import SessionLocal
+from backend.services.card_service import card_to_dict, filter_cards_query, project_card_query
+from backend.utils.excel_writer import StreamingExcelWriter
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # 未安裝時不提供 parquet 匯出
+    pa = pq = None
+
+PARQUET_AVAILABLE = pq is not None
+
+# 每批從資料庫讀取的筆數
+EXPORT_CHUNK_ROWS = 500
+# 累積到此大小才送出一個區塊
+EXPORT_CHUNK_BYTES = 64 * 1024
+# Excel 欄寬取樣列數
+EXCEL_WIDTH_SAMPLE_ROWS = 500
+# Parquet 每個 row group 的筆數（分析查詢以較大的 row group 效率較佳）
+PARQUET_ROW_GROUP_ROWS = 10000
+
+# 33 個欄位定義（中文標頭 + DB 欄位名）
+EXPORT_COLUMNS = [
+    ('ID', 'id'),
+    ('姓名（中文）', 'name_zh'),
+    ('姓名（英文）', 'name_en'),
+    ('公司名稱（中文）', 'company_name_zh'),
+    ('公司名稱（英文）', 'company_name_en'),
+    ('職位（中文）', 'position_zh'),
+    ('職位（英文）', 'position_en'),
+    ('職位1（中文）', 'position1_zh'),
+    ('職位1（英文）', 'position1_en'),
+    ('部門1（中文）', 'department1_zh'),
+    ('部門1（英文）', 'department1_en'),
+    ('部門2（中文）', 'department2_zh'),
+    ('部門2（英文）', 'department2_en'),
+    ('部門3（中文）', 'department3_zh'),
+    ('部門3（英文）', 'department3_en'),
+    ('手機', 'mobile_phone'),
+    ('公司電話1', 'company_phone1'),
+    ('公司電話2', 'company_phone2'),
+    ('傳真', 'fax'),
+    ('Email', 'email'),
+    ('Line ID', 'line_id'),
+    ('WeChat ID', 'wechat_id'),
+    ('公司地址1（中文）', 'company_address1_zh'),
+    ('公司地址1（英文）', 'company_address1_en'),
+    ('公司地址2（中文）', 'company_address2_zh'),
+    ('公司地址2（英文）', 'company_address2_en'),
+    ('備註1', 'note1'),
+    ('備註2', 'note2'),
+    ('產業分類', 'industry_category'),
+    ('分類信心度', 'classification_confidence'),
+    ('分類原因', 'classification_reason'),
+    ('建立時間', 'created_at'),
+    ('更新時間', 'updated_at'),
+]
+EXPORT_FIELDS = [field for _, field in EXPORT_COLUMNS]
+
+# ZIP 匯出：資料表額外附上圖片在壓縮檔內的路徑（與前端相同，優先使用裁切後圖片）
+ZIP_IMAGE_SIDES = ('front', 'back')
+ZIP_IMAGE_PATH_FIELDS = [
+    f'{side}{kind}_image_path' for side in ZIP_IMAGE_SIDES for kind in ('_cropped', '')
+]
+ZIP_IMAGE_COLUMNS = [('正面圖片', 'front_image_file'), ('反面圖片', 'back_image_file')]
+ZIP_DATA_FORMATS = ('csv', 'excel')
+
+# 依欄位取得名片（fields 為 None 時使用 EXPORT_FIELDS），ZIP 匯出需要分兩輪讀取
+CardSource = Callable[..., Iterable[Dict[str, Any]]]
+
+
+def get_export_value(card: Dict[str, Any], field: str) -> Any:
+    value = card.get(field, '') or ''
+    if field == 'classification_confidence' and value:
+        try:
+            return f'{float(value)*100:.0f}%'
+        except (TypeError, ValueError):
+            pass
+    return value
+
+
+def iterate_export_cards(db: Session, filters: Dict[str, Any],
+                         fields: Optional[List[str]] = None,
+                         chunk_size: int = EXPORT_CHUNK_ROWS, raw: bool = False) -> Iterator[dict]:
+    """
+    依篩選條件分批讀取名片（參數同 filter_cards_query），只載入匯出欄位
+
+    Args:
+        filters: 篩選條件
+        fields: 要載入的欄位，預設為 EXPORT_FIELDS
+        raw: 保留原始型別（datetime 不轉字串），供 Parquet 使用
+    """
+    fields = fields or EXPORT_FIELDS
+    query, _ = filter_cards_query(db, db.query(CardORM), **filters)
+    if filters.get('updated_since') is not None:
+        order = (CardORM.updated_at.asc(), CardORM.id.asc())
+    else:
+        order = (CardORM.created_at.desc(), CardORM.id.desc())
+    query = project_card_query(query, fields).order_by(*order)
+    if raw:
+        getter = operator.attrgetter(*fields)
+        for card in query.yield_per(chunk_size):
+            values = getter(card)
+            yield dict(zip(fields, values if len(fields) > 1 else (values,)))
+        return
+    for card in query.yield_per(chunk_size):
+        yield card_to_dict(card, fields)
+
+
+def _chunked(pieces: Iterable[str], encoding: str = 'utf-8') -> Iterator[bytes]:
+    buffer: List[str] = []
+    size = 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= EXPORT_CHUNK_BYTES:
+            yield ''.join(buffer).encode(encoding)
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer).encode(encoding)
+
+
+def stream_csv(cards: Iterable[Dict[str, Any]],
+               columns: Sequence[Tuple[str, str]] = EXPORT_COLUMNS) -> Iterator[bytes]:
+    """逐列輸出 CSV（UTF-8 BOM，方便 Excel 直接開啟）"""
+    fields = [field for _, field in columns]
+
+    def lines() -> Iterator[str]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        yield '\ufeff'
+        writer.writerow([header for header, _ in columns])
+        for card in cards:
+            writer.writerow([get_export_value(card, field) for field in fields])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+        yield buffer.getvalue()
+
+    return _chunked(lines())
+
+
+def format_vcard(card: Dict[str, Any]) -> str:
+    """單張名片的 vCard 3.0 文字"""
+    lines = ["BEGIN:VCARD", "VERSION:3.0"]
+    if card.get('name_zh'):
+        lines.append(f"FN:{card.get('name_zh')}")
+    if card.get('company_name_zh'):
+        lines.append(f"ORG:{card.get('company_name_zh')}")
+    if card.get('position_zh'):
+        lines.append(f"TITLE:{card.get('position_zh')}")
+    if card.get('company_phone1'):
+        lines.append(f"TEL;TYPE=WORK,VOICE:{card.get('company_phone1')}")
+    if card.get('mobile_phone'):
+        lines.append(f"TEL;TYPE=CELL:{card.get('mobile_phone')}")
+    if card.get('email'):
+        lines.append(f"EMAIL;TYPE=INTERNET:{card.get('email')}")
+    if card.get('company_address1_zh'):
+        address = card.get('company_address1_zh')
+        if card.get('company_address2_zh'):
+            address += f" {card.get('company_address2_zh')}"
+        lines.append(f"ADR;TYPE=WORK:;;{address};;;;")
+    lines.append("END:VCARD")
+    return "\n".join(lines) + "\n"
+
+
+def stream_vcard(cards: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    """逐張輸出 vCard"""
+    return _chunked(format_vcard(card) for card in cards)
+
+
+def write_cards_excel(cards: Iterable[Dict[str, Any]], path: Optional[str] = None,
+                      spool_dir: Optional[str] = None,
+                      columns: Sequence[Tuple[str, str]] = EXPORT_COLUMNS) -> str:
+    """
+    以 write_only 模式寫出名片 Excel，返回檔案路徑（未指定 path 時為暫存檔，由呼叫端刪除）
+    """
+    fields = [field for _, field in columns]
+    writer = StreamingExcelWriter()
+    thin_side = Side(style='thin', color='B0B0B0')
+    thin_border = Border(left=thin_side, right=thin_side, top=thin_side, bottom=thin_side)
+    data_font = Font(name='Microsoft JhengHei', size=10)
+    data_alignment = Alignment(vertical='center', wrap_text=False)
+    header = writer.add_style(
+        'card_header',
+        font=Font(name='Microsoft JhengHei', bold=True, color='FFFFFF', size=11),
+        fill=PatternFill(start_color='1F4E79', end_color='1F4E79', fill_type='solid'),
+        alignment=Alignment(horizontal='center', vertical='center', wrap_text=True),
+        border=thin_border,
+    )
+    # 斑馬紋：偶數列淺藍、奇數列白底
+    striped = writer.add_style(
+        'card_row_striped', font=data_font, alignment=data_alignment, border=thin_border,
+        fill=PatternFill(start_color='D6E4F0', end_color='D6E4F0', fill_type='solid'),
+    )
+    plain = writer.add_style(
+        'card_row_plain', font=data_font, alignment=data_alignment, border=thin_border,
+        fill=PatternFill(start_color='FFFFFF', end_color='FFFFFF', fill_type='solid'),
+    )
+
+    sheet = writer.create_sheet("名片資料", sample_rows=EXCEL_WIDTH_SAMPLE_ROWS)
+    sheet.freeze('A2')
+    sheet.append([title for title, _ in columns], style=header, height=30)
+    for row_idx, card in enumerate(cards, 2):
+        sheet.append(
+            [get_export_value(card, field) for field in fields],
+            style=striped if row_idx % 2 == 0 else plain,
+            height=22,
+        )
+    return writer.save(path, spool_dir=spool_dir)
+
+
+def stream_export(render: Callable[[Iterable[Dict[str, Any]]], Iterator[bytes]],
+                  filters: Dict[str, Any]) -> Iterator[bytes]:
+    """
+    串流回應用的匯出產生器；使用獨立會話，回應送完才關閉連線
+
+    Args:
+        render: stream_csv / stream_vcard
+        filters: 篩選條件
+    """
+    db = SessionLocal()
+    try:
+        yield from render(iterate_export_cards(db, filters))
+    finally:
+        db.close()
+
+
+# Parquet 欄位型別（未列出的欄位為字串）
+PARQUET_COLUMN_TYPES = {
+    'id': 'int64',
+    'classification_confidence': 'float64',
+    'created_at': 'timestamp',
+    'updated_at': 'timestamp',
+    'industry_category': 'category',
+}
+
+
+def _parquet_type(field: str):
+    kind = PARQUET_COLUMN_TYPES.get(field, 'string')
+    if kind == 'int64':
+        return pa.int64()
+    if kind == 'float64':
+        return pa.float64()
+    if kind == 'timestamp':
+        return pa.timestamp('us')
+    if kind == 'category':
+        return pa.dictionary(pa.int32(), pa.string())
+    return pa.string()
+
+
+def parquet_schema(fields: Sequence[str] = EXPORT_FIELDS):
+    """Parquet 匯出的 Arrow schema（欄位名稱同資料表欄位）"""
+    return pa.schema([pa.field(field, _parquet_type(field)) for field in fields])
+
+
+def _parquet_table(rows: List[Dict[str, Any]], schema):
+    arrays = []
+    for field in schema:
+        values = [row.get(field.name) for row in rows]
+        if pa.types.is_dictionary(field.type):
+            arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def write_cards_parquet(cards: Iterable[Dict[str, Any]], path: Optional[str] = None,
+                        spool_dir: Optional[str] = None) -> str:
+    """
+    分批寫出名片 Parquet（cards 需為 iterate_export_cards(raw=True) 的原始值），返回檔案路徑
+
+    增量同步可由檔案中 updated_at 欄位的最大值（row group 統計）取得下次的 updated_since。
+    """
+    if not PARQUET_AVAILABLE:
+        raise RuntimeError("未安裝 pyarrow，無法匯出 parquet")
+
+    if path is None:
+        fd, path = tempfile.mkstemp(suffix='.parquet', dir=spool_dir)
+        os.close(fd)
+    schema = parquet_schema()
+    try:
+        with pq.ParquetWriter(path, schema, compression='zstd') as writer:
+            batch: List[Dict[str, Any]] = []
+            for card in cards:
+                batch.append(card)
+                if len(batch) >= PARQUET_ROW_GROUP_ROWS:
+                    writer.write_table(_parquet_table(batch, schema))
+                    batch = []
+            if batch:
+                writer.write_table(_parquet_table(batch, schema))
+    except Exception:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    return path
+
+
+class _ZipSink:
+    """不可 seek 的寫入端：zipfile 改用資料描述區，寫入的位元組暫存到被取走為止"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self.size = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks, self.size = [], 0
+        return data
+
+
+def _resolve_card_image(card: Dict[str, Any], side: str) -> Optional[str]:
+    for field in (f'{side}_cropped_image_path', f'{side}_image_path'):
+        path = card.get(field)
+        if path and os.path.isfile(path):
+            return path
+    return None
+
+
+def zip_image_name(card_id: Any, side: str, path: str) -> str:
+    """圖片在壓縮檔內的路徑"""
+    extension = os.path.splitext(path)[1].lower() or '.jpg'
+    return f'images/{card_id}_{side}{extension}'
+
+
+def _with_image_names(card: Dict[str, Any]) -> Dict[str, Any]:
+    for side, (_, field) in zip(ZIP_IMAGE_SIDES, ZIP_IMAGE_COLUMNS):
+        path = _resolve_card_image(card, side)
+        card[field] = zip_image_name(card.get('id'), side, path) if path else ''
+    return card
+
+
+def _zip_write_file(zf: zipfile.ZipFile, sink: _ZipSink, path: str, arcname: str,
+                    compress_type: int = zipfile.ZIP_STORED) -> Iterator[bytes]:
+    zinfo = zipfile.ZipInfo.from_file(path, arcname)
+    zinfo.compress_type = compress_type
+    with open(path, 'rb') as src, zf.open(zinfo, 'w') as dst:
+        for block in iter(lambda: src.read(EXPORT_CHUNK_BYTES), b''):
+            dst.write(block)
+            if sink.size >= EXPORT_CHUNK_BYTES:
+                yield sink.drain()
+
+
+def stream_zip(open_cards: CardSource, data_format: str = 'csv') -> Iterator[bytes]:
+    """
+    串流輸出 ZIP：cards.csv / cards.xlsx + images/{id}_{front|back}.{ext}
+
+    第一輪寫入資料表（含圖片路徑欄），第二輪只讀取圖片欄位並原樣（STORED）寫入圖片，
+    壓縮檔不在記憶體中組出，每累積約 EXPORT_CHUNK_BYTES 即送出。
+
+    Args:
+        open_cards: 依欄位取得名片的函式，會被呼叫兩次
+        data_format: 資料表格式 csv / excel
+    """
+    if data_format not in ZIP_DATA_FORMATS:
+        raise ValueError(f"不支援的資料表格式: {data_format}")
+
+    columns = list(EXPORT_COLUMNS) + ZIP_IMAGE_COLUMNS
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, 'w') as zf:
+        cards = (_with_image_names(card) for card in open_cards(EXPORT_FIELDS + ZIP_IMAGE_PATH_FIELDS))
+        if data_format == 'excel':
+            excel_path = write_cards_excel(cards, columns=columns)
+            try:
+                # xlsx 本身已壓縮
+                yield from _zip_write_file(zf, sink, excel_path, 'cards.xlsx')
+            finally:
+                os.remove(excel_path)
+        else:
+            zinfo = zipfile.ZipInfo('cards.csv', datetime.now().timetuple()[:6])
+            zinfo.compress_type = zipfile.ZIP_DEFLATED
+            with zf.open(zinfo, 'w', force_zip64=True) as dst:
+                for chunk in stream_csv(cards, columns):
+                    dst.write(chunk)
+                    if sink.size >= EXPORT_CHUNK_BYTES:
+                        yield sink.drain()
+
+        for card in open_cards(['id'] + ZIP_IMAGE_PATH_FIELDS):
+            for side in ZIP_IMAGE_SIDES:
+                path = _resolve_card_image(card, side)
+                if path:
+                    yield from _zip_write_file(zf, sink, path, zip_image_name(card.get('id'), side, path))
+    yield sink.drain()
+
+
+def stream_zip_export(filters: Dict[str, Any], data_format: str = 'csv') -> Iterator[bytes]:
+    """串流回應用的 ZIP 匯出產生器；使用獨立會話（參數同 stream_export）"""
+    db = SessionLocal()
+    try:
+        yield from stream_zip(
+            lambda fields=None: iterate_export_cards(db, filters, fields), data_format
+        )
+    finally:
+        db.close()
@@ -0,0 +1,183 @@
+"""
+名片全文搜尋
+
+取代 11 個 LIKE '%q%' 欄位 OR 條件的全表掃描：
+- SQLite：FTS5 外部內容虛擬表（trigram 分詞，支援中日韓子字串），由觸發器與 cards 表同步
+- PostgreSQL：pg_trgm GIN 表達式索引，搭配 ILIKE 與 similarity 排序
+- 其他資料庫或查詢少於 3 個字元（trigram 無法使用索引）時退回原本的 contains 條件
+
+建立索引（亦會在服務啟動時自動執行）：
+python -c "from backend.migrations.add_card_search_index import upgrade; upgrade()"
+"""
+
+import logging
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Float, Integer, or_, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Query, Session
+
+from backend.models.card import CardORM
+
+logger = logging.getLogger(__name__)
+
+# 參與搜尋的欄位（與原本 contains 條件相同）
+SEARCH_COLUMNS = [
+    "name_zh", "name_en",
+    "company_name_zh", "company_name_en",
+    "position_zh", "position_en", "position1_zh", "position1_en",
+    "mobile_phone", "email",
+    "classification_reason",
+]
+
+FTS_TABLE = "cards_fts"
+PG_INDEX = "idx_cards_search_trgm"
+PG_SEARCH_EXPR = " || ' ' || ".join(f"coalesce({col}, '')" for col in SEARCH_COLUMNS)
+MIN_INDEXED_QUERY_LENGTH = 3
+
+BACKEND_FTS5 = "fts5"
+BACKEND_PG_TRGM = "pg_trgm"
+BACKEND_LIKE = "like"
+
+_search_backend: Optional[str] = None
+
+
+def _sqlite_schema() -> List[str]:
+    columns = ", ".join(SEARCH_COLUMNS)
+    new_values = ", ".join(f"new.{col}" for col in SEARCH_COLUMNS)
+    old_values = ", ".join(f"old.{col}" for col in SEARCH_COLUMNS)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+        f"{columns}, content='cards', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON cards BEGIN "
+        f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON cards BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {columns} ON cards BEGIN "
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values}); END",
+    ]
+
+
+def ensure_search_index(engine: Engine, rebuild: bool = False) -> str:
+    """
+    建立搜尋索引（可重複執行），返回使用的搜尋後端
+
+    Args:
+        engine: SQLAlchemy engine
+        rebuild: 是否重建 FTS 內容（首次建立或資料漂移時）
+    """
+    global _search_backend
+    dialect = engine.dialect.name
+
+    try:
+        if dialect == "sqlite":
+            with engine.begin() as conn:
+                existed = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {"name": FTS_TABLE}
+                ).first() is not None
+                for statement in _sqlite_schema():
+                    conn.execute(text(statement))
+                if rebuild or not existed:
+                    # 以 cards 既有資料填充索引
+                    conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+            _search_backend = BACKEND_FTS5
+        elif dialect == "postgresql":
+            with engine.begin() as conn:
+                conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                conn.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS {PG_INDEX} ON cards USING gin (({PG_SEARCH_EXPR}) gin_trgm_ops)"
+                ))
+            _search_backend = BACKEND_PG_TRGM
+        else:
+            _search_backend = BACKEND_LIKE
+    except Exception as e:
+        logger.warning(f"全文搜尋索引建立失敗，改用 LIKE 搜尋: {e}")
+        _search_backend = BACKEND_LIKE
+
+    logger.info(f"名片搜尋後端: {_search_backend}")
+    return _search_backend
+
+
+def get_search_backend(db: Session) -> str:
+    """目前可用的搜尋後端（首次呼叫時偵測索引是否存在）"""
+    global _search_backend
+    if _search_backend is None:
+        bind = db.get_bind()
+        dialect = bind.dialect.name
+        try:
+            if dialect == "sqlite":
+                exists = db.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {"name": FTS_TABLE}
+                ).first() is not None
+                _search_backend = BACKEND_FTS5 if exists else BACKEND_LIKE
+            elif dialect == "postgresql":
+                exists = db.execute(
+                    text("SELECT 1 FROM pg_indexes WHERE indexname = :name"), {"name": PG_INDEX}
+                ).first() is not None
+                _search_backend = BACKEND_PG_TRGM if exists else BACKEND_LIKE
+            else:
+                _search_backend = BACKEND_LIKE
+        except Exception as e:
+            logger.warning(f"偵測搜尋索引失敗，改用 LIKE 搜尋: {e}")
+            _search_backend = BACKEND_LIKE
+    return _search_backend
+
+
+def like_search_condition(search: str):
+    """原本的 contains 條件（短查詢或無索引時使用）"""
+    return or_(*[getattr(CardORM, col).contains(search) for col in SEARCH_COLUMNS])
+
+
+def _fts_phrase(search: str) -> str:
+    # trigram 分詞下以片語查詢即為子字串比對
+    return '"' + search.replace('"', '""') + '"'
+
+
+def apply_card_search(db: Session, query: Query, search: str, ranked: bool = False) -> Tuple[Query, list]:
+    """
+    為查詢加上搜尋條件
+
+    Args:
+        db: 資料庫會話
+        query: 以 CardORM 為主體的查詢
+        search: 搜尋字串
+        ranked: 是否需要相關度排序
+
+    Returns:
+        (加上條件的查詢, 相關度排序子句列表；不需排序或無法排序時為空列表)
+    """
+    search = (search or "").strip()
+    if not search:
+        return query, []
+
+    backend = get_search_backend(db)
+    if backend == BACKEND_LIKE or len(search) < MIN_INDEXED_QUERY_LENGTH:
+        return query.filter(like_search_condition(search)), []
+
+    if backend == BACKEND_FTS5:
+        fts_query = _fts_phrase(search)
+        if not ranked:
+            matched_ids = text(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :fts_query"
+            ).bindparams(fts_query=fts_query).columns(rowid=Integer)
+            return query.filter(CardORM.id.in_(matched_ids)), []
+        matches = text(
+            f"SELECT rowid AS card_id, bm25({FTS_TABLE}) AS rank FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH :fts_query"
+        ).bindparams(fts_query=fts_query).columns(card_id=Integer, rank=Float).subquery("card_search")
+        query = query.join(matches, CardORM.id == matches.c.card_id)
+        # bm25 越小越相關
+        return query, [matches.c.rank.asc()]
+
+    # PostgreSQL pg_trgm：ILIKE 由 GIN 索引支援，similarity 作為相關度
+    escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    query = query.filter(
+        text(f"({PG_SEARCH_EXPR}) ILIKE :search_pattern").bindparams(search_pattern=f"%{escaped}%")
+    )
+    if not ranked:
+        return query, []
+    rank = text(f"similarity({PG_SEARCH_EXPR}, :search_text) DESC").bindparams(search_text=search)
+    return query, [rank]
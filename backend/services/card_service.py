@@ -1,9 +1,17 @@
-from backend.models.card import CardORM, Card
-from sqlalchemy.orm import Session
-from typing import Dict, Iterator, List, Optional, Tuple
-from sqlalchemy import and_, or_, func
+from backend.models.card import BatchImportCheckpointORM, CardORM, Card
+from backend.services.card_search_service import apply_card_search
+from backend.services.card_stats_service import apply_card_stats_delta, apply_completeness, card_stats_keys
+from sqlalchemy.orm import Session, load_only
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import DateTime, and_, or_, func, text, tuple_
+from sqlalchemy.engine import Engine
+import base64
+import binascii
 import datetime
+import functools
 import hashlib
+import json
+import operator
 
 
 def compute_duplicate_group_id(name_zh: str, company_name_zh: str) -> str:
@@ -36,30 +44,106 @@ def update_duplicate_group(db: Session, name_zh: str, company_name_zh: str):
             card.duplicate_group_id = None
             card.reviewed_at = None
 
-def get_cards(db: Session) -> List[dict]:
+# 列表摘要不需要的大欄位（OCR 原文、裁切座標、分類理由），單張可達數 KB
+CARD_HEAVY_FIELDS = (
+    "front_ocr_text", "back_ocr_text",
+    "front_crop_corners", "back_crop_corners",
+    "classification_reason",
+)
+CARD_COLUMNS = [column.key for column in CardORM.__table__.columns]
+_ALL_CARD_COLUMNS = tuple(CARD_COLUMNS)
+CARD_SUMMARY_FIELDS = [name for name in CARD_COLUMNS if name not in CARD_HEAVY_FIELDS]
+# 計算欄位（非資料表欄位）
+CARD_COMPUTED_FIELDS = ("duplicate_count",)
+# 排序、游標與重複數量需要的欄位，一律載入
+_CARD_REQUIRED_FIELDS = ("id", "created_at", "duplicate_group_id")
+
+
+def resolve_card_fields(view: Optional[str] = None, fields: Optional[str] = None) -> Optional[List[str]]:
+    """
+    解析欄位投影參數
+
+    Args:
+        view: summary（略過大欄位）/ full（全部欄位）
+        fields: 逗號分隔的欄位名稱，優先於 view
+
+    Returns:
+        要輸出的欄位列表；None 表示完整欄位
+    """
+    if fields:
+        requested = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+        unknown = [f for f in requested if f not in CARD_COLUMNS and f not in CARD_COMPUTED_FIELDS]
+        if unknown:
+            raise ValueError(f"未知的欄位: {', '.join(unknown)}")
+        if "id" not in requested:
+            requested.insert(0, "id")
+        return requested
+    if view in (None, "", "full"):
+        return None
+    if view == "summary":
+        return CARD_SUMMARY_FIELDS + list(CARD_COMPUTED_FIELDS)
+    raise ValueError(f"未知的 view: {view}，可用值為 summary / full")
+
+
+def project_card_query(query, fields: Optional[List[str]] = None):
+    """只從資料庫載入投影所需的欄位"""
+    if fields is None:
+        return query
+    load_fields = [name for name in CARD_COLUMNS if name in fields or name in _CARD_REQUIRED_FIELDS]
+    return query.options(load_only(*[getattr(CardORM, name) for name in load_fields]))
+
+
+_DATETIME_COLUMNS = frozenset(
+    column.key for column in CardORM.__table__.columns if isinstance(column.type, DateTime)
+)
+
+
+@functools.lru_cache(maxsize=64)
+def _compile_card_serializer(names: Tuple[str, ...]) -> Callable[[CardORM], dict]:
+    """依欄位列表預先建立 ORM 列轉字典的函式（欄位取值與日期時間欄位位置只計算一次）"""
+    getter = operator.attrgetter(*names)
+    datetime_indexes = [i for i, name in enumerate(names) if name in _DATETIME_COLUMNS]
+
+    def serialize(card: CardORM) -> dict:
+        values = getter(card)
+        if len(names) == 1:
+            values = (values,)
+        if datetime_indexes:
+            values = list(values)
+            for i in datetime_indexes:
+                if values[i] is not None:
+                    values[i] = values[i].isoformat()
+        return dict(zip(names, values))
+
+    return serialize
+
+
+def card_to_dict(card: CardORM, fields: Optional[List[str]] = None) -> dict:
+    """名片 ORM 轉為可直接 JSON 編碼的字典（日期時間轉 ISO 字串）"""
+    if fields is None:
+        names = _ALL_CARD_COLUMNS
+    else:
+        names = tuple(name for name in fields if name not in CARD_COMPUTED_FIELDS)
+    return _compile_card_serializer(names)(card)
+
+
+def get_cards(db: Session, fields: Optional[List[str]] = None) -> List[dict]:
     """獲取所有名片（保留舊版本兼容性）"""
     # 優化：使用批量處理減少對象創建開銷
-    cards = db.query(CardORM).order_by(CardORM.created_at.desc()).all()
+    cards = project_card_query(db.query(CardORM), fields).order_by(CardORM.created_at.desc()).all()
     result = []
     
     for card in cards:
-        # 直接使用 __dict__ 避免重複驗證
-        card_dict = card.__dict__.copy()
-        card_dict.pop('_sa_instance_state', None)
-        
-        # 處理日期時間
-        if card_dict.get('created_at'):
-            card_dict['created_at'] = card_dict['created_at'].isoformat()
-        if card_dict.get('updated_at'):
-            card_dict['updated_at'] = card_dict['updated_at'].isoformat()
-        if card_dict.get('classified_at'):
-            card_dict['classified_at'] = card_dict['classified_at'].isoformat()
-        if card_dict.get('reviewed_at'):
-            card_dict['reviewed_at'] = card_dict['reviewed_at'].isoformat()
-
+        card_dict = card_to_dict(card, fields)
         result.append(card_dict)
     return result
 
+def iterate_cards(db: Session, fields: Optional[List[str]] = None, chunk_size: int = 500) -> Iterator[dict]:
+    """以伺服器端游標分批讀取所有名片（記憶體用量與名片總數無關）"""
+    query = project_card_query(db.query(CardORM), fields).order_by(CardORM.created_at.desc())
+    for card in query.yield_per(chunk_size):
+        yield card_to_dict(card, fields)
+
 def iterate_cards_for_stats(db: Session, chunk_size: int = 500) -> Iterator[Dict[str, Optional[str]]]:
     """以最小欄位集批次迭代名片，用於統計計算"""
     query = (
@@ -112,10 +196,9 @@ def iterate_cards_for_stats(db: Session, chunk_size: int = 500) -> Iterator[Dict
             "industry_category": row.industry_category
         }
 
-def get_cards_paginated(
+def filter_cards_query(
     db: Session,
-    skip: int = 0,
-    limit: int = 100,
+    query,
     search: Optional[str] = None,
     industry: Optional[str] = None,
     filter_status: Optional[str] = None,
@@ -129,35 +212,25 @@ def get_cards_paginated(
     has_phone: Optional[bool] = None,
     has_email: Optional[bool] = None,
     has_address: Optional[bool] = None,
-) -> Tuple[List[dict], int]:
-    """分頁獲取名片，支持搜索和過濾"""
-    query = db.query(CardORM)
+    updated_since: Optional[datetime.datetime] = None,
+    ranked: bool = False,
+):
+    """
+    套用列表篩選條件（get_cards_paginated / get_cards_page_by_cursor / get_industry_breakdown 共用）
+
+    updated_since 為增量匯出條件（updated_at >= updated_since，走 idx_updated_id 索引）
 
+    Returns:
+        (加上條件的查詢, 搜尋相關度排序子句列表)
+    """
     # 产业分类过滤
     if industry and industry != '全部':
         query = query.filter(CardORM.industry_category == industry)
 
-    # 搜索過濾 - 支援姓名、公司、職稱的中英文搜索
+    # 搜索過濾 - 支援姓名、公司、職稱、聯絡資訊與產業標籤（全文索引，依相關度排序）
+    rank_order = []
     if search:
-        search_filter = or_(
-            # 姓名搜索 (中英文)
-            CardORM.name_zh.contains(search),
-            CardORM.name_en.contains(search),
-            # 公司搜索 (中英文)
-            CardORM.company_name_zh.contains(search),
-            CardORM.company_name_en.contains(search),
-            # 職稱搜索 (中英文，支援兩個職稱欄位)
-            CardORM.position_zh.contains(search),
-            CardORM.position_en.contains(search),
-            CardORM.position1_zh.contains(search),
-            CardORM.position1_en.contains(search),
-            # 聯絡資訊搜索
-            CardORM.mobile_phone.contains(search),
-            CardORM.email.contains(search),
-            # 🔍 產業標籤搜尋（primary_label + labels 都在這欄）
-            CardORM.classification_reason.contains(search),
-        )
-        query = query.filter(search_filter)
+        query, rank_order = apply_card_search(db, query, search, ranked=ranked)
 
     # === 高級篩選 ===
     if name_zh:
@@ -190,6 +263,11 @@ def get_cards_paginated(
             query = query.filter(CardORM.created_at < dt_to)
         except ValueError:
             pass
+    if updated_since is not None:
+        # updated_at 以 UTC（無時區）儲存
+        if updated_since.tzinfo is not None:
+            updated_since = updated_since.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        query = query.filter(CardORM.updated_at >= updated_since)
 
     # 聯絡方式篩選
     def is_empty(col):
@@ -226,77 +304,20 @@ def get_cards_paginated(
             is_empty(CardORM.company_address2_zh),
         ))
 
-    # 狀態過濾（normal / problem）
+    # 狀態過濾（normal / problem）：使用寫入時計算的 completeness_status 索引欄位
     if filter_status in ("normal", "problem"):
-        # 定義「欄位是空的」的判斷（NULL 或 空字串）
-        def is_empty(col):
-            return or_(col.is_(None), col == "")
-
-        # 姓名缺失（中 + 英 都空）
-        name_missing = and_(
-            is_empty(CardORM.name_zh),
-            is_empty(CardORM.name_en),
-        )
-
-        # 公司缺失（中 + 英 都空）
-        company_missing = and_(
-            is_empty(CardORM.company_name_zh),
-            is_empty(CardORM.company_name_en),
-        )
-
-        # 職位全空
-        position_missing = and_(
-            is_empty(CardORM.position_zh),
-            is_empty(CardORM.position_en),
-            is_empty(CardORM.position1_zh),
-            is_empty(CardORM.position1_en),
-        )
-
-        # 部門全空
-        department_missing = and_(
-            is_empty(CardORM.department1_zh),
-            is_empty(CardORM.department1_en),
-            is_empty(CardORM.department2_zh),
-            is_empty(CardORM.department2_en),
-            is_empty(CardORM.department3_zh),
-            is_empty(CardORM.department3_en),
-        )
-
-        # 職位 & 部門都沒有 → 視為缺「職位或部門」
-        position_or_dept_missing = and_(position_missing, department_missing)
-
-        # 聯絡方式缺失（手機、電話1/2、Email、Line 全空）
-        contact_missing = and_(
-            is_empty(CardORM.mobile_phone),
-            is_empty(CardORM.company_phone1),
-            is_empty(CardORM.company_phone2),
-            is_empty(CardORM.email),
-            is_empty(CardORM.line_id),
-        )
-
-        # 「有問題」的判斷：有任一類缺失即可
-        problem_condition = or_(
-            name_missing,
-            company_missing,
-            position_or_dept_missing,
-            contact_missing,
-        )
-
-        if filter_status == "problem":
-            query = query.filter(problem_condition)
-        elif filter_status == "normal":
-            query = query.filter(~problem_condition)
+        query = query.filter(CardORM.completeness_status == filter_status)
     elif filter_status == "duplicate":
         query = query.filter(CardORM.duplicate_group_id.isnot(None), CardORM.reviewed_at.is_(None))
 
-    # 獲取總數
-    total = query.count()
-    
-    # 分頁查詢
-    cards_page = query.order_by(CardORM.created_at.desc()).offset(skip).limit(limit).all()
+    return query, rank_order
+
 
+def _cards_to_dicts(db: Session, cards_page: List[CardORM], fields: Optional[List[str]] = None) -> List[dict]:
+    """列表頁名片轉為字典，並批次附上重複數量"""
     # 批次取得重複數量
-    group_ids = list(set(c.duplicate_group_id for c in cards_page if c.duplicate_group_id))
+    with_duplicate_count = fields is None or "duplicate_count" in fields
+    group_ids = list(set(c.duplicate_group_id for c in cards_page if c.duplicate_group_id)) if with_duplicate_count else []
     if group_ids:
         dup_counts = dict(
             db.query(CardORM.duplicate_group_id, func.count(CardORM.id))
@@ -310,27 +331,22 @@ def get_cards_paginated(
     # 轉換為字典
     result = []
     for card_orm in cards_page:
-        card_dict = card_orm.__dict__.copy()
-        card_dict.pop('_sa_instance_state', None)
+        card_dict = card_to_dict(card_orm, fields)
 
-        if card_dict.get('created_at'):
-            card_dict['created_at'] = card_dict['created_at'].isoformat()
-        if card_dict.get('updated_at'):
-            card_dict['updated_at'] = card_dict['updated_at'].isoformat()
-        if card_dict.get('classified_at'):
-            card_dict['classified_at'] = card_dict['classified_at'].isoformat()
-        if card_dict.get('reviewed_at'):
-            card_dict['reviewed_at'] = card_dict['reviewed_at'].isoformat()
-
-        card_dict['duplicate_count'] = dup_counts.get(card_orm.duplicate_group_id, 0)
+        if with_duplicate_count:
+            card_dict['duplicate_count'] = dup_counts.get(card_orm.duplicate_group_id, 0)
 
         result.append(card_dict)
 
-    return result, total
+    return result
 
-def get_industry_breakdown(
+
+def get_cards_paginated(
     db: Session,
+    skip: int = 0,
+    limit: int = 100,
     search: Optional[str] = None,
+    industry: Optional[str] = None,
     filter_status: Optional[str] = None,
     # 高級篩選參數
     name_zh: Optional[str] = None,
@@ -342,126 +358,140 @@ def get_industry_breakdown(
     has_phone: Optional[bool] = None,
     has_email: Optional[bool] = None,
     has_address: Optional[bool] = None,
-) -> Dict[str, int]:
-    """
-    在目前條件（search + status + 高級篩選）下，各 industry_category 的數量
-    """
-    query = db.query(
-        CardORM.industry_category,
-        func.count(CardORM.id)
+    fields: Optional[List[str]] = None,
+) -> Tuple[List[dict], int]:
+    """分頁獲取名片，支持搜索和過濾；fields 為欄位投影（見 resolve_card_fields）"""
+    query, rank_order = filter_cards_query(
+        db, db.query(CardORM), search=search, industry=industry, filter_status=filter_status,
+        name_zh=name_zh, name_en=name_en, company=company, position=position,
+        date_from=date_from, date_to=date_to,
+        has_phone=has_phone, has_email=has_email, has_address=has_address,
+        ranked=True,
     )
 
-    # 搜尋條件（跟 get_cards_paginated 一致）
-    if search:
-        search_filter = or_(
-            CardORM.name_zh.contains(search),
-            CardORM.name_en.contains(search),
-            CardORM.company_name_zh.contains(search),
-            CardORM.company_name_en.contains(search),
-            CardORM.position_zh.contains(search),
-            CardORM.position_en.contains(search),
-            CardORM.position1_zh.contains(search),
-            CardORM.position1_en.contains(search),
-            CardORM.mobile_phone.contains(search),
-            CardORM.email.contains(search),
-            CardORM.classification_reason.contains(search),
-        )
-        query = query.filter(search_filter)
+    # 獲取總數
+    total = query.count()
+    
+    # 分頁查詢
+    cards_page = project_card_query(query, fields).order_by(
+        *rank_order, CardORM.created_at.desc()
+    ).offset(skip).limit(limit).all()
 
-    # === 高級篩選（跟 get_cards_paginated 一致）===
-    if name_zh:
-        query = query.filter(CardORM.name_zh.contains(name_zh))
-    if name_en:
-        query = query.filter(CardORM.name_en.contains(name_en))
-    if company:
-        query = query.filter(or_(
-            CardORM.company_name_zh.contains(company),
-            CardORM.company_name_en.contains(company),
-        ))
-    if position:
-        query = query.filter(or_(
-            CardORM.position_zh.contains(position),
-            CardORM.position_en.contains(position),
-            CardORM.position1_zh.contains(position),
-            CardORM.position1_en.contains(position),
-        ))
-    if date_from:
-        try:
-            dt_from = datetime.datetime.strptime(date_from, "%Y-%m-%d")
-            query = query.filter(CardORM.created_at >= dt_from)
-        except ValueError:
-            pass
-    if date_to:
-        try:
-            dt_to = datetime.datetime.strptime(date_to, "%Y-%m-%d") + datetime.timedelta(days=1)
-            query = query.filter(CardORM.created_at < dt_to)
-        except ValueError:
-            pass
+    return _cards_to_dicts(db, cards_page, fields), total
 
-    def is_empty(col):
-        return or_(col.is_(None), col == "")
-    def is_not_empty(col):
-        return and_(col.isnot(None), col != "")
 
-    if has_phone is True:
-        query = query.filter(or_(
-            is_not_empty(CardORM.mobile_phone),
-            is_not_empty(CardORM.company_phone1),
-            is_not_empty(CardORM.company_phone2),
-        ))
-    elif has_phone is False:
-        query = query.filter(and_(
-            is_empty(CardORM.mobile_phone),
-            is_empty(CardORM.company_phone1),
-            is_empty(CardORM.company_phone2),
-        ))
-    if has_email is True:
-        query = query.filter(is_not_empty(CardORM.email))
-    elif has_email is False:
-        query = query.filter(is_empty(CardORM.email))
-    if has_address is True:
-        query = query.filter(or_(
-            is_not_empty(CardORM.company_address1_zh),
-            is_not_empty(CardORM.company_address2_zh),
-        ))
-    elif has_address is False:
-        query = query.filter(and_(
-            is_empty(CardORM.company_address1_zh),
-            is_empty(CardORM.company_address2_zh),
+def encode_card_cursor(card: CardORM) -> str:
+    """以 (created_at, id) 產生不透明游標"""
+    payload = {
+        "c": card.created_at.isoformat(),
+        "i": card.id,
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_card_cursor(cursor: str) -> Tuple[datetime.datetime, int]:
+    """解析游標，格式錯誤（含 created_at 為空的舊游標）時拋出 ValueError"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.datetime.fromisoformat(payload["c"]), int(payload["i"])
+    except (KeyError, TypeError, ValueError, UnicodeError, binascii.Error) as e:
+        raise ValueError(f"無效的分頁游標: {cursor}") from e
+
+
+def backfill_card_created_at(engine: Engine) -> int:
+    """
+    補齊 created_at 為空的舊名片（以 updated_at，沒有時以目前時間），返回補齊筆數
+
+    游標分頁只列出 created_at 非空的名片，啟動時執行一次（可重複執行）。
+    """
+    with engine.begin() as conn:
+        result = conn.execute(text(
+            "UPDATE cards SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP) WHERE created_at IS NULL"
         ))
+    return result.rowcount or 0
 
-    # 狀態條件（跟 get_cards_paginated 一致）
-    if filter_status in ("normal", "problem"):
-        name_missing = and_(is_empty(CardORM.name_zh), is_empty(CardORM.name_en))
-        company_missing = and_(is_empty(CardORM.company_name_zh), is_empty(CardORM.company_name_en))
 
-        position_missing = and_(
-            is_empty(CardORM.position_zh), is_empty(CardORM.position_en),
-            is_empty(CardORM.position1_zh), is_empty(CardORM.position1_en),
-        )
-        department_missing = and_(
-            is_empty(CardORM.department1_zh), is_empty(CardORM.department1_en),
-            is_empty(CardORM.department2_zh), is_empty(CardORM.department2_en),
-            is_empty(CardORM.department3_zh), is_empty(CardORM.department3_en),
-        )
-        position_or_dept_missing = and_(position_missing, department_missing)
+def get_cards_page_by_cursor(
+    db: Session,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    search: Optional[str] = None,
+    industry: Optional[str] = None,
+    filter_status: Optional[str] = None,
+    # 高級篩選參數
+    name_zh: Optional[str] = None,
+    name_en: Optional[str] = None,
+    company: Optional[str] = None,
+    position: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    has_phone: Optional[bool] = None,
+    has_email: Optional[bool] = None,
+    has_address: Optional[bool] = None,
+    fields: Optional[List[str]] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    游標分頁（keyset）：依 (created_at DESC, id DESC) 取下一頁，每頁成本與頁數無關
 
-        contact_missing = and_(
-            is_empty(CardORM.mobile_phone),
-            is_empty(CardORM.company_phone1),
-            is_empty(CardORM.company_phone2),
-            is_empty(CardORM.email),
-            is_empty(CardORM.line_id),
-        )
+    條件為 (created_at, id) < (:c, :i)，與 idx_created_id 的欄位與方向一致，可直接作為索引範圍；
+    created_at 為空的名片不列出（由 backfill_card_created_at 補齊）。
+    搜尋結果在此模式下依時間排序（相關度排序無法作為穩定的游標鍵）。
 
-        problem_condition = or_(name_missing, company_missing, position_or_dept_missing, contact_missing)
+    Returns:
+        (名片列表, 下一頁游標；沒有更多資料時為 None)
+    """
+    query, _ = filter_cards_query(
+        db, db.query(CardORM), search=search, industry=industry, filter_status=filter_status,
+        name_zh=name_zh, name_en=name_en, company=company, position=position,
+        date_from=date_from, date_to=date_to,
+        has_phone=has_phone, has_email=has_email, has_address=has_address,
+    )
 
-        if filter_status == "problem":
-            query = query.filter(problem_condition)
-        else:
-            query = query.filter(~problem_condition)
-    elif filter_status == "duplicate":
-        query = query.filter(CardORM.duplicate_group_id.isnot(None), CardORM.reviewed_at.is_(None))
+    query = query.filter(CardORM.created_at.isnot(None))
+    if cursor:
+        cursor_created_at, cursor_id = decode_card_cursor(cursor)
+        query = query.filter(tuple_(CardORM.created_at, CardORM.id) < tuple_(cursor_created_at, cursor_id))
+
+    # 多取一筆判斷是否還有下一頁
+    rows = project_card_query(query, fields).order_by(
+        CardORM.created_at.desc(), CardORM.id.desc()
+    ).limit(limit + 1).all()
+    cards_page = rows[:limit]
+    next_cursor = encode_card_cursor(cards_page[-1]) if len(rows) > limit else None
+
+    return _cards_to_dicts(db, cards_page, fields), next_cursor
+
+def count_cards_filtered(db: Session, **filters) -> int:
+    """目前篩選條件下的名片總數（參數同 filter_cards_query）"""
+    query, _ = filter_cards_query(db, db.query(func.count(CardORM.id)), **filters)
+    return query.scalar() or 0
+
+def get_industry_breakdown(
+    db: Session,
+    search: Optional[str] = None,
+    filter_status: Optional[str] = None,
+    # 高級篩選參數
+    name_zh: Optional[str] = None,
+    name_en: Optional[str] = None,
+    company: Optional[str] = None,
+    position: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    has_phone: Optional[bool] = None,
+    has_email: Optional[bool] = None,
+    has_address: Optional[bool] = None,
+) -> Dict[str, int]:
+    """
+    在目前條件（search + status + 高級篩選）下，各 industry_category 的數量
+    """
+    query, _ = filter_cards_query(
+        db, db.query(CardORM.industry_category, func.count(CardORM.id)),
+        search=search, filter_status=filter_status,
+        name_zh=name_zh, name_en=name_en, company=company, position=position,
+        date_from=date_from, date_to=date_to,
+        has_phone=has_phone, has_email=has_email, has_address=has_address,
+    )
 
     query = query.group_by(CardORM.industry_category)
     rows = query.all()
@@ -478,21 +508,23 @@ def get_card(db: Session, card_id: int) -> dict:
     if not card:
         return None
 
-    card_dict = Card.model_validate(card).model_dump()
-    if card_dict.get('created_at'):
-        card_dict['created_at'] = card_dict['created_at'].isoformat()
-    if card_dict.get('updated_at'):
-        card_dict['updated_at'] = card_dict['updated_at'].isoformat()
-    if card_dict.get('classified_at'):
-        card_dict['classified_at'] = card_dict['classified_at'].isoformat()
-    if card_dict.get('reviewed_at'):
-        card_dict['reviewed_at'] = card_dict['reviewed_at'].isoformat()
+    return card_to_dict(card)
 
-    return card_dict
+def create_card(db: Session, card: Card,
+                add_related: Optional[Callable[[CardORM], None]] = None) -> dict:
+    """
+    新增名片
 
-def create_card(db: Session, card: Card) -> dict:
+    Args:
+        add_related: 取得名片 ID 後、commit 前呼叫，讓關聯資料（例如批量導入檢查點）與名片在同一交易中寫入
+    """
     db_card = CardORM(**card.model_dump(exclude_unset=True))
+    apply_completeness(db_card)
     db.add(db_card)
+    apply_card_stats_delta(db, added_keys=card_stats_keys(db_card))
+    if add_related:
+        db.flush()
+        add_related(db_card)
     db.commit()
     db.refresh(db_card)
 
@@ -501,13 +533,7 @@ def create_card(db: Session, card: Card) -> dict:
     db.commit()
     db.refresh(db_card)
 
-    # 轉換為字典格式，處理datetime序列化
-    card_dict = Card.model_validate(db_card).model_dump()
-    for key in card_dict:
-        if hasattr(card_dict[key], 'isoformat'):
-            card_dict[key] = card_dict[key].isoformat()
-
-    return card_dict
+    return card_to_dict(db_card)
 
 def update_card(db: Session, card_id: int, card: Card) -> dict:
     db_card = db.query(CardORM).filter(CardORM.id == card_id).first()
@@ -517,6 +543,7 @@ def update_card(db: Session, card_id: int, card: Card) -> dict:
     # 記住舊的 name/company 以便更新重複組
     old_name_zh = db_card.name_zh
     old_company_name_zh = db_card.company_name_zh
+    old_stats_keys = card_stats_keys(db_card)
 
     # 獲取要更新的數據，允許空字符串，只排除 None 值和 id 字段
     update_data = card.model_dump(exclude={'id'})
@@ -525,8 +552,10 @@ def update_card(db: Session, card_id: int, card: Card) -> dict:
         # 允許空字符串，但跳過 None 值和時間戳字段
         if hasattr(db_card, k) and v is not None and k not in ['created_at']:
             setattr(db_card, k, v)
+    apply_completeness(db_card)
 
     try:
+        apply_card_stats_delta(db, old_stats_keys, card_stats_keys(db_card))
         db.commit()
         db.refresh(db_card)
 
@@ -537,13 +566,7 @@ def update_card(db: Session, card_id: int, card: Card) -> dict:
         db.commit()
         db.refresh(db_card)
 
-        # 轉換為字典格式，處理datetime序列化
-        card_dict = Card.model_validate(db_card).model_dump()
-        for key in card_dict:
-            if hasattr(card_dict[key], 'isoformat'):
-                card_dict[key] = card_dict[key].isoformat()
-
-        return card_dict
+        return card_to_dict(db_card)
     except Exception as e:
         db.rollback()
         print(f"更新名片錯誤: {e}")
@@ -558,6 +581,11 @@ def delete_card(db: Session, card_id: int) -> bool:
     company_name_zh = db_card.company_name_zh
 
     try:
+        apply_card_stats_delta(db, removed_keys=card_stats_keys(db_card))
+        # 同時移除批量導入檢查點，之後重新導入同一張圖片不會被當成已導入而跳過
+        db.query(BatchImportCheckpointORM).filter(
+            BatchImportCheckpointORM.card_id == card_id
+        ).delete(synchronize_session=False)
         db.delete(db_card)
         db.commit()
 
@@ -590,8 +618,9 @@ def bulk_create_cards(db: Session, cards: List[Card]) -> Tuple[List[dict], List[
         
         if db_cards:
             # 使用 bulk_insert_mappings 更高效
-            mappings = [card.model_dump(exclude_unset=True) for card in cards[:len(db_cards)]]
+            mappings = [apply_completeness(card.model_dump(exclude_unset=True)) for card in cards[:len(db_cards)]]
             db.bulk_insert_mappings(CardORM, mappings)
+            apply_card_stats_delta(db, added_keys=[key for m in mappings for key in card_stats_keys(m)])
             db.commit()
             
             # 返回插入的數據（不需要刷新，提高性能）
@@ -613,25 +642,7 @@ def get_cards_count(db: Session, search: Optional[str] = None) -> int:
     query = db.query(func.count(CardORM.id))
     
     if search:
-        search_filter = or_(
-            # 姓名搜索 (中英文)
-            CardORM.name_zh.contains(search),
-            CardORM.name_en.contains(search),
-            # 公司搜索 (中英文)
-            CardORM.company_name_zh.contains(search),
-            CardORM.company_name_en.contains(search),
-            # 職稱搜索 (中英文，支援兩個職稱欄位)
-            CardORM.position_zh.contains(search),
-            CardORM.position_en.contains(search),
-            CardORM.position1_zh.contains(search),
-            CardORM.position1_en.contains(search),
-            # 聯絡資訊搜索
-            CardORM.mobile_phone.contains(search),
-            CardORM.email.contains(search),
-            # 產業標籤搜尋
-            CardORM.classification_reason.contains(search),
-        )
-        query = query.filter(search_filter)
+        query, _ = apply_card_search(db, query, search)
     
     return query.scalar()
 
@@ -660,14 +671,7 @@ def get_duplicate_groups(db: Session, skip: int = 0, limit: int = 1) -> Tuple[Li
         ).order_by(CardORM.created_at.asc()).all()
 
         if cards:
-            card_dicts = []
-            for card in cards:
-                card_dict = Card.model_validate(card).model_dump()
-                card_dict['id'] = card.id
-                for key in card_dict:
-                    if hasattr(card_dict[key], 'isoformat'):
-                        card_dict[key] = card_dict[key].isoformat()
-                card_dicts.append(card_dict)
+            card_dicts = [card_to_dict(card) for card in cards]
 
             groups.append({
                 "group_id": group_id,
@@ -709,14 +713,7 @@ def get_duplicate_group_by_id(db: Session, group_id: str) -> Tuple[dict, int, in
     if not cards:
         return None, total_groups, 0
 
-    card_dicts = []
-    for card in cards:
-        card_dict = Card.model_validate(card).model_dump()
-        card_dict['id'] = card.id
-        for key in card_dict:
-            if hasattr(card_dict[key], 'isoformat'):
-                card_dict[key] = card_dict[key].isoformat()
-        card_dicts.append(card_dict)
+    card_dicts = [card_to_dict(card) for card in cards]
 
     group = {
         "group_id": group_id,
@@ -0,0 +1,210 @@
+"""
+名片統計摘要服務
+
+card_stats 表保存 total / status:normal / status:problem / industry:<產業> 計數，
+由 create_card、update_card、delete_card、bulk_create_cards 與 AI 分類在同一交易內增量更新，
+/cards/stats 只需讀取少量列。增量一律套用（不論摘要是否已建立）；
+全表重建在鎖定下進行（PostgreSQL: LOCK TABLE ... IN EXCLUSIVE MODE；SQLite: BEGIN IMMEDIATE），
+重建期間寫入的名片會等重建 commit 後才套用增量，不會被漏算或被覆蓋。計數漂移時可執行重建：
+
+python -m backend.services.card_stats_service
+"""
+
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from backend.models.card import CardStatsORM
+
+TOTAL_KEY = "total"
+STATUS_PREFIX = "status:"
+INDUSTRY_PREFIX = "industry:"
+# 全表重建完成的標記列；沒有此列時摘要只含部分增量，讀取時先重建
+REBUILT_KEY = "meta:rebuilt"
+
+
+def _field(card: Any, name: str) -> str:
+    """同時支援 dict 與 ORM 物件取值"""
+    value = card.get(name) if isinstance(card, dict) else getattr(card, name, None)
+    return (value or '').strip() if isinstance(value, str) else (str(value) if value else '')
+
+
+# missing_fields 位元遮罩，依序對應 MISSING_FIELD_LABELS
+MISSING_NAME = 1
+MISSING_COMPANY = 2
+MISSING_POSITION_OR_DEPARTMENT = 4
+MISSING_CONTACT = 8
+MISSING_FIELD_LABELS = [
+    (MISSING_NAME, '姓名'),
+    (MISSING_COMPANY, '公司'),
+    (MISSING_POSITION_OR_DEPARTMENT, '職位或部門'),
+    (MISSING_CONTACT, '聯絡方式'),
+]
+
+
+def compute_missing_fields(card: Any) -> int:
+    """計算名片缺失欄位的位元遮罩（0 表示資料完整）"""
+    mask = 0
+
+    # 檢查姓名 (中文OR英文)
+    if not (_field(card, 'name_zh') or _field(card, 'name_en')):
+        mask |= MISSING_NAME
+
+    # 檢查公司 (中文OR英文)
+    if not (_field(card, 'company_name_zh') or _field(card, 'company_name_en')):
+        mask |= MISSING_COMPANY
+
+    # 檢查職位或部門 (職位或部門有其中一個即可)
+    has_position = any(_field(card, f) for f in ('position_zh', 'position_en', 'position1_zh', 'position1_en'))
+    has_department = any(_field(card, f) for f in (
+        'department1_zh', 'department1_en', 'department2_zh',
+        'department2_en', 'department3_zh', 'department3_en'
+    ))
+    if not (has_position or has_department):
+        mask |= MISSING_POSITION_OR_DEPARTMENT
+
+    # 檢查聯絡方式 (手機 OR 公司電話 OR Email OR Line ID，至少要有一個)
+    if not any(_field(card, f) for f in ('mobile_phone', 'company_phone1', 'company_phone2', 'email', 'line_id')):
+        mask |= MISSING_CONTACT
+
+    return mask
+
+
+def completeness_status(missing_mask: int) -> str:
+    return 'normal' if missing_mask == 0 else 'problem'
+
+
+def apply_completeness(card: Any) -> Any:
+    """寫入 completeness_status 與 missing_fields（ORM 物件或 dict 皆可）"""
+    mask = compute_missing_fields(card)
+    if isinstance(card, dict):
+        card['missing_fields'] = mask
+        card['completeness_status'] = completeness_status(mask)
+    else:
+        card.missing_fields = mask
+        card.completeness_status = completeness_status(mask)
+    return card
+
+
+def check_card_status(card: Any) -> Dict[str, Any]:
+    """後端統計用的狀態檢查邏輯，與前端 checkCardStatus 保持一致"""
+    mask = compute_missing_fields(card)
+    missing_fields = [label for bit, label in MISSING_FIELD_LABELS if mask & bit]
+
+    return {
+        'status': completeness_status(mask),
+        'missing_fields': missing_fields,
+        'missing_count': len(missing_fields)
+    }
+
+
+def card_stats_keys(card: Any) -> List[str]:
+    """名片對統計摘要的貢獻鍵"""
+    keys = [TOTAL_KEY, STATUS_PREFIX + check_card_status(card)['status']]
+    industry = _field(card, 'industry_category')
+    if industry:
+        keys.append(INDUSTRY_PREFIX + industry)
+    return keys
+
+
+def _increment(db: Session, stat_key: str, delta: int) -> None:
+    updated = db.query(CardStatsORM).filter(CardStatsORM.stat_key == stat_key).update(
+        {CardStatsORM.count: CardStatsORM.count + delta}, synchronize_session=False
+    )
+    if updated:
+        return
+    try:
+        with db.begin_nested():
+            db.add(CardStatsORM(stat_key=stat_key, count=delta))
+    except IntegrityError:
+        # 其他 worker 先建立了同一列，改為遞增
+        db.query(CardStatsORM).filter(CardStatsORM.stat_key == stat_key).update(
+            {CardStatsORM.count: CardStatsORM.count + delta}, synchronize_session=False
+        )
+
+
+def apply_card_stats_delta(db: Session, removed_keys: Optional[Iterable[str]] = None,
+                           added_keys: Optional[Iterable[str]] = None) -> None:
+    """
+    在目前交易內套用統計增量（由呼叫端 commit）
+
+    Args:
+        removed_keys: 變更前名片的統計鍵（新增時為 None）
+        added_keys: 變更後名片的統計鍵（刪除時為 None）
+    """
+    delta = Counter(added_keys or [])
+    delta.subtract(Counter(removed_keys or []))
+    # 依鍵排序更新，並行交易以相同順序鎖定各列，避免死結
+    for stat_key, change in sorted(delta.items()):
+        if change:
+            _increment(db, stat_key, change)
+
+
+def _lock_for_rebuild(db: Session) -> None:
+    """
+    取得重建用的寫入鎖（直到 commit）
+
+    寫入名片的交易在套用增量時會更新 card_stats，因此：
+    - 已套用增量但未 commit 的交易先完成，其名片會被接下來的全表掃描計入
+    - 尚未套用增量的交易會等到重建 commit 後再遞增，不會被刪除重建覆蓋
+    """
+    connection = db.connection()
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        connection.exec_driver_sql(f"LOCK TABLE {CardStatsORM.__tablename__} IN EXCLUSIVE MODE")
+    elif dialect == "sqlite":
+        # 已有寫入交易時本來就持有資料庫寫入鎖
+        if not connection.connection.dbapi_connection.in_transaction:
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def rebuild_card_stats(db: Session) -> Dict[str, Any]:
+    """全表重新計算統計摘要（修正漂移或初始化）；掃描與寫入在同一個鎖定的交易中完成"""
+    from backend.services.card_service import iterate_cards_for_stats
+
+    _lock_for_rebuild(db)
+    counts = Counter({TOTAL_KEY: 0, STATUS_PREFIX + 'normal': 0, STATUS_PREFIX + 'problem': 0})
+    for card in iterate_cards_for_stats(db):
+        counts.update(card_stats_keys(card))
+
+    db.query(CardStatsORM).delete(synchronize_session=False)
+    db.add_all([CardStatsORM(stat_key=k, count=v) for k, v in counts.items()])
+    db.add(CardStatsORM(stat_key=REBUILT_KEY, count=1))
+    db.commit()
+    return _to_stats(counts)
+
+
+def _to_stats(counts: Dict[str, int]) -> Dict[str, Any]:
+    industry_stats = {
+        key[len(INDUSTRY_PREFIX):]: count
+        for key, count in counts.items()
+        if key.startswith(INDUSTRY_PREFIX) and count > 0
+    }
+    return {
+        'total': counts.get(TOTAL_KEY, 0),
+        'normal': counts.get(STATUS_PREFIX + 'normal', 0),
+        'problem': counts.get(STATUS_PREFIX + 'problem', 0),
+        'industry_stats': industry_stats
+    }
+
+
+def get_card_stats(db: Session) -> Dict[str, Any]:
+    """讀取統計摘要；尚未建立時先全表重建一次"""
+    rows = db.query(CardStatsORM.stat_key, CardStatsORM.count).all()
+    counts = {row.stat_key: row.count for row in rows}
+    if REBUILT_KEY not in counts:
+        return rebuild_card_stats(db)
+    return _to_stats(counts)
+
+
+if __name__ == "__main__":
+    from backend.models.db import Base, SessionLocal, engine
+
+    Base.metadata.create_all(bind=engine, tables=[CardStatsORM.__table__])
+    session = SessionLocal()
+    try:
+        print(f"名片統計已重建: {rebuild_card_stats(session)}")
+    finally:
+        session.close()
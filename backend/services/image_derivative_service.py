@@ -0,0 +1,200 @@
+"""
+名片圖片衍生圖（縮圖 / WebP）服務
+
+列表與比對頁只需要幾十 KB 的縮圖，不必下載數 MB 的原圖：
+- 依請求寬度（對齊到 IMAGE_DERIVATIVE_WIDTHS，限制快取種類）與格式（webp / jpeg）即時產生
+- JPEG 以 IMREAD_REDUCED_* 縮小解碼，不必解出完整像素
+- 產生的檔案存入磁碟快取（以來源檔 mtime / 大小 + 參數為鍵），總大小超過上限時淘汰最久未用的檔案
+- 回應帶 ETag 與 Cache-Control，瀏覽器以 If-None-Match 重新驗證
+
+產生衍生圖在圖片處理進程池中執行，結果直接由工作進程寫入快取。
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from typing import Dict, Optional, Tuple
+
+from backend.core.config import (
+    IMAGE_DERIVATIVE_CACHE_MB, IMAGE_DERIVATIVE_DIR, IMAGE_DERIVATIVE_QUALITY, IMAGE_DERIVATIVE_WIDTHS
+)
+from backend.services.image_executor import image_executor
+
+logger = logging.getLogger(__name__)
+
+# 格式：副檔名、Content-Type
+DERIVATIVE_FORMATS: Dict[str, Tuple[str, str]] = {
+    "webp": (".webp", "image/webp"),
+    "jpeg": (".jpg", "image/jpeg"),
+}
+
+
+def snap_width(width: int) -> int:
+    """對齊到允許的寬度（不小於請求寬度的最小值，超過上限時取上限）"""
+    widths = sorted(IMAGE_DERIVATIVE_WIDTHS)
+    for allowed in widths:
+        if allowed >= width:
+            return allowed
+    return widths[-1]
+
+
+def derivative_key(source_path: str, width: int, fmt: str, quality: int = IMAGE_DERIVATIVE_QUALITY) -> str:
+    """衍生圖快取鍵（同時作為 ETag）；來源檔被覆寫時 mtime / 大小改變，鍵隨之改變"""
+    stat = os.stat(source_path)
+    payload = f"{os.path.realpath(source_path)}|{stat.st_mtime_ns}|{stat.st_size}|{width}|{fmt}|{quality}"
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def render_derivative(source_path: str, output_path: str, width: int, fmt: str,
+                      quality: int = IMAGE_DERIVATIVE_QUALITY) -> int:
+    """
+    產生衍生圖並寫入 output_path（在圖片處理進程中執行），返回檔案大小
+
+    不放大：來源比目標窄時只轉換格式。
+    """
+    import cv2
+    from PIL import Image
+
+    # 以標頭尺寸挑選縮小解碼倍率（取短邊判斷，EXIF 旋轉後寬高互換也不會解得太小）
+    with Image.open(source_path) as probe:
+        shortest = min(probe.size)
+    read_flag = cv2.IMREAD_COLOR
+    for factor, flag in ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4),
+                         (2, cv2.IMREAD_REDUCED_COLOR_2)):
+        if shortest / factor >= width:
+            read_flag = flag
+            break
+
+    image = cv2.imread(source_path, read_flag)
+    if image is None:
+        raise ValueError(f"無法讀取圖片: {source_path}")
+
+    h, w = image.shape[:2]
+    if w > width:
+        image = cv2.resize(image, (width, max(1, round(h * width / w))), interpolation=cv2.INTER_AREA)
+
+    params = [cv2.IMWRITE_WEBP_QUALITY, quality] if fmt == "webp" else [cv2.IMWRITE_JPEG_QUALITY, quality]
+    ok, buffer = cv2.imencode(DERIVATIVE_FORMATS[fmt][0], image, params)
+    if not ok:
+        raise ValueError(f"衍生圖編碼失敗: {fmt}")
+
+    # 先寫暫存檔再改名，並行請求同一張衍生圖時不會讀到半個檔案
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    fd, part_path = tempfile.mkstemp(dir=os.path.dirname(output_path), suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(buffer.tobytes())
+        os.replace(part_path, output_path)
+    except Exception:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+    return len(buffer)
+
+
+class DerivativeCache:
+    """
+    有容量上限的衍生圖磁碟快取（依鍵前兩碼分目錄）
+
+    Args:
+        cache_dir: 快取目錄
+        max_bytes: 總大小上限，超過時淘汰最久未用（mtime 最舊）的檔案到上限的 90%
+    """
+
+    def __init__(self, cache_dir: str = IMAGE_DERIVATIVE_DIR,
+                 max_bytes: int = IMAGE_DERIVATIVE_CACHE_MB * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+
+    def path_for(self, key: str, fmt: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}{DERIVATIVE_FORMATS[fmt][0]}")
+
+    def get(self, key: str, fmt: str) -> Optional[str]:
+        """命中時更新 mtime（作為最近使用時間），返回路徑"""
+        path = self.path_for(key, fmt)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def _entries(self):
+        if not os.path.isdir(self.cache_dir):
+            return
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.is_file() and not entry.name.endswith(".part"):
+                    yield entry
+
+    def size(self) -> int:
+        with self._lock:
+            if self._size is None:
+                self._size = sum(entry.stat().st_size for entry in self._entries())
+            return self._size
+
+    def added(self, nbytes: int) -> None:
+        """登錄新寫入的檔案大小，超過上限時淘汰"""
+        total = self.size()
+        with self._lock:
+            self._size = total + nbytes
+            over = self._size > self.max_bytes
+        if over:
+            self.evict()
+
+    def evict(self) -> int:
+        """淘汰最久未用的檔案直到總大小低於上限的 90%，返回刪除數量"""
+        with self._lock:
+            entries = []
+            for entry in self._entries():
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            target = self.max_bytes * 0.9
+            removed = 0
+            for _, size, path in sorted(entries):
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+            self._size = total
+        if removed:
+            logger.info(f"衍生圖快取淘汰 {removed} 個檔案，目前 {total / 1024 / 1024:.1f} MB")
+        return removed
+
+
+derivative_cache = DerivativeCache()
+
+
+async def get_derivative(source_path: str, width: int, fmt: str) -> Tuple[str, str]:
+    """
+    取得（必要時產生）衍生圖
+
+    Args:
+        source_path: 原圖路徑
+        width: 目標寬度（呼叫端已 snap_width）
+        fmt: webp / jpeg
+
+    Returns:
+        (衍生圖路徑, 快取鍵)
+    """
+    key = derivative_key(source_path, width, fmt)
+    path = derivative_cache.get(key, fmt)
+    if path is None:
+        path = derivative_cache.path_for(key, fmt)
+        size = await image_executor.run(render_derivative, source_path, path, width, fmt)
+        await asyncio.to_thread(derivative_cache.added, size)
+    return path, key
@@ -0,0 +1,264 @@
+"""
+圖片處理進程池
+
+裁切、增強、偵測等 OpenCV 運算（fastNlMeansDenoisingColored、3 倍 LANCZOS 放大）一次可吃掉數秒 CPU，
+直接在 async 路由中執行會卡住整個事件迴圈。這裡以專用的進程池執行：
+- 進程數預設等於 CPU 核心數，工作進程啟動時即載入 cv2 與增強服務（warm worker）
+- 等待中的工作數有上限（背壓），超過時立即拒絕，由路由回應 503
+- 每個工作有逾時，逾時由呼叫端收到 ImageJobTimeoutError
+- 進程異常結束（BrokenProcessPool）時自動重建進程池
+
+工作函式必須是模組層級函式（可被 pickle）；參數只傳上傳的壓縮位元組、路徑與座標，
+解碼後的陣列只在工作進程內流動（見 image_pipeline）。
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from backend.core.config import (
+    IMAGE_PROCESS_QUEUE_SIZE, IMAGE_PROCESS_START_METHOD, IMAGE_PROCESS_TIMEOUT, IMAGE_PROCESS_WORKERS
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ImageQueueFullError(RuntimeError):
+    """圖片處理佇列已滿"""
+
+
+class ImageJobTimeoutError(TimeoutError):
+    """圖片處理工作逾時"""
+
+
+# ---- 工作進程端 ----
+
+_worker_enhancer = None
+
+
+def _init_worker() -> None:
+    """工作進程初始化：預先載入 cv2 並建立增強服務，避免第一個工作付出匯入成本"""
+    global _worker_enhancer
+    import cv2
+    # 並行度由進程數提供，避免每個進程再開滿 OpenCV 執行緒互相搶核心
+    cv2.setNumThreads(1)
+    from backend.services.card_enhancement_service import CardEnhancementService
+    import backend.services.image_pipeline  # noqa: F401
+    import backend.services.image_store  # noqa: F401
+    _worker_enhancer = CardEnhancementService()
+
+
+def _get_enhancer():
+    global _worker_enhancer
+    if _worker_enhancer is None:
+        from backend.services.card_enhancement_service import CardEnhancementService
+        _worker_enhancer = CardEnhancementService()
+    return _worker_enhancer
+
+
+def _ping() -> bool:
+    return True
+
+
+def crop_card_image(source, store: bool = False, scale_factor: int = 0,
+                    auto_detect: bool = True, corners: Optional[List[List[float]]] = None,
+                    tight_crop: bool = False) -> Dict[str, Any]:
+    """
+    透視矯正裁切 / 增強（一次解碼的記憶體管線）
+
+    Args:
+        source: 上傳的圖片位元組或已保存的原圖路徑
+        store: 是否將成品寫入圖片庫（image_store），output_path 為其物件路徑
+
+    Returns:
+        {"success", "output_path", "corners", "detected", "detection_method", "message"}
+    """
+    from backend.services.image_pipeline import CardImagePipeline
+    from backend.services.image_store import image_store
+
+    enhancer = _get_enhancer()
+    if not enhancer.enabled:
+        return {
+            "success": False, "output_path": None, "corners": None, "detected": False,
+            "message": "card enhancement disabled",
+        }
+
+    pipeline = CardImagePipeline.load(source, enhancer)
+    data = pipeline.detect(auto_detect, corners, tight_crop).warp().enhance(scale_factor).encode()
+    output_path = image_store.put_bytes(data, ".jpg") if store else None
+    return {"success": True, "output_path": output_path, "message": "ok", **pipeline.metadata}
+
+
+def rect_crop_image(source, corners: Optional[List[List[float]]] = None) -> Tuple[str, List[List[int]]]:
+    """
+    簡單矩形裁切：不做透視矯正，只按 corners 的 bounding box 裁切，成品寫入圖片庫
+
+    Args:
+        source: 上傳的圖片位元組或已保存的原圖路徑
+
+    Returns:
+        (物件路徑, 實際裁切範圍的四角座標)
+    """
+    from backend.services.image_pipeline import CardImagePipeline
+    from backend.services.image_store import image_store
+
+    pipeline = CardImagePipeline.load(source, _get_enhancer()).rect_crop(corners)
+    path = image_store.put_bytes(pipeline.encode(), ".jpg")
+    return path, pipeline.corners.astype(int).tolist()
+
+
+# ---- 呼叫端 ----
+
+class ImageProcessExecutor:
+    """
+    圖片處理執行器
+
+    Args:
+        workers: 工作進程數；0 表示不使用進程池，改在執行緒中處理（開發或不支援多進程的環境）
+        queue_size: 執行中以外可等待的工作數上限
+        timeout: 預設逾時秒數
+        start_method: 進程啟動方式（spawn / forkserver / fork）
+    """
+
+    def __init__(self, workers: int = IMAGE_PROCESS_WORKERS, queue_size: int = IMAGE_PROCESS_QUEUE_SIZE,
+                 timeout: float = IMAGE_PROCESS_TIMEOUT, start_method: str = IMAGE_PROCESS_START_METHOD):
+        self.workers = max(0, workers)
+        self.queue_size = max(0, queue_size)
+        self.timeout = timeout
+        self.start_method = start_method
+        self._pool: Optional[Executor] = None
+        self._pool_lock = threading.Lock()
+        self._slots = threading.Condition()
+        self._pending = 0
+        self._stats = {"submitted": 0, "rejected": 0, "timeouts": 0, "failed": 0, "restarts": 0}
+
+    @property
+    def capacity(self) -> int:
+        return max(1, self.workers) + self.queue_size
+
+    def _get_pool(self) -> Executor:
+        with self._pool_lock:
+            if self._pool is None:
+                if self.workers == 0:
+                    self._pool = ThreadPoolExecutor(thread_name_prefix="image-worker")
+                else:
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context(self.start_method),
+                        initializer=_init_worker,
+                    )
+                    logger.info(f"圖片處理進程池啟動: workers={self.workers}, queue={self.queue_size}")
+            return self._pool
+
+    def _reset_pool(self, broken: Executor) -> None:
+        """進程池損壞時丟棄，下一次提交時重建"""
+        with self._pool_lock:
+            if self._pool is not broken:
+                return
+            self._pool = None
+            self._stats["restarts"] += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+        logger.warning("圖片處理進程池已損壞，將重新建立")
+
+    def _acquire(self, block: bool, timeout: Optional[float]) -> None:
+        with self._slots:
+            if block:
+                acquired = self._slots.wait_for(lambda: self._pending < self.capacity, timeout)
+            else:
+                acquired = self._pending < self.capacity
+            if not acquired:
+                self._stats["rejected"] += 1
+                raise ImageQueueFullError("圖片處理忙碌中，請稍後再試")
+            self._pending += 1
+            self._stats["submitted"] += 1
+
+    def _release(self, future: Future) -> None:
+        with self._slots:
+            self._pending -= 1
+            if not future.cancelled() and future.exception() is not None:
+                self._stats["failed"] += 1
+            self._slots.notify()
+
+    def submit(self, fn: Callable, *args, block: bool = False,
+               wait_timeout: Optional[float] = None, **kwargs) -> Future:
+        """
+        提交工作（佔用一個佇列名額，工作結束後釋放；逾時的工作仍佔名額直到實際結束）
+
+        Args:
+            block: 佇列已滿時是否等待名額（最多 wait_timeout 秒）；False 時立即拋出 ImageQueueFullError
+        """
+        self._acquire(block, wait_timeout)
+        pool = self._get_pool()
+        try:
+            try:
+                future = pool.submit(fn, *args, **kwargs)
+            except BrokenProcessPool:
+                self._reset_pool(pool)
+                pool = self._get_pool()
+                future = pool.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._release_unsubmitted()
+            raise
+        future.add_done_callback(self._release)
+        future.add_done_callback(lambda f: self._check_broken(pool, f))
+        return future
+
+    def _release_unsubmitted(self) -> None:
+        with self._slots:
+            self._pending -= 1
+            self._slots.notify()
+
+    def _check_broken(self, pool: Executor, future: Future) -> None:
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            self._reset_pool(pool)
+
+    async def run(self, fn: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """在事件迴圈中等待工作結果（佇列已滿立即拒絕；逾時秒數包含排隊時間）"""
+        future = self.submit(fn, *args, **kwargs)
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            # 逾時時取消：尚在排隊的工作直接移出佇列，已在執行的工作跑完後才釋放名額
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            self._stats["timeouts"] += 1
+            raise ImageJobTimeoutError(f"圖片處理逾時（{timeout} 秒）")
+
+    def run_sync(self, fn: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """在一般執行緒中等待工作結果（佇列已滿時等待名額，最多同樣的逾時秒數）"""
+        timeout = self.timeout if timeout is None else timeout
+        future = self.submit(fn, *args, block=True, wait_timeout=timeout, **kwargs)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            self._stats["timeouts"] += 1
+            raise ImageJobTimeoutError(f"圖片處理逾時（{timeout} 秒）")
+
+    def warm_up(self) -> None:
+        """預先啟動所有工作進程（ProcessPoolExecutor 預設按需啟動）"""
+        pool = self._get_pool()
+        for future in [pool.submit(_ping) for _ in range(max(1, self.workers))]:
+            future.result()
+
+    def shutdown(self) -> None:
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._slots:
+            return {
+                "workers": self.workers,
+                "capacity": self.capacity,
+                "pending": self._pending,
+                **self._stats,
+            }
+
+
+image_executor = ImageProcessExecutor()
@@ -0,0 +1,166 @@
+"""
+名片圖片引用追蹤與清理
+
+圖片庫（image_store）中的檔案可能被多張名片共用，引用關係以名片表的四個圖片路徑欄位為準：
+- 刪除名片時只刪除已無任何名片引用、且超過保留期的檔案（release_images）
+- 定期清理（collect_garbage）：掃描 UPLOAD_DIR，刪除未被引用且超過保留期的檔案，
+  包括使用者未保存的裁切預覽、被重新裁切取代的舊裁切圖、刪除全部名片後留下的圖片，
+  以及改用圖片庫之前留下的舊檔（front_*、preview_cropped_* 等）
+
+保留期以檔案 mtime 計算；圖片庫寫入或重複寫入同一內容時都會更新 mtime，
+上傳中尚未寫入資料庫的圖片因此不會被清掉。
+"""
+
+import asyncio
+import logging
+import os
+import re
+import time
+from typing import Any, Dict, Iterable, Optional, Set
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from backend.core.config import IMAGE_GC_GRACE_HOURS, IMAGE_GC_INTERVAL_HOURS, UPLOAD_DIR
+from backend.models.card import CardORM
+
+logger = logging.getLogger(__name__)
+
+IMAGE_PATH_COLUMNS = (
+    CardORM.front_image_path, CardORM.back_image_path,
+    CardORM.front_cropped_image_path, CardORM.back_cropped_image_path,
+)
+SHARD_NAME_RE = re.compile(r"[0-9a-f]{2}")
+
+
+def _normalize(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path.replace("\\", "/")))
+
+
+def referenced_paths(db: Session) -> Set[str]:
+    """所有名片引用中的圖片路徑（已正規化）"""
+    referenced = set()
+    for row in db.query(*IMAGE_PATH_COLUMNS).yield_per(5000):
+        referenced.update(_normalize(path) for path in row if path)
+    return referenced
+
+
+def is_referenced(db: Session, path: str) -> bool:
+    """是否仍有名片引用 path（與 referenced_paths 相同的正規化比對）"""
+    target = _normalize(path)
+    # 先以檔名在資料庫篩出候選，再於 Python 端比對正規化後的完整路徑
+    name = os.path.basename(path.replace("\\", "/"))
+    rows = db.query(*IMAGE_PATH_COLUMNS).filter(
+        or_(*(column.endswith(name, autoescape=True) for column in IMAGE_PATH_COLUMNS))
+    )
+    return any(_normalize(p) == target for row in rows for p in row if p)
+
+
+def release_images(db: Session, paths: Iterable[Optional[str]],
+                   grace_hours: float = IMAGE_GC_GRACE_HOURS) -> int:
+    """
+    名片刪除（已 commit）後釋放其圖片：只刪除已無其他名片引用、且超過保留期的檔案
+
+    保留期內的檔案可能正被尚未保存的上傳或裁切預覽使用，留給 collect_garbage 處理。
+
+    Returns:
+        刪除的檔案數
+    """
+    removed = 0
+    cutoff = time.time() - grace_hours * 3600
+    for path in set(p for p in paths if p):
+        if is_referenced(db, path):
+            continue
+        try:
+            if os.path.getmtime(path) >= cutoff:
+                continue
+        except OSError:
+            continue
+        try:
+            os.remove(path)
+            removed += 1
+            logger.info(f"已刪除圖片: {path}")
+        except OSError as e:
+            logger.warning(f"刪除圖片失敗 {path}: {e}")
+    return removed
+
+
+def _candidate_files(root: str):
+    """UPLOAD_DIR 下的舊式平放檔案與圖片庫兩層分片目錄中的檔案"""
+    if not os.path.isdir(root):
+        return
+    for entry in os.scandir(root):
+        if entry.is_file():
+            yield entry
+        elif entry.is_dir() and SHARD_NAME_RE.fullmatch(entry.name):
+            for shard in os.scandir(entry.path):
+                if shard.is_dir() and SHARD_NAME_RE.fullmatch(shard.name):
+                    for item in os.scandir(shard.path):
+                        if item.is_file():
+                            yield item
+
+
+def collect_garbage(db: Session, grace_hours: float = IMAGE_GC_GRACE_HOURS,
+                    dry_run: bool = False, root: str = UPLOAD_DIR) -> Dict[str, Any]:
+    """
+    刪除未被任何名片引用、且超過保留期的圖片
+
+    引用集合在掃描前取得；掃描期間新保存的名片所引用的檔案 mtime 必在保留期內，不會被刪除。
+
+    Args:
+        grace_hours: 保留期（小時）
+        dry_run: 只統計不刪除
+
+    Returns:
+        {"scanned", "referenced", "recent", "removed", "freed_bytes", "dry_run"}
+    """
+    referenced = referenced_paths(db)
+    cutoff = time.time() - grace_hours * 3600
+    stats = {"scanned": 0, "referenced": 0, "recent": 0, "removed": 0, "freed_bytes": 0, "dry_run": dry_run}
+
+    for entry in _candidate_files(root):
+        stats["scanned"] += 1
+        if _normalize(entry.path) in referenced:
+            stats["referenced"] += 1
+            continue
+        try:
+            stat = entry.stat()
+            if stat.st_mtime >= cutoff:
+                stats["recent"] += 1
+                continue
+            if not dry_run:
+                os.remove(entry.path)
+        except OSError as e:
+            logger.warning(f"清理圖片失敗: {entry.path}: {e}")
+            continue
+        stats["removed"] += 1
+        stats["freed_bytes"] += stat.st_size
+
+    if stats["removed"]:
+        action = "可清理" if dry_run else "已清理"
+        logger.info(f"圖片清理: {action} {stats['removed']} 個未引用檔案，"
+                    f"{stats['freed_bytes'] / 1024 / 1024:.1f} MB")
+    return stats
+
+
+def collect_garbage_job(**kwargs) -> Dict[str, Any]:
+    """以獨立資料庫連線執行清理（背景執行緒用）"""
+    from backend.models.db import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return collect_garbage(db, **kwargs)
+    finally:
+        db.close()
+
+
+async def run_image_gc_periodically(interval_hours: float = IMAGE_GC_INTERVAL_HOURS,
+                                    initial_delay: float = 60) -> None:
+    """定期清理（服務啟動時建立，關閉時取消）"""
+    await asyncio.sleep(initial_delay)
+    while True:
+        try:
+            await asyncio.to_thread(collect_garbage_job)
+        except Exception as e:
+            logger.error(f"圖片清理失敗: {e}")
+        await asyncio.sleep(interval_hours * 3600)
@@ -0,0 +1,131 @@
+"""
+名片圖片記憶體管線
+
+上傳的圖片只解碼一次，偵測 → 透視矯正 → 增強 → 編碼各階段之間傳遞 NumPy 陣列，
+不再經由暫存檔與重複的 JPEG 解碼 / 編碼；只有需要保留的最終成品才寫入磁碟。
+
+用法（在圖片處理進程中執行）：
+    pipeline = CardImagePipeline.load(upload_bytes)
+    data = pipeline.detect(tight_crop=True).warp().enhance(0).encode()
+    pipeline.metadata  # {"corners", "detected", "detection_method"}
+"""
+
+from typing import Any, Dict, List, Optional, Union
+
+import cv2
+import numpy as np
+
+from backend.services.card_enhancement_service import CardEnhancementService
+
+ImageSource = Union[bytes, bytearray, memoryview, str]
+
+
+def decode_image(source: ImageSource) -> np.ndarray:
+    """
+    解碼圖片
+
+    Args:
+        source: 圖片位元組或檔案路徑
+
+    Raises:
+        ValueError: 無法讀取或解碼
+    """
+    if isinstance(source, str):
+        image = cv2.imread(source)
+    else:
+        image = cv2.imdecode(np.frombuffer(source, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        label = source if isinstance(source, str) else f"{len(source)} bytes"
+        raise ValueError(f"無法讀取圖片: {label}")
+    return image
+
+
+def encode_jpeg(image: np.ndarray, quality: int = 95) -> bytes:
+    ok, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError("圖片編碼失敗")
+    return buffer.tobytes()
+
+
+def write_bytes(path: str, data: bytes) -> str:
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+class CardImagePipeline:
+    """
+    單張名片圖片的處理管線（各階段返回 self，可串接）
+
+    Args:
+        image: 已解碼的 BGR 圖片
+        enhancer: 偵測 / 矯正 / 增強使用的 CardEnhancementService
+    """
+
+    def __init__(self, image: np.ndarray, enhancer: Optional[CardEnhancementService] = None):
+        self.original = image
+        self.image = image
+        self.enhancer = enhancer or CardEnhancementService()
+        self.corners: Optional[np.ndarray] = None
+        self.detected = False
+        self.detection_method = "manual"
+
+    @classmethod
+    def load(cls, source: ImageSource, enhancer: Optional[CardEnhancementService] = None) -> "CardImagePipeline":
+        """從圖片位元組（上傳內容）或檔案路徑建立管線"""
+        return cls(decode_image(source), enhancer)
+
+    def detect(self, auto_detect: bool = True, corners: Optional[List[List[float]]] = None,
+               tight_crop: bool = False) -> "CardImagePipeline":
+        """決定四角座標（參數同 CardEnhancementService.detect_corners）"""
+        self.corners, self.detected, self.detection_method = self.enhancer.detect_corners(
+            self.original, auto_detect=auto_detect, corners=corners, tight_crop=tight_crop
+        )
+        return self
+
+    def warp(self) -> "CardImagePipeline":
+        """依四角座標做透視矯正（原圖像素只在這裡被完整讀取一次）"""
+        if self.corners is not None:
+            self.image = self.enhancer.perspective_transform(self.original, self.corners)
+        return self
+
+    def rect_crop(self, corners: Optional[List[List[float]]] = None) -> "CardImagePipeline":
+        """簡單矩形裁切：不做透視矯正，只按 corners 的 bounding box 裁切"""
+        h, w = self.original.shape[:2]
+        if corners:
+            xs = [c[0] for c in corners]
+            ys = [c[1] for c in corners]
+            left = max(0, int(min(xs)))
+            top = max(0, int(min(ys)))
+            right = min(w, int(max(xs)))
+            bottom = min(h, int(max(ys)))
+            self.image = self.original[top:bottom, left:right]
+        else:
+            left, top, right, bottom = 0, 0, w, h
+            self.image = self.original
+        self.corners = np.array([[left, top], [right, top], [right, bottom], [left, bottom]], dtype=np.float32)
+        self.detection_method = "rect"
+        return self
+
+    def enhance(self, scale_factor: int = 3) -> "CardImagePipeline":
+        """降噪 + 放大 + 銳化；scale_factor <= 0 時略過"""
+        if scale_factor > 0:
+            self.image = self.enhancer.enhance_image(self.image, scale_factor)
+        return self
+
+    def encode(self, quality: int = 95) -> bytes:
+        return encode_jpeg(self.image, quality)
+
+    def save(self, path: str, quality: int = 95) -> str:
+        return write_bytes(path, self.encode(quality))
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        corners = None
+        if self.corners is not None:
+            corners = [[float(x), float(y)] for x, y in self.corners]
+        return {
+            "corners": corners,
+            "detected": self.detected,
+            "detection_method": self.detection_method,
+        }
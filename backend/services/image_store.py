@@ -0,0 +1,114 @@
+"""
+內容定址名片圖片庫
+
+所有名片圖片（上傳原圖、裁切圖、裁切預覽、批量 / WCXF 匯入）都以內容 SHA-256 命名，
+依雜湊前四碼分兩層目錄存放：
+
+    {UPLOAD_DIR}/ab/cd/abcd…(64 碼).jpg
+
+- 相同內容只存一份（重複上傳、重複匯入、預覽後直接保存都不會多寫檔案）
+- 單一目錄最多約數百個檔案，列目錄成本不隨圖片總數成長
+- 檔案寫入後不再修改，衍生圖快取與瀏覽器快取都不需要失效
+- 位於 UPLOAD_DIR 之下，/static/uploads 靜態路徑照常可用
+
+只依賴檔案系統（可在圖片處理進程中使用）；引用追蹤與清理見 image_gc_service。
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+from typing import Optional
+
+from backend.core.config import UPLOAD_DIR
+
+OBJECT_NAME_RE = re.compile(r"[0-9a-f]{64}\.[a-z0-9]+")
+OBJECT_EXTENSIONS = {".jpg", ".png", ".webp", ".bmp"}
+
+
+def normalize_extension(ext: Optional[str]) -> str:
+    """統一副檔名（.jpeg → .jpg，未知或缺少時為 .jpg）"""
+    ext = (ext or "").lower()
+    if ext == ".jpeg":
+        return ".jpg"
+    return ext if ext in OBJECT_EXTENSIONS else ".jpg"
+
+
+class ImageStore:
+    """
+    內容定址圖片庫
+
+    Args:
+        root: 根目錄（需在 /static/uploads 掛載的目錄之下）
+    """
+
+    def __init__(self, root: str = UPLOAD_DIR):
+        # 路徑存入資料庫，一律使用正斜線
+        self.root = root.replace("\\", "/").rstrip("/")
+
+    def path_for(self, key: str, ext: str = ".jpg") -> str:
+        return f"{self.root}/{key[:2]}/{key[2:4]}/{key}{normalize_extension(ext)}"
+
+    def is_object(self, path: Optional[str]) -> bool:
+        """path 是否為本圖片庫的物件路徑（用於驗證前端傳回的暫存路徑）"""
+        if not path:
+            return False
+        path = path.replace("\\", "/")
+        name = os.path.basename(path)
+        if not OBJECT_NAME_RE.fullmatch(name):
+            return False
+        key, ext = os.path.splitext(name)
+        return path == self.path_for(key, ext)
+
+    def put_bytes(self, data: bytes, ext: str = ".jpg") -> str:
+        """寫入圖片內容，返回物件路徑；相同內容已存在時不再寫入"""
+        return self._put(hashlib.sha256(data).hexdigest(), ext, lambda f: f.write(data))
+
+    def put_file(self, source_path: str, ext: Optional[str] = None,
+                 content_hash: Optional[str] = None) -> str:
+        """
+        複製既有檔案進圖片庫，返回物件路徑
+
+        Args:
+            ext: 副檔名，預設沿用來源檔
+            content_hash: 已算好的內容 SHA-256（例如批量導入的檢查點雜湊），省去重讀
+        """
+        if content_hash is None:
+            digest = hashlib.sha256()
+            with open(source_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+            content_hash = digest.hexdigest()
+
+        def copy(dest):
+            with open(source_path, "rb") as src:
+                shutil.copyfileobj(src, dest, 1024 * 1024)
+
+        return self._put(content_hash, ext or os.path.splitext(source_path)[1], copy)
+
+    def _put(self, key: str, ext: str, write) -> str:
+        path = self.path_for(key, ext)
+        try:
+            # 已存在：更新 mtime，讓清理的保留期從這次引用重新起算
+            os.utime(path)
+            return path
+        except FileNotFoundError:
+            pass
+
+        # 先寫暫存檔再改名，並行寫入同一內容時不會讀到半個檔案
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, part_path = tempfile.mkstemp(dir=directory, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(part_path, path)
+        except Exception:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+        return path
+
+
+image_store = ImageStore()
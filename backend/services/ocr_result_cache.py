@@ -0,0 +1,217 @@
+"""
+內容定址 OCR 結果快取
+
+以「圖片位元組 SHA-256 + 提示詞版本」為鍵，將 OCR 結果持久化到獨立的 SQLite 檔：
+- 同一張圖片重複上傳（相機重試、crop-preview 後儲存、批量重跑）直接回傳快取結果
+- 依筆數、總位元組與存活時間限制容量，超出時依最近存取時間（LRU）淘汰
+- 提供命中率統計
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def hash_image_bytes(content: bytes) -> str:
+    """計算圖片內容的 SHA-256"""
+    return hashlib.sha256(content).hexdigest()
+
+
+def hash_image_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """計算圖片檔案內容的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def prompt_version(*parts: str) -> str:
+    """由提示詞（或遠端 API 位址）與 OCR_RESULT_CACHE_VERSION 產生版本字串，提示詞變更後舊快取自動失效"""
+    digest = hashlib.sha256(settings.OCR_RESULT_CACHE_VERSION.encode('utf-8'))
+    for part in parts:
+        digest.update(b'\0')
+        digest.update((part or '').encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+class OCRResultCache:
+    """
+    SQLite 持久化的 OCR 結果快取（LRU + 存活時間）
+
+    Args:
+        path: SQLite 檔案路徑
+        max_entries: 最大筆數
+        max_bytes: 結果總位元組上限
+        max_age_seconds: 存活秒數（以寫入時間計）
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000, max_bytes: int = 200 * 1024 * 1024,
+                 max_age_seconds: int = 30 * 24 * 3600):
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max(1, max_bytes)
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS ocr_results (
+                    cache_key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_ocr_results_accessed ON ocr_results (accessed_at)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def make_key(namespace: str, version: str, image_hash: str) -> str:
+        return f"{namespace}:{version}:{image_hash}"
+
+    def get(self, key: str) -> Optional[str]:
+        """取得快取結果（過期視為未命中）"""
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT value, created_at FROM ocr_results WHERE cache_key = ?", (key,)
+                ).fetchone()
+                if row and now - row[1] <= self.max_age_seconds:
+                    conn.execute("UPDATE ocr_results SET accessed_at = ? WHERE cache_key = ?", (now, key))
+                    conn.commit()
+                    self.hits += 1
+                    return row[0]
+                if row:
+                    conn.execute("DELETE FROM ocr_results WHERE cache_key = ?", (key,))
+                    conn.commit()
+                self.misses += 1
+                return None
+        except sqlite3.Error as e:
+            logger.warning(f"OCR 結果快取讀取失敗: {e}")
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        """寫入快取並依容量限制淘汰最久未使用的項目"""
+        now = time.time()
+        size = len(value.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO ocr_results (cache_key, value, size, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, value, size, now, now)
+                )
+                self.writes += 1
+                self._evict(conn, now)
+                conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"OCR 結果快取寫入失敗: {e}")
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        removed = conn.execute(
+            "DELETE FROM ocr_results WHERE created_at < ?", (now - self.max_age_seconds,)
+        ).rowcount
+
+        count, total_size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ocr_results").fetchone()
+        if count > self.max_entries or total_size > self.max_bytes:
+            # 依最近存取時間由舊到新刪除，直到符合限制
+            to_delete = []
+            for cache_key, size in conn.execute("SELECT cache_key, size FROM ocr_results ORDER BY accessed_at"):
+                if count <= self.max_entries and total_size <= self.max_bytes:
+                    break
+                to_delete.append((cache_key,))
+                count -= 1
+                total_size -= size
+            conn.executemany("DELETE FROM ocr_results WHERE cache_key = ?", to_delete)
+            removed += len(to_delete)
+
+        self.evictions += removed
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM ocr_results")
+            conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """命中率與容量統計"""
+        with self._lock:
+            try:
+                count, total_size = self._connect().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ocr_results"
+                ).fetchone()
+            except sqlite3.Error:
+                count, total_size = 0, 0
+            lookups = self.hits + self.misses
+            return {
+                "enabled": settings.OCR_RESULT_CACHE_ENABLED,
+                "path": self.path,
+                "entries": count,
+                "bytes": total_size,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "max_age_seconds": self.max_age_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+_ocr_result_cache: Optional[OCRResultCache] = None
+_ocr_result_cache_lock = threading.Lock()
+
+
+def get_ocr_result_cache() -> Optional[OCRResultCache]:
+    """取得共用的 OCR 結果快取；OCR_RESULT_CACHE_ENABLED 關閉時回傳 None"""
+    global _ocr_result_cache
+    if not settings.OCR_RESULT_CACHE_ENABLED:
+        return None
+    if _ocr_result_cache is None:
+        with _ocr_result_cache_lock:
+            if _ocr_result_cache is None:
+                _ocr_result_cache = OCRResultCache(
+                    settings.OCR_RESULT_CACHE_PATH,
+                    max_entries=settings.OCR_RESULT_CACHE_MAX_ENTRIES,
+                    max_bytes=settings.OCR_RESULT_CACHE_MAX_MB * 1024 * 1024,
+                    max_age_seconds=settings.OCR_RESULT_CACHE_MAX_AGE_HOURS * 3600,
+                )
+    return _ocr_result_cache
+
+
+def get_ocr_result_cache_stats() -> Dict[str, Any]:
+    cache = get_ocr_result_cache()
+    if cache is None:
+        return {"enabled": False}
+    return cache.get_stats()
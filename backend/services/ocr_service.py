@@ -4,9 +4,11 @@ import json
 import asyncio
 import re
 import requests
+import httpx
 import urllib3
 import time
-import random
+import tempfile
+import threading
 from datetime import datetime, timedelta
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, File, UploadFile, HTTPException, Form
@@ -15,50 +17,31 @@ from fastapi.responses import JSONResponse
 from PIL import Image
 from io import BytesIO
 import base64
-from openai import OpenAI
-from typing import Dict, Any, Optional, List
+from openai import OpenAI, AsyncOpenAI
+from typing import Dict, Any, Optional, List, Tuple
+import weakref
 from collections import OrderedDict
 from .card_detector import CardDetector
-from .card_enhancement_service import CardEnhancementService
+from .card_enhancement_service import CardEnhancementService, BatchProcessingService
+from .image_executor import ImageJobTimeoutError, ImageQueueFullError, image_executor
+from .image_pipeline import CardImagePipeline, decode_image
+from .batch_ocr_engine import ConcurrentBatchOCR
+from .ocr_result_cache import get_ocr_result_cache, hash_image_bytes, hash_image_file, prompt_version
+from backend.core.config import settings
 
 # Disable SSL warnings
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-class OCRService:
-    """OCR Service class for business card text recognition"""
-    
-    def __init__(self):
-        self.llm_api = LLMApi()
-        # Initialize card enhancement service
-        self.card_enhancer = CardEnhancementService()
-        # Frontend implementation displays 25 fields
-        self.CARD_FIELDS = [
-            # Basic information (8 fields)
-            "name_zh", "name_en", "company_name_zh", "company_name_en", "position_zh", "position_en", "position1_zh", "position1_en",
-            # Department/Group info (6 fields)
-            "department1_zh", "department1_en", "department2_zh", "department2_en", "department3_zh", "department3_en",
-            # Contact information (5 fields)
-            "mobile_phone", "company_phone1", "company_phone2", "email", "line_id",
-            # Address information (4 fields)
-            "company_address1_zh", "company_address1_en", "company_address2_zh", "company_address2_en",
-            # Note information (2 fields)
-            "note1", "note2"
-        ]
-        self.BATCH_OCR_API_URL = os.getenv("OCR_BATCH_API_URL", "https://local_llm.star-bit.io/api/card")
-        self.IMAGE_EXTS = (".jpg", ".jpeg", ".png")
-    
-    async def ocr_image(self, image_content: bytes) -> str:
-        """OCR text recognition - Use local OCR API only"""
-        try:
-            # Save temporary file
-            temp_filename = f"{uuid.uuid4()}.jpg"
-            temp_path = os.path.join(UPLOAD_FOLDER, temp_filename)
-            
-            with open(temp_path, "wb") as f:
-                f.write(image_content)
-            
-            # Use local OCR with structured JSON prompt (same as external service)
-            structured_prompt = '''你是專業的名片資訊提取助手。請從圖片中識別名片上的所有文字資訊，並按照以下JSON格式返回結構化數據。
+# LLMApi / AsyncLLMApi.ocr_generate report failures as strings with these prefixes
+OCR_ERROR_PREFIXES = ("OCR錯誤", "OCR識別失敗")
+
+
+def is_ocr_error(result: Optional[str]) -> bool:
+    """True for empty results and ocr_generate failure messages (never cached)"""
+    return not result or not result.strip() or result.lstrip().startswith(OCR_ERROR_PREFIXES)
+
+# Structured 25-field prompt used for card OCR
+STRUCTURED_OCR_PROMPT = '''你是專業的名片資訊提取助手。請從圖片中識別名片上的所有文字資訊，並按照以下JSON格式返回結構化數據。
 
 重要：請從實際圖片內容中提取真實資訊，絕對不要使用下方範例中的數據。
 
@@ -130,15 +113,99 @@ class OCRService:
 }
 
 注意：請將方括號及其內容替換為實際識別到的資訊，若某欄位沒有內容則填入空字符串""。絕對不要使用上方的範例數據！'''
+
+class OCRService:
+    """OCR Service class for business card text recognition"""
+    
+    def __init__(self):
+        self.llm_api = LLMApi()
+        self.async_llm_api = AsyncLLMApi()
+        # Initialize card enhancement service
+        self.card_enhancer = CardEnhancementService()
+        # Frontend implementation displays 25 fields
+        self.CARD_FIELDS = [
+            # Basic information (8 fields)
+            "name_zh", "name_en", "company_name_zh", "company_name_en", "position_zh", "position_en", "position1_zh", "position1_en",
+            # Department/Group info (6 fields)
+            "department1_zh", "department1_en", "department2_zh", "department2_en", "department3_zh", "department3_en",
+            # Contact information (5 fields)
+            "mobile_phone", "company_phone1", "company_phone2", "email", "line_id",
+            # Address information (4 fields)
+            "company_address1_zh", "company_address1_en", "company_address2_zh", "company_address2_en",
+            # Note information (2 fields)
+            "note1", "note2"
+        ]
+        self.BATCH_OCR_API_URL = os.getenv("OCR_BATCH_API_URL", "https://local_llm.star-bit.io/api/card")
+        self.IMAGE_EXTS = (".jpg", ".jpeg", ".png")
+        # Cache key versions: changing the prompt or batch endpoint invalidates old entries
+        self.structured_cache_version = prompt_version(STRUCTURED_OCR_PROMPT)
+        self.batch_cache_version = prompt_version(self.BATCH_OCR_API_URL)
+    
+    def _cache_get(self, namespace: str, version: str, image_hash: str) -> Optional[str]:
+        """Look up a cached OCR result by image hash + prompt version"""
+        cache = get_ocr_result_cache()
+        if cache is None:
+            return None
+        return cache.get(cache.make_key(namespace, version, image_hash))
+    
+    def _cache_set(self, namespace: str, version: str, image_hash: str, value: str) -> None:
+        cache = get_ocr_result_cache()
+        if cache is not None:
+            cache.set(cache.make_key(namespace, version, image_hash), value)
+    
+    def _cached_batch_result(self, image_hash: Optional[str]):
+        """Decode a cached batch OCR result, None on miss"""
+        if not image_hash:
+            return None
+        cached = self._cache_get("batch", self.batch_cache_version, image_hash)
+        if not cached:
+            return None
+        parsed_result = json.loads(cached)
+        return parsed_result if self._is_cacheable_batch_result(parsed_result) else None
+    
+    @staticmethod
+    def _is_cacheable_batch_result(parsed_result) -> bool:
+        """Only field dicts with at least one value; error payloads and empty results are not cached"""
+        return isinstance(parsed_result, dict) and "error" not in parsed_result and any(parsed_result.values())
+    
+    def _store_batch_result(self, image_hash: Optional[str], parsed_result) -> None:
+        if image_hash and self._is_cacheable_batch_result(parsed_result):
+            self._cache_set("batch", self.batch_cache_version, image_hash,
+                            json.dumps(parsed_result, ensure_ascii=False))
+    
+    def _hash_image_path(self, image_path) -> Optional[str]:
+        try:
+            return hash_image_file(image_path)
+        except OSError as e:
+            self.log_message(f"Image hash failed: {image_path}, error: {e}")
+            return None
+    
+    async def ocr_image(self, image_content: bytes) -> str:
+        """OCR text recognition - Use local OCR API only (non-blocking)"""
+        try:
+            # Identical image bytes return the cached result without calling the model
+            image_hash = hash_image_bytes(image_content)
+            cached = await asyncio.to_thread(self._cache_get, "structured", self.structured_cache_version, image_hash)
+            if cached and not is_ocr_error(cached):
+                print(f"[OCR] Result cache hit: {image_hash[:12]}")
+                return cached
+            
+            # Save temporary file
+            temp_filename = f"{uuid.uuid4()}.jpg"
+            temp_path = os.path.join(UPLOAD_FOLDER, temp_filename)
+            await asyncio.to_thread(write_file, temp_path, image_content)
+            
+            # Use local OCR with structured JSON prompt (same as external service)
             print(f"[OCR] Using local OCR API with structured prompt for: {temp_path}")
-            result = self.llm_api.ocr_generate(temp_path, structured_prompt)
+            result = await self.async_llm_api.ocr_generate(temp_path, STRUCTURED_OCR_PROMPT)
             
             # If original fails, try enhanced image
             if not result or len(result.strip()) < 20:
                 print(f"[OCR] Local OCR result too short, trying enhanced image")
-                enhanced_path = process_image(temp_path)
+                # OpenCV enhancement is CPU bound, keep it off the event loop
+                enhanced_path = await asyncio.to_thread(process_image, temp_path, image_content)
                 if enhanced_path and enhanced_path != temp_path:
-                    result = self.llm_api.ocr_generate(enhanced_path, structured_prompt)
+                    result = await self.async_llm_api.ocr_generate(enhanced_path, STRUCTURED_OCR_PROMPT)
                     # Clean up enhanced image
                     try:
                         os.remove(enhanced_path)
@@ -151,6 +218,10 @@ class OCRService:
             except Exception as e:
                 print(f"File cleanup error: {e}")
             
+            # Only real results are cached; a transient model/API failure must not stick to this image
+            if not is_ocr_error(result):
+                await asyncio.to_thread(self._cache_set, "structured", self.structured_cache_version, image_hash, result)
+            
             return result or "OCR recognition failed"
             
         except Exception as e:
@@ -158,59 +229,54 @@ class OCRService:
             return "Please wait for processing"
     
 
-    def parse_ocr_to_fields(self, ocr_text: str, side: str) -> Dict[str, str]:
-        """Parse OCR text to standard fields"""
+    VALID_FIELDS = {
+        "name_zh", "name_en", "company_name_zh", "company_name_en", 
+        "position_zh", "position_en", "position1_zh", "position1_en",
+        "department1_zh", "department1_en", "department2_zh", "department2_en", 
+        "department3_zh", "department3_en", "mobile_phone", "company_phone1", 
+        "company_phone2", "email", "line_id", "company_address1_zh", 
+        "company_address1_en", "company_address2_zh", "company_address2_en",
+        "note1", "note2"
+    }
+
+    def _extract_json_fields(self, ocr_text: str) -> Dict[str, str]:
+        """Use the fields directly if the OCR text is already JSON (structured prompt)"""
         try:
-            print(f"[DEBUG] Starting OCR field parsing for side: {side}")
-            print(f"[DEBUG] OCR text length: {len(ocr_text)}")
+            # Try to extract JSON from the text (might have markdown formatting)
+            text_to_parse = ocr_text.strip()
             
-            # Check if OCR text is already in JSON format (from local or external OCR)
-            try:
-                import json
-                # Try to extract JSON from the text (might have markdown formatting)
-                text_to_parse = ocr_text.strip()
+            # Remove markdown formatting if present
+            if "```json" in text_to_parse:
+                start = text_to_parse.find("```json") + len("```json")
+                end = text_to_parse.find("```", start)
+                if end != -1:
+                    text_to_parse = text_to_parse[start:end].strip()
+            
+            # Look for JSON object
+            start_brace = text_to_parse.find('{')
+            end_brace = text_to_parse.rfind('}')
+            
+            if start_brace != -1 and end_brace != -1 and start_brace < end_brace:
+                json_text = text_to_parse[start_brace:end_brace+1]
+                parsed_json = json.loads(json_text)
+                print(f"[DEBUG] Successfully parsed JSON from OCR text, fields: {len(parsed_json)}")
                 
-                # Remove markdown formatting if present
-                if "```json" in text_to_parse:
-                    start = text_to_parse.find("```json") + len("```json")
-                    end = text_to_parse.find("```", start)
-                    if end != -1:
-                        text_to_parse = text_to_parse[start:end].strip()
+                # Filter and validate fields
+                result = {}
+                for key, value in parsed_json.items():
+                    if key in self.VALID_FIELDS and value and str(value).strip():
+                        result[key] = str(value).strip()
                 
-                # Look for JSON object
-                start_brace = text_to_parse.find('{')
-                end_brace = text_to_parse.rfind('}')
+                print(f"[DEBUG] Valid fields extracted: {len(result)}")
+                return result
                 
-                if start_brace != -1 and end_brace != -1 and start_brace < end_brace:
-                    json_text = text_to_parse[start_brace:end_brace+1]
-                    parsed_json = json.loads(json_text)
-                    print(f"[DEBUG] Successfully parsed JSON from OCR text, fields: {len(parsed_json)}")
-                    
-                    # Filter and validate fields
-                    valid_fields = {
-                        "name_zh", "name_en", "company_name_zh", "company_name_en", 
-                        "position_zh", "position_en", "position1_zh", "position1_en",
-                        "department1_zh", "department1_en", "department2_zh", "department2_en", 
-                        "department3_zh", "department3_en", "mobile_phone", "company_phone1", 
-                        "company_phone2", "email", "line_id", "company_address1_zh", 
-                        "company_address1_en", "company_address2_zh", "company_address2_en",
-                        "note1", "note2"
-                    }
-                    
-                    result = {}
-                    for key, value in parsed_json.items():
-                        if key in valid_fields and value and str(value).strip():
-                            result[key] = str(value).strip()
-                    
-                    print(f"[DEBUG] Valid fields extracted: {len(result)}")
-                    if result:  # Only return if we have valid data
-                        return result
-                    
-            except (json.JSONDecodeError, Exception) as e:
-                print(f"[DEBUG] JSON parsing failed, will use LLM fallback: {e}")
-            
-            # Fallback: Use the LLM-based parsing with _zh suffix field names to match database schema
-            prompt = '''You are an assistant for parsing business card information and outputting standard JSON format.
+        except (json.JSONDecodeError, Exception) as e:
+            print(f"[DEBUG] JSON parsing failed, will use LLM fallback: {e}")
+        return {}
+
+    def _build_parse_prompt(self, ocr_text: str) -> str:
+        """LLM fallback prompt with _zh suffix field names to match database schema"""
+        return '''You are an assistant for parsing business card information and outputting standard JSON format.
 
 IMPORTANT: Extract actual information from the OCR text provided. Do NOT use the placeholder examples below.
 
@@ -247,58 +313,79 @@ Please identify the following 25 fields from the OCR text (set empty string if n
 Note: Replace the brackets and their content with actual information from the OCR text. If a field has no content, use empty string "".
 
 Please parse the following OCR text and return only JSON format: ''' + ocr_text
+
+    def _clean_llm_fields(self, result: str, ocr_text: str) -> Dict[str, str]:
+        """Parse the JSON returned by the LLM fallback"""
+        print(f"[DEBUG] LLM returned result: {result[:300]}...")
+        try:
+            # Clean possible Markdown formatting
+            clean_result = result.strip()
+            if clean_result.startswith("```json"):
+                clean_result = clean_result[7:]
+            if clean_result.endswith("```"):
+                clean_result = clean_result[:-3]
+            clean_result = clean_result.strip()
             
-            print(f"[DEBUG] OCR parsing prompt: {prompt[:200]}...")
-            result = self.llm_api.ocr_generate("", prompt)
-            print(f"[DEBUG] LLM returned result: {result[:300]}...")
+            parsed = json.loads(clean_result)
+            print(f"[DEBUG] JSON parsing successful, field count: {len(parsed)}")
             
-            # Try to parse JSON result
-            import json
-            try:
-                # Clean possible Markdown formatting
-                clean_result = result.strip()
-                if clean_result.startswith("```json"):
-                    clean_result = clean_result[7:]
-                if clean_result.endswith("```"):
-                    clean_result = clean_result[:-3]
-                clean_result = clean_result.strip()
-                
-                parsed = json.loads(clean_result)
-                print(f"[DEBUG] JSON parsing successful, field count: {len(parsed)}")
-                
-                # Validate and filter fields with _zh suffix to match database schema
-                valid_fields = {
-                    "name_zh", "name_en", "company_name_zh", "company_name_en", 
-                    "position_zh", "position_en", "position1_zh", "position1_en",
-                    "department1_zh", "department1_en", "department2_zh", "department2_en", 
-                    "department3_zh", "department3_en", "mobile_phone", "company_phone1", 
-                    "company_phone2", "email", "line_id", "company_address1_zh", 
-                    "company_address1_en", "company_address2_zh", "company_address2_en",
-                    "note1", "note2"
-                }
-                
-                # Remove invalid fields and empty values
-                cleaned_result = {}
-                for key, value in parsed.items():
-                    if key in valid_fields and value and str(value).strip():
-                        cleaned_result[key] = str(value).strip()
-                
-                print(f"[DEBUG] After cleaning: {list(cleaned_result.keys())}")
-                print(f"[DEBUG] Non-empty fields: {len(cleaned_result)}")
-                return cleaned_result
-                
-            except json.JSONDecodeError as e:
-                print(f"[ERROR] JSON parsing failed: {e}")
-                print(f"[ERROR] Raw response content: {result}")
-                print(f"[ERROR] OCR text preview: {ocr_text[:200]}...")
-                # Return empty dict instead of polluting note fields with error messages
-                return {}
+            # Remove invalid fields and empty values
+            cleaned_result = {}
+            for key, value in parsed.items():
+                if key in self.VALID_FIELDS and value and str(value).strip():
+                    cleaned_result[key] = str(value).strip()
+            
+            print(f"[DEBUG] After cleaning: {list(cleaned_result.keys())}")
+            print(f"[DEBUG] Non-empty fields: {len(cleaned_result)}")
+            return cleaned_result
+            
+        except json.JSONDecodeError as e:
+            print(f"[ERROR] JSON parsing failed: {e}")
+            print(f"[ERROR] Raw response content: {result}")
+            print(f"[ERROR] OCR text preview: {ocr_text[:200]}...")
+            # Return empty dict instead of polluting note fields with error messages
+            return {}
+
+    def parse_ocr_to_fields(self, ocr_text: str, side: str) -> Dict[str, str]:
+        """Parse OCR text to standard fields"""
+        try:
+            print(f"[DEBUG] Starting OCR field parsing for side: {side}")
+            print(f"[DEBUG] OCR text length: {len(ocr_text)}")
+            
+            # Check if OCR text is already in JSON format (from local or external OCR)
+            result = self._extract_json_fields(ocr_text)
+            if result:  # Only return if we have valid data
+                return result
+            
+            # Fallback: Use the LLM-based parsing
+            prompt = self._build_parse_prompt(ocr_text)
+            print(f"[DEBUG] OCR parsing prompt: {prompt[:200]}...")
+            return self._clean_llm_fields(self.llm_api.ocr_generate("", prompt), ocr_text)
 
         except Exception as e:
             print(f"[ERROR] Field parsing error: {e}")
             print(f"[ERROR] OCR text preview: {ocr_text[:200]}...")
             # Return empty dict instead of polluting note fields with error messages
             return {}
+
+    async def parse_ocr_to_fields_async(self, ocr_text: str, side: str) -> Dict[str, str]:
+        """Non-blocking variant of parse_ocr_to_fields for async routes"""
+        try:
+            print(f"[DEBUG] Starting OCR field parsing for side: {side}")
+            print(f"[DEBUG] OCR text length: {len(ocr_text)}")
+            
+            result = self._extract_json_fields(ocr_text)
+            if result:
+                return result
+            
+            prompt = self._build_parse_prompt(ocr_text)
+            print(f"[DEBUG] OCR parsing prompt: {prompt[:200]}...")
+            return self._clean_llm_fields(await self.async_llm_api.ocr_generate("", prompt), ocr_text)
+
+        except Exception as e:
+            print(f"[ERROR] Field parsing error: {e}")
+            print(f"[ERROR] OCR text preview: {ocr_text[:200]}...")
+            return {}
     
     def log_message(self, message):
         """Output message to console"""
@@ -335,10 +422,33 @@ Please parse the following OCR text and return only JSON format: ''' + ocr_text
                 
         return filtered_result
     
+    def _extract_batch_json_text(self, text_content: str) -> str:
+        """Enhanced JSON extraction logic for batch OCR API responses"""
+        if "```json" in text_content:
+            start = text_content.find("```json") + len("```json")
+            end = text_content.find("```", start)
+            if end != -1:
+                text_content = text_content[start:end].strip()
+            else:
+                text_content = text_content[start:].strip()
+        elif text_content.startswith("Here"):
+            if "```json" in text_content:
+                start = text_content.find("```json") + len("```json")
+                end = text_content.find("```", start)
+                if end != -1:
+                    text_content = text_content[start:end].strip()
+        return text_content
+
     def batch_ocr_image(self, image_path, max_retries=3):
         """Batch OCR processing with retry mechanism"""
         filename = os.path.basename(image_path)
         
+        image_hash = self._hash_image_path(image_path)
+        cached = self._cached_batch_result(image_hash)
+        if cached is not None:
+            self.log_message(f"OCR result cache hit: {filename}")
+            return cached
+        
         for attempt in range(max_retries):
             try:
                 self.log_message(f"Processing OCR: {filename} (attempt {attempt + 1}/{max_retries})")
@@ -365,24 +475,12 @@ Please parse the following OCR text and return only JSON format: ''' + ocr_text
                             continue
                         return {}
                     
-                    # Enhanced JSON extraction logic
-                    if "```json" in text_content:
-                        start = text_content.find("```json") + len("```json")
-                        end = text_content.find("```", start)
-                        if end != -1:
-                            text_content = text_content[start:end].strip()
-                        else:
-                            text_content = text_content[start:].strip()
-                    elif text_content.startswith("Here"):
-                        if "```json" in text_content:
-                            start = text_content.find("```json") + len("```json")
-                            end = text_content.find("```", start)
-                            if end != -1:
-                                text_content = text_content[start:end].strip()
+                    text_content = self._extract_batch_json_text(text_content)
                     
                     # Parse JSON string
                     parsed_result = json.loads(text_content)
                     self.log_message(f"OCR processing complete: {filename}")
+                    self._store_batch_result(image_hash, parsed_result)
                     return parsed_result
                     
             except requests.exceptions.Timeout:
@@ -411,6 +509,75 @@ Please parse the following OCR text and return only JSON format: ''' + ocr_text
         # All retries failed
         self.log_message(f"OCR processing completely failed: {filename}, retried {max_retries} times")
         return {}
+
+    async def batch_ocr_image_async(self, image_path, max_retries=3):
+        """Non-blocking batch OCR over the pooled httpx client, with asyncio backoff"""
+        filename = os.path.basename(image_path)
+        client = get_batch_http_client()
+        
+        image_bytes = None
+        image_hash = None
+        try:
+            image_bytes = await asyncio.to_thread(read_file, image_path)
+            image_hash = hash_image_bytes(image_bytes)
+            cached = await asyncio.to_thread(self._cached_batch_result, image_hash)
+            if cached is not None:
+                self.log_message(f"OCR result cache hit: {filename}")
+                return cached
+        except OSError as e:
+            self.log_message(f"Image read failed: {filename}, error: {e}")
+        
+        for attempt in range(max_retries):
+            try:
+                self.log_message(f"Processing OCR: {filename} (attempt {attempt + 1}/{max_retries})")
+                
+                if image_bytes is None:
+                    image_bytes = await asyncio.to_thread(read_file, image_path)
+                files = {"file": (filename, image_bytes, "image/jpeg")}
+                
+                # Adjust timeout based on attempt number
+                timeout_duration = 10 + (attempt * 10)  # 10, 20, 30 seconds
+                
+                resp = await client.post(self.BATCH_OCR_API_URL, files=files, timeout=timeout_duration)
+                resp.raise_for_status()
+                
+                # Extract 'result' field from response JSON
+                result_json = resp.json()
+                text_content = result_json.get("result", result_json.get("text", "{}"))
+                
+                # Check if result is empty
+                if not text_content or text_content.strip() in ["{}", ""]:
+                    self.log_message(f"API returned empty content: {filename}")
+                    if attempt < max_retries - 1:
+                        await asyncio.sleep(retry_delay(attempt))
+                        continue
+                    return {}
+                
+                text_content = self._extract_batch_json_text(text_content)
+                
+                # Parse JSON string
+                parsed_result = json.loads(text_content)
+                self.log_message(f"OCR processing complete: {filename}")
+                await asyncio.to_thread(self._store_batch_result, image_hash, parsed_result)
+                return parsed_result
+                
+            except httpx.TimeoutException:
+                self.log_message(f"Request timeout: {filename} (attempt {attempt + 1}/{max_retries})")
+            except httpx.HTTPError as e:
+                self.log_message(f"Request error: {filename}, error: {e} (attempt {attempt + 1}/{max_retries})")
+            except json.JSONDecodeError as e:
+                self.log_message(f"JSON parsing failed: {filename}, error: {e}")
+                if 'text_content' in locals():
+                    self.log_message(f"Raw text: {text_content[:200]}...")
+            except Exception as e:
+                self.log_message(f"OCR processing exception: {filename}, error: {e} (attempt {attempt + 1}/{max_retries})")
+            
+            if attempt < max_retries - 1:
+                await asyncio.sleep(retry_delay(attempt))
+        
+        # All retries failed
+        self.log_message(f"OCR processing completely failed: {filename}, retried {max_retries} times")
+        return {}
     
     def merge_fields(self, results):
         """Merge multiple card fields, take first non-empty value"""
@@ -422,8 +589,18 @@ Please parse the following OCR text and return only JSON format: ''' + ocr_text
                     merged[field] = str(v)
         return merged
     
+    def _build_single_result(self, ocr_result):
+        """Fill the standard fields from a batch OCR result"""
+        processed_result = OrderedDict((k, "") for k in self.CARD_FIELDS)
+        for field in self.CARD_FIELDS:
+            if field in ocr_result:
+                processed_result[field] = str(ocr_result[field])
+        
+        # Filter empty values
+        return self.filter_data(processed_result)
+    
     def process_single_image(self, image_path):
-        """Process single image"""
+        """Process single image (repeat images are served from the OCR result cache)"""
         try:
             # Execute OCR
             ocr_result = self.batch_ocr_image(image_path)
@@ -431,16 +608,21 @@ Please parse the following OCR text and return only JSON format: ''' + ocr_text
             if not ocr_result:
                 return None
             
-            # Fill field data
-            processed_result = OrderedDict((k, "") for k in self.CARD_FIELDS)
-            for field in self.CARD_FIELDS:
-                if field in ocr_result:
-                    processed_result[field] = str(ocr_result[field])
+            return self._build_single_result(ocr_result)
             
-            # Filter empty values
-            filtered_result = self.filter_data(processed_result)
+        except Exception as e:
+            self.log_message(f"Single image processing failed: {image_path}, error: {e}")
+            return None
+    
+    async def process_single_image_async(self, image_path):
+        """Process single image without blocking the event loop"""
+        try:
+            ocr_result = await self.batch_ocr_image_async(image_path)
             
-            return filtered_result
+            if not ocr_result:
+                return None
+            
+            return self._build_single_result(ocr_result)
             
         except Exception as e:
             self.log_message(f"Single image processing failed: {image_path}, error: {e}")
@@ -461,33 +643,19 @@ Please parse the following OCR text and return only JSON format: ''' + ocr_text
             
             self.log_message(f"Starting batch processing, total {len(all_images)} images")
             
-            results = []
-            for i, image_path in enumerate(all_images):
-                try:
-                    result = self.process_single_image(image_path)
-                    
-                    if result:
-                        results.append(result)
-                        self.log_message(f"Processing {os.path.basename(image_path)} successful ({i+1}/{len(all_images)})")
-                    else:
-                        self.log_message(f"Processing {os.path.basename(image_path)} failed ({i+1}/{len(all_images)})")
-                    
-                    # Progress callback
-                    if progress_callback:
-                        await progress_callback({
-                            'current': i + 1,
-                            'total': len(all_images),
-                            'filename': os.path.basename(image_path),
-                            'success': result is not None,
-                            'result': result
-                        })
-                    
-                    # Random delay
-                    sleep_time = random.uniform(0.5, 1)
-                    await asyncio.sleep(sleep_time)
-                    
-                except Exception as e:
-                    self.log_message(f"Exception processing image {os.path.basename(image_path)}: {e}")
+            async def on_progress(event):
+                status = "successful" if event['success'] else "failed"
+                self.log_message(f"Processing {event['filename']} {status} ({event['current']}/{event['total']})")
+                if progress_callback:
+                    await progress_callback(event)
+            
+            # Bounded concurrent OCR with adaptive rate limiting (replaces the fixed random delay)
+            engine = ConcurrentBatchOCR(
+                self.process_single_image_async,
+                batch_service=BatchProcessingService(self.card_enhancer),
+            )
+            ordered_results = await engine.run(all_images, progress_callback=on_progress)
+            results = [result for result in ordered_results if result]
             
             self.log_message(f"Batch processing complete, successfully processed {len(results)} images")
             return results
@@ -563,6 +731,7 @@ async def lifespan(app: FastAPI):
     if cleanup_task:
         cleanup_task.cancel()
         print("[OCR] Stopped session cleanup background task")
+    await close_batch_http_client()
 
 app = FastAPI(title="OCR Service - Serial Management", lifespan=lifespan)
 
@@ -823,6 +992,162 @@ def get_session_status(session_id: str) -> Dict[str, Any]:
         "expires_at": session["expires_at"]
     }
 
+def _is_model_not_found_error(error: Exception) -> bool:
+    """Check whether a completion failed because the cached model id is no longer served"""
+    if getattr(error, "status_code", None) == 404:
+        return True
+    message = str(error).lower()
+    return "model" in message and ("not found" in message or "does not exist" in message)
+
+
+class ModelResolver:
+    """Resolve the served vision model id once and cache it with a TTL
+
+    The cached id is refreshed in a background thread shortly before it
+    expires, so OCR requests only pay for models.list() on a cold cache or
+    after the id has been invalidated (e.g. the server swapped its model).
+    """
+
+    def __init__(self, client, ttl_seconds: float = 300.0, refresh_margin: float = 30.0):
+        self.client = client
+        self.ttl_seconds = max(float(ttl_seconds), 0.0)
+        self.refresh_margin = min(max(float(refresh_margin), 0.0), self.ttl_seconds)
+        self._model_id: Optional[str] = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+        self._async_fetch_lock: Optional[asyncio.Lock] = None
+        self._refreshing = False
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.invalidations = 0
+
+    def _lookup(self) -> Tuple[Optional[str], float]:
+        """Return (cached id or None on a miss, fetch time seen by this lookup)"""
+        with self._lock:
+            model_id = self._model_id
+            seen_at = self._fetched_at
+            age = time.monotonic() - seen_at
+            if model_id and age < self.ttl_seconds:
+                self.hits += 1
+                if age >= self.ttl_seconds - self.refresh_margin and not self._refreshing:
+                    self._refreshing = True
+                    threading.Thread(target=self._background_refresh, args=(seen_at,), daemon=True).start()
+                return model_id, seen_at
+            self.misses += 1
+            return None, seen_at
+
+    def get_model_id(self) -> str:
+        """Return the cached model id, fetching it on a miss"""
+        model_id, seen_at = self._lookup()
+        if model_id:
+            return model_id
+        return self._fetch(seen_at)
+
+    async def aget_model_id(self, async_client) -> str:
+        """Async variant of get_model_id; a miss lists models through async_client"""
+        model_id, seen_at = self._lookup()
+        if model_id:
+            return model_id
+        if self._async_fetch_lock is None:
+            self._async_fetch_lock = asyncio.Lock()
+        async with self._async_fetch_lock:
+            with self._lock:
+                if self._model_id and self._fetched_at > seen_at:
+                    return self._model_id
+            models = await async_client.models.list()
+            if not models.data:
+                raise RuntimeError("沒有可用的模型")
+            model_id = models.data[0].id
+            self.store(model_id)
+            print(f"[OCR DEBUG] Resolved model: {model_id}")
+            return model_id
+
+    def _fetch(self, seen_at: float) -> str:
+        # Only one thread lists models; the others reuse its result
+        with self._fetch_lock:
+            with self._lock:
+                if self._model_id and self._fetched_at > seen_at:
+                    return self._model_id
+            models = self.client.models.list()
+            if not models.data:
+                raise RuntimeError("沒有可用的模型")
+            model_id = models.data[0].id
+            self.store(model_id)
+            print(f"[OCR DEBUG] Resolved model: {model_id}")
+            return model_id
+
+    def store(self, model_id: str) -> None:
+        """Save a freshly listed model id"""
+        with self._lock:
+            self._model_id = model_id
+            self._fetched_at = time.monotonic()
+
+    def _background_refresh(self, seen_at: float) -> None:
+        try:
+            self._fetch(seen_at)
+            with self._lock:
+                self.refreshes += 1
+        except Exception as e:
+            print(f"[OCR WARNING] Background model refresh failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def invalidate(self, model_id: Optional[str] = None) -> None:
+        """Drop the cached id (only if it still equals model_id when given)"""
+        with self._lock:
+            if model_id is None or self._model_id == model_id:
+                self._model_id = None
+                self._fetched_at = 0.0
+                self.invalidations += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "model_id": self._model_id,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+# One resolver per OCR endpoint, shared by every LLMApi instance
+_model_resolvers: Dict[tuple, ModelResolver] = {}
+_model_resolvers_lock = threading.Lock()
+
+
+def get_model_resolver(client) -> ModelResolver:
+    """Get the shared ModelResolver for the client's base URL"""
+    key = (str(client.base_url), client.api_key)
+    with _model_resolvers_lock:
+        resolver = _model_resolvers.get(key)
+        if resolver is None:
+            # Background refreshes run in threads and need a sync client
+            if not isinstance(client, OpenAI):
+                client = OpenAI(api_key=client.api_key, base_url=str(client.base_url), timeout=60.0, max_retries=2)
+            resolver = ModelResolver(
+                client,
+                ttl_seconds=float(settings.OCR_MODEL_CACHE_TTL),
+                refresh_margin=float(settings.OCR_MODEL_REFRESH_MARGIN),
+            )
+            _model_resolvers[key] = resolver
+        return resolver
+
+
+def get_model_cache_stats() -> List[Dict[str, Any]]:
+    """Hit/miss statistics of every model resolver"""
+    with _model_resolvers_lock:
+        resolvers = list(_model_resolvers.items())
+    return [{"base_url": key[0], **resolver.get_stats()} for key, resolver in resolvers]
+
+
 class LLMApi:
     def __init__(self, model_path="/data1/models/OpenGVLab/InternVL3-8B"):
         self.model_path = model_path
@@ -832,6 +1157,7 @@ class LLMApi:
             timeout=60.0,  # 60 seconds timeout
             max_retries=2
         )
+        self.model_resolver = get_model_resolver(self.client)
 
     def ocr_generate(self, image_path, prompt="Only return the OCR result and don't provide any other explanations.", max_retries=3):
         for attempt in range(max_retries):
@@ -844,15 +1170,9 @@ class LLMApi:
                 image_url = f"{os.path.abspath(image_path)}"
                 print(f"[OCR DEBUG] Processing image (attempt {attempt + 1}/{max_retries}): {image_url}")
                 
-                # Get model list with timeout handling
+                # Resolve model id from cache (models.list() only on a miss)
                 try:
-                    models = self.client.models.list()
-                    if not models.data:
-                        print("[OCR ERROR] No models available")
-                        return "OCR錯誤: 沒有可用的模型"
-                        
-                    model_name = models.data[0].id
-                    print(f"[OCR DEBUG] Using model: {model_name}")
+                    model_name = self.model_resolver.get_model_id()
                 except Exception as model_error:
                     print(f"[OCR ERROR] Failed to get models: {model_error}")
                     if attempt < max_retries - 1:
@@ -860,15 +1180,24 @@ class LLMApi:
                     return f"OCR錯誤: 無法獲取模型列表 - {str(model_error)}"
                 
                 # Make OCR request with proper error handling
-                response = self.client.chat.completions.create(
-                    model=model_name,
-                    messages=[{
-                        'role': 'user',
-                        'content': [{'type': 'text', 'text': prompt}, {'type': 'image_url', 'image_url': {'url': image_url}}]
-                    }],
-                    temperature=0,
-                    timeout=45.0  # Per-request timeout
-                )
+                try:
+                    response = self.client.chat.completions.create(
+                        model=model_name,
+                        messages=[{
+                            'role': 'user',
+                            'content': [{'type': 'text', 'text': prompt}, {'type': 'image_url', 'image_url': {'url': image_url}}]
+                        }],
+                        temperature=0,
+                        timeout=45.0  # Per-request timeout
+                    )
+                except Exception as completion_error:
+                    if _is_model_not_found_error(completion_error):
+                        # Served model changed: drop cached id and retry immediately
+                        print(f"[OCR WARNING] Model {model_name} not found, invalidating cached model id")
+                        self.model_resolver.invalidate(model_name)
+                        if attempt < max_retries - 1:
+                            continue
+                    raise
                 
                 result = response.choices[0].message.content
                 if result and len(result.strip()) > 0:
@@ -886,7 +1215,6 @@ class LLMApi:
                 print(f"[OCR ERROR] API call failed on attempt {attempt + 1}: {e}")
                 print(f"[OCR ERROR] Exception type: {type(e).__name__}")
                 if attempt < max_retries - 1:
-                    import time
                     time.sleep(2)  # Wait before retry
                     continue
                 return f"OCR識別失敗: {str(e)}"
@@ -894,28 +1222,149 @@ class LLMApi:
         return "OCR錯誤: 所有重試均失敗"
     
 
-def process_image(image_path):
-    """Image processing to improve OCR recognition rate - Integrated smart enhancement"""
+class AsyncLLMApi:
+    """AsyncOpenAI counterpart of LLMApi for async routes (never blocks the event loop)"""
+
+    def __init__(self, model_path="/data1/models/OpenGVLab/InternVL3-8B"):
+        self.model_path = model_path
+        self.client = AsyncOpenAI(
+            api_key=os.getenv("OCR_API_KEY", "YOUR_API_KEY"), 
+            base_url=os.getenv("OCR_API_URL", "http://0.0.0.0:23333/v1"),
+            timeout=60.0,  # 60 seconds timeout
+            max_retries=2
+        )
+        self.model_resolver = get_model_resolver(self.client)
+
+    async def ocr_generate(self, image_path, prompt="Only return the OCR result and don't provide any other explanations.", max_retries=3):
+        for attempt in range(max_retries):
+            try:
+                # Check if image path exists and is valid
+                if not image_path or not os.path.exists(image_path):
+                    print(f"[OCR ERROR] Image path does not exist: {image_path}")
+                    return "OCR錯誤: 圖片路徑不存在或無效"
+                
+                image_url = f"{os.path.abspath(image_path)}"
+                print(f"[OCR DEBUG] Processing image (attempt {attempt + 1}/{max_retries}): {image_url}")
+                
+                try:
+                    model_name = await self.model_resolver.aget_model_id(self.client)
+                except Exception as model_error:
+                    print(f"[OCR ERROR] Failed to get models: {model_error}")
+                    if attempt < max_retries - 1:
+                        await asyncio.sleep(retry_delay(attempt))
+                        continue
+                    return f"OCR錯誤: 無法獲取模型列表 - {str(model_error)}"
+                
+                try:
+                    response = await self.client.chat.completions.create(
+                        model=model_name,
+                        messages=[{
+                            'role': 'user',
+                            'content': [{'type': 'text', 'text': prompt}, {'type': 'image_url', 'image_url': {'url': image_url}}]
+                        }],
+                        temperature=0,
+                        timeout=45.0  # Per-request timeout
+                    )
+                except Exception as completion_error:
+                    if _is_model_not_found_error(completion_error):
+                        print(f"[OCR WARNING] Model {model_name} not found, invalidating cached model id")
+                        self.model_resolver.invalidate(model_name)
+                        if attempt < max_retries - 1:
+                            continue
+                    raise
+                
+                result = response.choices[0].message.content
+                if result and len(result.strip()) > 0:
+                    print(f"[OCR SUCCESS] OCR result length: {len(result)}")
+                    if len(result) > 100:  # Show preview for long results
+                        print(f"[OCR PREVIEW] {result[:100]}...")
+                    return result.strip()
+                else:
+                    print(f"[OCR WARNING] Empty result on attempt {attempt + 1}")
+                    if attempt < max_retries - 1:
+                        continue
+                    return "OCR錯誤: 識別結果為空"
+                
+            except Exception as e:
+                print(f"[OCR ERROR] API call failed on attempt {attempt + 1}: {e}")
+                print(f"[OCR ERROR] Exception type: {type(e).__name__}")
+                if attempt < max_retries - 1:
+                    await asyncio.sleep(retry_delay(attempt))  # Non-blocking backoff
+                    continue
+                return f"OCR識別失敗: {str(e)}"
+        
+        return "OCR錯誤: 所有重試均失敗"
+
+
+def retry_delay(attempt: int) -> float:
+    """Backoff before the next retry: 2, 4, 8 ... seconds (capped at 10)"""
+    return min(2.0 * (2 ** attempt), 10.0)
+
+
+# Pooled httpx clients for the batch OCR API, one per event loop
+_batch_http_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def get_batch_http_client() -> httpx.AsyncClient:
+    """Get the keep-alive httpx client bound to the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _batch_http_clients.get(loop)
+    if client is None or client.is_closed:
+        max_connections = settings.OCR_BATCH_MAX_CONNECTIONS
+        client = httpx.AsyncClient(
+            verify=False,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+        _batch_http_clients[loop] = client
+    return client
+
+
+async def close_batch_http_client() -> None:
+    """Close the pooled httpx client of the running event loop (call on shutdown)"""
+    client = _batch_http_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def process_image(image_path, image_content=None):
+    """Image processing to improve OCR recognition rate - runs in the image process pool
+
+    image_content: the uploaded bytes, when already in memory (decoded directly, the file is not read back)
+    """
     try:
+        return image_executor.run_sync(enhance_image_for_ocr, image_path, image_content)
+    except (ImageQueueFullError, ImageJobTimeoutError) as e:
+        print(f"Image processing skipped ({e}), using original image")
+        return image_path
+
+def enhance_image_for_ocr(image_path, image_content=None):
+    """Image processing to improve OCR recognition rate - Integrated smart enhancement
+
+    The image is decoded once and the array is shared by every strategy; only the enhanced result is written.
+    """
+    try:
+        if image_content is None:
+            image_content = read_file(image_path)
+
+        try:
+            image = decode_image(image_content)
+        except ValueError as decode_error:
+            print(f"OpenCV decode failed, using traditional method: {decode_error}")
+            image = None
+
         # Priority: try using smart card enhancement
         use_card_enhancement = os.getenv("USE_CARD_ENHANCEMENT", "true").lower() == "true"
         
-        if use_card_enhancement:
+        if use_card_enhancement and image is not None:
             try:
-                # Use smart card enhancement service
-                enhancer = CardEnhancementService()
-                success, enhanced_path = enhancer.process_image(
-                    image_path, 
-                    auto_detect=True,
-                    scale_factor=3
-                )
-                
-                if success and enhanced_path and enhanced_path != image_path:
-                    print(f"Smart card enhancement successful: {enhanced_path}")
-                    return enhanced_path
-                else:
-                    print(f"Smart enhancement failed or disabled, using traditional method")
-                    # Continue with traditional method
+                # Use smart card enhancement service (in-memory pipeline)
+                pipeline = CardImagePipeline(image)
+                pipeline.detect(auto_detect=True).warp().enhance(scale_factor=3)
+                temp_fd, enhanced_path = tempfile.mkstemp(suffix='.jpg', prefix='enhanced_card_')
+                os.close(temp_fd)
+                pipeline.save(enhanced_path)
+                print(f"Smart card enhancement successful: {enhanced_path}")
+                return enhanced_path
             except Exception as enhancement_error:
                 print(f"Smart enhancement exception, using traditional method: {enhancement_error}")
                 # Continue with traditional method
@@ -923,26 +1372,21 @@ def process_image(image_path):
         # Fallback: use OpenCV detection
         use_opencv = os.getenv("USE_OPENCV", "true").lower() == "true"
         
-        if use_opencv:
+        if use_opencv and image is not None:
             try:
-                # Use OpenCV detector
+                # Use OpenCV detector on the already decoded image
                 detector = CardDetector()
-                success, enhanced_path = detector.process_card_image(image_path)
-                
-                if success:
-                    print(f"OpenCV processing successful: {enhanced_path}")
-                    return enhanced_path
-                else:
-                    print(f"OpenCV processing failed, using traditional method: {enhanced_path}")
-                    # Continue with traditional method
+                enhanced = detector.process_card_array(image)
+                enhanced_path = os.path.splitext(image_path)[0] + "_opencv_enhanced.jpg"
+                detector.save_image(enhanced, enhanced_path)
+                print(f"OpenCV processing successful: {enhanced_path}")
+                return enhanced_path
             except Exception as opencv_error:
                 print(f"OpenCV processing exception, using traditional method: {opencv_error}")
                 # Continue with traditional method
         
         # Traditional PIL processing method (kept as final fallback)
-        with open(image_path, "rb") as f:
-            image_data = f.read()
-        image = Image.open(BytesIO(image_data))
+        image = Image.open(BytesIO(image_content))
 
         if image.mode == "RGBA":
             image = image.convert("RGB")
@@ -975,6 +1419,11 @@ def write_file(path, content):
     with open(path, "wb") as f:
         f.write(content)
 
+def read_file(path):
+    """Read file content"""
+    with open(path, "rb") as f:
+        return f.read()
+
 def get_image_base64(image_path):
     """Convert image to Base64 encoding"""
     try:
@@ -987,6 +1436,9 @@ def get_image_base64(image_path):
 
 # ==================== API Routes ====================
 
+# Shared async client for the standalone service routes (keeps its connection pool)
+async_llm = AsyncLLMApi()
+
 @app.post("/api/ocr")
 async def api_ocr(file: UploadFile = File(...), session_id: str = Form(None)):
     """OCR API - Requires valid serial session"""
@@ -1005,14 +1457,13 @@ async def api_ocr(file: UploadFile = File(...), session_id: str = Form(None)):
     filename = f"{uuid.uuid4()}_{file.filename}"
     path = os.path.join(UPLOAD_FOLDER, filename)
     content = await file.read()
-    write_file(path, content)
+    await asyncio.to_thread(write_file, path, content)
 
-    enhanced_path = process_image(path)
+    enhanced_path = await asyncio.to_thread(process_image, path, content)
     if not enhanced_path:
         raise HTTPException(status_code=500, detail="Image enhancement failed")
 
-    llm = LLMApi()
-    result = llm.ocr_generate(enhanced_path, prompt="Only return the OCR result and don't provide any other explanations.")
+    result = await async_llm.ocr_generate(enhanced_path, prompt="Only return the OCR result and don't provide any other explanations.")
     
     # Clean up files
     try:
@@ -1036,14 +1487,13 @@ async def api_card(file: UploadFile = File(...)):
     filename = f"{uuid.uuid4()}_{file.filename}"
     path = os.path.join(UPLOAD_FOLDER, filename)
     content = await file.read()
-    write_file(path, content)
+    await asyncio.to_thread(write_file, path, content)
 
-    enhanced_path = process_image(path)
+    enhanced_path = await asyncio.to_thread(process_image, path, content)
     if not enhanced_path:
         raise HTTPException(status_code=500, detail="Image enhancement failed")
 
-    llm = LLMApi()
-    result = llm.ocr_generate(enhanced_path, prompt='''You are an assistant for parsing business card information into structured data fields with _zh suffix for Chinese fields. 
+    result = await async_llm.ocr_generate(enhanced_path, prompt='''You are an assistant for parsing business card information into structured data fields with _zh suffix for Chinese fields. 
 
 IMPORTANT: Extract actual information from the business card image. Do NOT use the placeholder examples below.
 
@@ -1162,4 +1612,4 @@ if __name__ == "__main__":
     print(f"Starting OCR Service...")
     print(f"User access URL: http://{OCR_HOST}:{OCR_PORT}")
     print(f"Serial validation and OCR functionality ready")
-    uvicorn.run(app, host=OCR_HOST, port=OCR_PORT)
\ No newline at end of file
+    uvicorn.run(app, host=OCR_HOST, port=OCR_PORT)
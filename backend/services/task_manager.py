@@ -2,17 +2,32 @@
 后台任务管理器
 
 用于管理长时间运行的异步任务（如批量AI分类）
+
+任务状态保存在可插拔的存储后端：
+- memory：进程内字典（单 worker 默认）
+- sql：使用现有 SQLAlchemy engine 的数据表，多 worker 进程共享
+
+执行中的任务由所属进程定期写入心跳，心跳超时的任务视为工作进程已失联并标记失败；
+已结束的任务按保留时长自动清理。
 """
 
+import json
+import os
+import socket
 import uuid
 import threading
-from datetime import datetime
-from typing import Dict, Optional
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
 from enum import Enum
 import logging
 
+from backend.core.config import settings
+
 logger = logging.getLogger(__name__)
 
+STALE_TASK_MESSAGE = "工作进程失联（心跳超时）"
+
 
 class TaskStatus(str, Enum):
     """任务状态枚举"""
@@ -23,18 +38,26 @@ class TaskStatus(str, Enum):
     CANCELLED = "cancelled"
 
 
+ACTIVE_STATUSES = (TaskStatus.PENDING.value, TaskStatus.PROCESSING.value)
+
+
 class Task:
     """任务对象"""
-    def __init__(self, task_id: str, total: int):
+    def __init__(self, task_id: str, total: int, task_type: str = ""):
         self.task_id = task_id
+        self.task_type = task_type
         self.status = TaskStatus.PENDING
         self.total = total
         self.completed = 0
         self.failed = 0
+        self.skipped = 0
+        self.items: List[Dict[str, Any]] = []   # 逐项进度明细
+        self.result: Optional[Dict[str, Any]] = None
         self.error_message = ""
         self.created_at = datetime.now()
         self.started_at = None
         self.finished_at = None
+        self.heartbeat_at = self.created_at
         self.cancelled = False
         self.lock = threading.Lock()
 
@@ -42,19 +65,326 @@ class Task:
         """转换为字典"""
         return {
             "task_id": self.task_id,
+            "task_type": self.task_type,
             "status": self.status,
             "total": self.total,
             "completed": self.completed,
             "failed": self.failed,
-            "success_count": self.completed - self.failed,
+            "skipped": self.skipped,
+            "success_count": self.completed - self.failed - self.skipped,
             "error_message": self.error_message,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "started_at": self.started_at.isoformat() if self.started_at else None,
             "finished_at": self.finished_at.isoformat() if self.finished_at else None,
-            "progress_percent": round((self.completed / self.total * 100) if self.total > 0 else 0, 1)
+            "heartbeat_at": self.heartbeat_at.isoformat() if self.heartbeat_at else None,
+            "progress_percent": round((self.completed / self.total * 100) if self.total > 0 else 0, 1),
+            "items": list(self.items),
+            "result": self.result
         }
 
 
+class MemoryTaskStore:
+    """进程内任务存储（仅单 worker 可用）"""
+
+    def __init__(self):
+        self.tasks: Dict[str, Task] = {}
+        self.tasks_lock = threading.Lock()
+
+    def add(self, task: Task):
+        with self.tasks_lock:
+            self.tasks[task.task_id] = task
+
+    def get(self, task_id: str) -> Optional[Task]:
+        with self.tasks_lock:
+            return self.tasks.get(task_id)
+
+    def start(self, task_id: str, owner: str) -> bool:
+        task = self.get(task_id)
+        if not task:
+            return False
+        with task.lock:
+            task.status = TaskStatus.PROCESSING
+            task.started_at = datetime.now()
+            task.heartbeat_at = task.started_at
+        return True
+
+    def increment(self, task_id: str, success: bool, skipped: bool,
+                  item: Optional[Dict[str, Any]]) -> Optional[int]:
+        task = self.get(task_id)
+        if not task:
+            return None
+        with task.lock:
+            task.completed += 1
+            if skipped:
+                task.skipped += 1
+            elif not success:
+                task.failed += 1
+            if item is not None:
+                task.items.append(item)
+            task.heartbeat_at = datetime.now()
+            return task.completed
+
+    def set_result(self, task_id: str, result: Dict[str, Any]):
+        task = self.get(task_id)
+        if task:
+            with task.lock:
+                task.result = result
+
+    def finish(self, task_id: str, status: TaskStatus, error_message: str = "", cancelled: bool = False):
+        task = self.get(task_id)
+        if task:
+            with task.lock:
+                task.status = status
+                task.error_message = error_message
+                task.finished_at = datetime.now()
+                if cancelled:
+                    task.cancelled = True
+
+    def is_cancelled(self, task_id: str) -> bool:
+        task = self.get(task_id)
+        return task.cancelled if task else False
+
+    def heartbeat(self, task_ids: Iterable[str]):
+        now = datetime.now()
+        for task_id in task_ids:
+            task = self.get(task_id)
+            if task:
+                with task.lock:
+                    task.heartbeat_at = now
+
+    def mark_stale(self, timeout_seconds: int) -> List[str]:
+        cutoff = datetime.now() - timedelta(seconds=timeout_seconds)
+        stale = []
+        with self.tasks_lock:
+            tasks = list(self.tasks.values())
+        for task in tasks:
+            with task.lock:
+                if task.status.value in ACTIVE_STATUSES and task.heartbeat_at and task.heartbeat_at < cutoff:
+                    task.status = TaskStatus.FAILED
+                    task.error_message = STALE_TASK_MESSAGE
+                    task.finished_at = datetime.now()
+                    stale.append(task.task_id)
+        return stale
+
+    def prune(self, max_age_hours: int) -> List[str]:
+        cutoff = datetime.now() - timedelta(hours=max_age_hours)
+        with self.tasks_lock:
+            to_remove = [task_id for task_id, task in self.tasks.items()
+                         if task.finished_at and task.finished_at < cutoff]
+            for task_id in to_remove:
+                del self.tasks[task_id]
+        return to_remove
+
+
+class SQLTaskStore:
+    """
+    数据表任务存储（多 worker 进程共享）
+
+    进度计数使用 UPDATE ... SET completed = completed + 1 原子递增，
+    逐项明细写入独立的明细表，避免并发覆盖。
+    """
+
+    def __init__(self):
+        from backend.models.db import Base, SessionLocal, engine
+        from backend.models.task import TaskORM, TaskItemORM
+
+        self.TaskORM = TaskORM
+        self.TaskItemORM = TaskItemORM
+        self.SessionLocal = SessionLocal
+        Base.metadata.create_all(bind=engine, tables=[TaskORM.__table__, TaskItemORM.__table__])
+
+    def _to_task(self, row, items: List[Dict[str, Any]]) -> Task:
+        task = Task(row.task_id, row.total or 0, row.task_type or "")
+        task.status = TaskStatus(row.status)
+        task.completed = row.completed or 0
+        task.failed = row.failed or 0
+        task.skipped = row.skipped or 0
+        task.items = items
+        task.result = json.loads(row.result) if row.result else None
+        task.error_message = row.error_message or ""
+        task.created_at = row.created_at
+        task.started_at = row.started_at
+        task.finished_at = row.finished_at
+        task.heartbeat_at = row.heartbeat_at
+        task.cancelled = bool(row.cancelled)
+        return task
+
+    def add(self, task: Task):
+        db = self.SessionLocal()
+        try:
+            db.add(self.TaskORM(
+                task_id=task.task_id,
+                task_type=task.task_type,
+                status=task.status.value,
+                total=task.total,
+                completed=0,
+                failed=0,
+                skipped=0,
+                error_message="",
+                cancelled=False,
+                created_at=task.created_at,
+                heartbeat_at=task.heartbeat_at,
+            ))
+            db.commit()
+        finally:
+            db.close()
+
+    def get(self, task_id: str) -> Optional[Task]:
+        db = self.SessionLocal()
+        try:
+            row = db.query(self.TaskORM).filter(self.TaskORM.task_id == task_id).first()
+            if not row:
+                return None
+            payloads = db.query(self.TaskItemORM.payload).filter(
+                self.TaskItemORM.task_id == task_id
+            ).order_by(self.TaskItemORM.id).all()
+            return self._to_task(row, [json.loads(p[0]) for p in payloads if p[0]])
+        finally:
+            db.close()
+
+    def _update(self, task_id: str, values: Dict, extra_filter=None) -> int:
+        db = self.SessionLocal()
+        try:
+            query = db.query(self.TaskORM).filter(self.TaskORM.task_id == task_id)
+            if extra_filter is not None:
+                query = query.filter(extra_filter)
+            count = query.update(values, synchronize_session=False)
+            db.commit()
+            return count
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def start(self, task_id: str, owner: str) -> bool:
+        now = datetime.now()
+        return self._update(task_id, {
+            self.TaskORM.status: TaskStatus.PROCESSING.value,
+            self.TaskORM.started_at: now,
+            self.TaskORM.heartbeat_at: now,
+            self.TaskORM.owner: owner,
+        }) > 0
+
+    def increment(self, task_id: str, success: bool, skipped: bool,
+                  item: Optional[Dict[str, Any]]) -> Optional[int]:
+        TaskORM = self.TaskORM
+        values = {
+            TaskORM.completed: TaskORM.completed + 1,
+            TaskORM.heartbeat_at: datetime.now(),
+        }
+        if skipped:
+            values[TaskORM.skipped] = TaskORM.skipped + 1
+        elif not success:
+            values[TaskORM.failed] = TaskORM.failed + 1
+
+        db = self.SessionLocal()
+        try:
+            count = db.query(TaskORM).filter(TaskORM.task_id == task_id).update(values, synchronize_session=False)
+            if not count:
+                db.rollback()
+                return None
+            if item is not None:
+                db.add(self.TaskItemORM(task_id=task_id, payload=json.dumps(item, ensure_ascii=False, default=str)))
+            db.commit()
+            completed = db.query(TaskORM.completed).filter(TaskORM.task_id == task_id).scalar()
+            return completed
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def set_result(self, task_id: str, result: Dict[str, Any]):
+        self._update(task_id, {self.TaskORM.result: json.dumps(result, ensure_ascii=False, default=str)})
+
+    def finish(self, task_id: str, status: TaskStatus, error_message: str = "", cancelled: bool = False):
+        values = {
+            self.TaskORM.status: status.value,
+            self.TaskORM.error_message: error_message,
+            self.TaskORM.finished_at: datetime.now(),
+        }
+        if cancelled:
+            values[self.TaskORM.cancelled] = True
+        self._update(task_id, values)
+
+    def is_cancelled(self, task_id: str) -> bool:
+        db = self.SessionLocal()
+        try:
+            return bool(db.query(self.TaskORM.cancelled).filter(self.TaskORM.task_id == task_id).scalar())
+        finally:
+            db.close()
+
+    def heartbeat(self, task_ids: Iterable[str]):
+        task_ids = list(task_ids)
+        if not task_ids:
+            return
+        db = self.SessionLocal()
+        try:
+            db.query(self.TaskORM).filter(
+                self.TaskORM.task_id.in_(task_ids),
+                self.TaskORM.status.in_(ACTIVE_STATUSES),
+            ).update({self.TaskORM.heartbeat_at: datetime.now()}, synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def mark_stale(self, timeout_seconds: int) -> List[str]:
+        cutoff = datetime.now() - timedelta(seconds=timeout_seconds)
+        TaskORM = self.TaskORM
+        db = self.SessionLocal()
+        try:
+            stale_filter = (TaskORM.status.in_(ACTIVE_STATUSES), TaskORM.heartbeat_at < cutoff)
+            stale = [row[0] for row in db.query(TaskORM.task_id).filter(*stale_filter).all()]
+            if stale:
+                # 再次带上心跳条件，避免覆盖刚恢复心跳的任务
+                db.query(TaskORM).filter(TaskORM.task_id.in_(stale), *stale_filter).update({
+                    TaskORM.status: TaskStatus.FAILED.value,
+                    TaskORM.error_message: STALE_TASK_MESSAGE,
+                    TaskORM.finished_at: datetime.now(),
+                }, synchronize_session=False)
+                db.commit()
+            return stale
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def prune(self, max_age_hours: int) -> List[str]:
+        cutoff = datetime.now() - timedelta(hours=max_age_hours)
+        TaskORM = self.TaskORM
+        db = self.SessionLocal()
+        try:
+            to_remove = [row[0] for row in db.query(TaskORM.task_id).filter(
+                TaskORM.finished_at.isnot(None), TaskORM.finished_at < cutoff
+            ).all()]
+            for i in range(0, len(to_remove), 500):
+                chunk = to_remove[i:i + 500]
+                db.query(self.TaskItemORM).filter(self.TaskItemORM.task_id.in_(chunk)).delete(synchronize_session=False)
+                db.query(TaskORM).filter(TaskORM.task_id.in_(chunk)).delete(synchronize_session=False)
+            db.commit()
+            return to_remove
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+def create_task_store(backend: Optional[str] = None):
+    """依 TASK_STORE_BACKEND 建立任务存储"""
+    backend = (backend or settings.TASK_STORE_BACKEND or "memory").lower()
+    if backend == "sql":
+        return SQLTaskStore()
+    if backend != "memory":
+        logger.warning(f"未知的任务存储类型 {backend}，改用 memory")
+    return MemoryTaskStore()
+
+
 class TaskManager:
     """任务管理器（单例）"""
     _instance = None
@@ -65,56 +395,112 @@ class TaskManager:
             with cls._lock:
                 if cls._instance is None:
                     cls._instance = super().__new__(cls)
-                    cls._instance.tasks = {}
-                    cls._instance.tasks_lock = threading.Lock()
+                    cls._instance._init_manager()
         return cls._instance
 
-    def create_task(self, total: int) -> str:
+    def _init_manager(self, store=None):
+        self.store = store or create_task_store()
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.running_tasks = set()          # 本进程执行中的任务，由维护线程写入心跳
+        self.running_lock = threading.Lock()
+        self.maintenance_thread: Optional[threading.Thread] = None
+        self.last_prune = 0.0
+
+    def set_store(self, store):
+        """替换任务存储（例如测试或运行时切换后端）"""
+        self.store = store
+
+    def _ensure_maintenance(self):
+        """懒启动维护线程：写入心跳、标记失联任务、清理过期任务"""
+        if self.maintenance_thread and self.maintenance_thread.is_alive():
+            return
+        with self._lock:
+            if self.maintenance_thread and self.maintenance_thread.is_alive():
+                return
+            self.maintenance_thread = threading.Thread(
+                target=self._maintenance_loop, name="task-manager-maintenance", daemon=True
+            )
+            self.maintenance_thread.start()
+
+    def _maintenance_loop(self):
+        interval = max(1, settings.TASK_HEARTBEAT_INTERVAL)
+        while True:
+            try:
+                with self.running_lock:
+                    running = list(self.running_tasks)
+                self.store.heartbeat(running)
+
+                if time.monotonic() - self.last_prune >= settings.TASK_PRUNE_INTERVAL:
+                    self.run_maintenance()
+            except Exception as e:
+                logger.error(f"任务维护失败: {e}")
+            time.sleep(interval)
+
+    def run_maintenance(self) -> Dict[str, int]:
+        """标记心跳超时的任务并清理过期任务"""
+        self.last_prune = time.monotonic()
+        stale = self.store.mark_stale(settings.TASK_HEARTBEAT_TIMEOUT)
+        for task_id in stale:
+            logger.warning(f"任务心跳超时，标记失败: {task_id}")
+        removed = self.store.prune(settings.TASK_RETENTION_HOURS)
+        for task_id in removed:
+            logger.info(f"清理旧任务: {task_id}")
+        return {"stale": len(stale), "pruned": len(removed)}
+
+    def _release(self, task_id: str):
+        with self.running_lock:
+            self.running_tasks.discard(task_id)
+
+    def create_task(self, total: int, task_type: str = "") -> str:
         """
         创建新任务
 
         Args:
             total: 总任务数
+            task_type: 任务类型（如 batch_import）
 
         Returns:
             task_id: 任务ID
         """
         task_id = str(uuid.uuid4())
-        task = Task(task_id, total)
+        task = Task(task_id, total, task_type)
+        self.store.add(task)
 
-        with self.tasks_lock:
-            self.tasks[task_id] = task
+        with self.running_lock:
+            self.running_tasks.add(task_id)
+        self._ensure_maintenance()
 
         logger.info(f"创建任务: {task_id}, 总数={total}")
         return task_id
 
     def start_task(self, task_id: str):
         """标记任务开始"""
-        task = self.get_task(task_id)
-        if task:
-            with task.lock:
-                task.status = TaskStatus.PROCESSING
-                task.started_at = datetime.now()
+        if self.store.start(task_id, self.owner):
+            with self.running_lock:
+                self.running_tasks.add(task_id)
+            self._ensure_maintenance()
             logger.info(f"任务开始: {task_id}")
 
-    def update_progress(self, task_id: str, success: bool = True):
+    def update_progress(self, task_id: str, success: bool = True, item: Optional[Dict[str, Any]] = None,
+                        skipped: bool = False):
         """
-        更新任务进度
+        更新任务进度（原子递增）
 
         Args:
             task_id: 任务ID
             success: 是否成功
+            item: 单项进度明细（如文件名、状态、名片ID），会附加到任务的 items
+            skipped: 是否为跳过的项目（如已导入过的图片）
         """
-        task = self.get_task(task_id)
-        if task:
-            with task.lock:
-                task.completed += 1
-                if not success:
-                    task.failed += 1
+        completed = self.store.increment(task_id, success, skipped, item)
+
+        # 日志记录
+        if completed is not None and completed % 10 == 0:
+            logger.info(f"任务进度: {task_id} - {completed}")
 
-                # 日志记录
-                if task.completed % 10 == 0 or task.completed == task.total:
-                    logger.info(f"任务进度: {task_id} - {task.completed}/{task.total}")
+    def set_result(self, task_id: str, result: Dict[str, Any]):
+        """设置任务结果摘要"""
+        self.store.set_result(task_id, result)
 
     def complete_task(self, task_id: str, error_message: str = ""):
         """
@@ -124,34 +510,27 @@ class TaskManager:
             task_id: 任务ID
             error_message: 错误信息（如果有）
         """
+        status = TaskStatus.FAILED if error_message else TaskStatus.COMPLETED
+        self.store.finish(task_id, status, error_message)
+        self._release(task_id)
+
         task = self.get_task(task_id)
         if task:
-            with task.lock:
-                task.status = TaskStatus.FAILED if error_message else TaskStatus.COMPLETED
-                task.error_message = error_message
-                task.finished_at = datetime.now()
-
-            logger.info(f"任务完成: {task_id}, 状态={task.status}, 成功={task.completed - task.failed}/{task.total}")
+            logger.info(f"任务完成: {task_id}, 状态={task.status}, 成功={task.completed - task.failed - task.skipped}/{task.total}")
 
     def cancel_task(self, task_id: str):
         """取消任务"""
-        task = self.get_task(task_id)
-        if task:
-            with task.lock:
-                task.cancelled = True
-                task.status = TaskStatus.CANCELLED
-                task.finished_at = datetime.now()
-            logger.info(f"任务取消: {task_id}")
+        self.store.finish(task_id, TaskStatus.CANCELLED, cancelled=True)
+        self._release(task_id)
+        logger.info(f"任务取消: {task_id}")
 
     def is_cancelled(self, task_id: str) -> bool:
         """检查任务是否已取消"""
-        task = self.get_task(task_id)
-        return task.cancelled if task else False
+        return self.store.is_cancelled(task_id)
 
     def get_task(self, task_id: str) -> Optional[Task]:
-        """获取任务对象"""
-        with self.tasks_lock:
-            return self.tasks.get(task_id)
+        """获取任务对象（sql 模式下为快照）"""
+        return self.store.get(task_id)
 
     def get_status(self, task_id: str) -> Optional[Dict]:
         """
@@ -166,22 +545,6 @@ class TaskManager:
         task = self.get_task(task_id)
         return task.to_dict() if task else None
 
-    def cleanup_old_tasks(self, max_age_hours: int = 24):
-        """清理旧任务（可选）"""
-        now = datetime.now()
-        to_remove = []
-
-        with self.tasks_lock:
-            for task_id, task in self.tasks.items():
-                if task.finished_at:
-                    age = (now - task.finished_at).total_seconds() / 3600
-                    if age > max_age_hours:
-                        to_remove.append(task_id)
-
-            for task_id in to_remove:
-                del self.tasks[task_id]
-                logger.info(f"清理旧任务: {task_id}")
-
 
 # 全局单例
 task_manager = TaskManager()
@@ -5,16 +5,15 @@ from typing import List, Dict, Tuple, Optional, Any
 import plistlib
 import datetime
 import base64
-import uuid
 import logging
 
 from sqlalchemy.orm import Session
 
 logger = logging.getLogger(__name__)
 
-from backend.core.config import settings
 #from backend.models.db import SessionLocal
 from backend.services.card_service import bulk_create_cards
+from backend.services.image_store import image_store
 from backend.schemas.card import CardCreate
 
 class DictModelWrapper:
@@ -33,8 +32,6 @@ class DictModelWrapper:
 class WcxfImportService:
     def __init__(self, wcxf_path: Path):
         self.wcxf_path = wcxf_path
-        # 圖片要存去哪裡：請對應你 config.py 裡實際的變數名稱
-        self.card_image_dir = Path(settings.UPLOAD_DIR)
 
     # ---------- Step 1: 解析 wcxf → 取得「原始 card list」 ----------
     def _load_cards(self) -> List[dict]:
@@ -557,10 +554,8 @@ class WcxfImportService:
         """
         Step 3：從 wcxf 名片資料中抽出正/反面圖片，存成檔案。
         
-        - 不使用 WCXF 的 UniqueID
-        - 每筆名片會產生一個新的 UUID（與原本後端的命名模式一致）
-        - 儲存位置：settings.UPLOAD_DIR（預設 output/card_images）
-        - 檔名格式：{uuid}_front.jpg / {uuid}_back.jpg
+        - 寫入內容定址圖片庫（image_store，位於 settings.UPLOAD_DIR 之下）
+        - 檔名為內容 SHA-256，重複匯入同一份 wcxf 不會多存一份圖片
 
         Returns:
             包含 front_image_path, back_image_path 的字典
@@ -584,36 +579,22 @@ class WcxfImportService:
                 "back_image_path": None,
             }
 
-        # 🔥 產生新的 UUID（與你們原本 backend 的圖片命名方式一致）
-        file_uuid = str(uuid.uuid4())
-        logger.info(f"[wcxf_id={wcxf_id}] Processing images for new card UUID: {file_uuid}")
-
-        # 圖片存放路徑（程式會自動 mkdir）
-        image_dir = self.card_image_dir
-        image_dir.mkdir(parents=True, exist_ok=True)
+        logger.info(f"[wcxf_id={wcxf_id}] Processing images")
 
         front_path = None
         back_path = None
 
         # 正面圖片
         if front_bytes:
-            front_path = self._save_image(
-                image_bytes=front_bytes,
-                image_dir=image_dir,
-                filename=f"{file_uuid}_front.jpg"
-            )
+            front_path = self._save_image(image_bytes=front_bytes)
 
         # 反面圖片
         if back_bytes:
-            back_path = self._save_image(
-                image_bytes=back_bytes,
-                image_dir=image_dir,
-                filename=f"{file_uuid}_back.jpg"
-            )
+            back_path = self._save_image(image_bytes=back_bytes)
 
         # 如果兩張圖都寫入失敗，返回 None
         if not front_path and not back_path:
-            logger.warning(f"[wcxf_id={wcxf_id}] Failed to save any images for UUID: {file_uuid}")
+            logger.warning(f"[wcxf_id={wcxf_id}] Failed to save any images")
             return {
                 "front_image_path": None,
                 "back_image_path": None,
@@ -625,36 +606,25 @@ class WcxfImportService:
         }
     
 
-    def _save_image(
-        self,
-        image_bytes: bytes,
-        image_dir: Path,
-        filename: str
-    ) -> Optional[str]:
+    def _save_image(self, image_bytes: bytes) -> Optional[str]:
         """
-        儲存圖片到檔案系統
+        儲存圖片到圖片庫（路徑一律使用正斜線，可直接存進 DB）
         
         Args:
             image_bytes: 圖片的二進制數據
-            image_dir: 儲存目錄
-            filename: 檔案名稱
             
         Returns:
-            成功時返回檔案完整路徑，失敗時返回 None
+            成功時返回檔案路徑，失敗時返回 None
         """
         try:
-            file_path = image_dir / filename
-            file_path.write_bytes(image_bytes)
+            file_path = image_store.put_bytes(image_bytes, ".jpg")
             logger.info(f"Successfully saved image: {file_path}")
-
-            # ⭐ 關鍵：存進 DB 前把 Windows 的反斜線換成斜線
-            db_path = str(file_path).replace("\\", "/")
-            return str(db_path)
+            return file_path
         except IOError as e:
-            logger.error(f"Failed to write image {filename}: {e}")
+            logger.error(f"Failed to write image: {e}")
             return None
         except Exception as e:
-            logger.error(f"Unexpected error saving image {filename}: {e}")
+            logger.error(f"Unexpected error saving image: {e}")
             return None
         
 
@@ -0,0 +1,223 @@
+"""
+串流 Excel 寫出引擎（openpyxl write_only 模式）
+
+- 列寫出後即序列化到檔案，不在記憶體保留儲存格物件
+- 樣式以具名樣式登錄一次，儲存格只引用樣式名稱
+- 未指定的欄寬由前 N 列取樣估算（write_only 模式必須在第一列寫出前設定欄寬）
+- 輸出寫到暫存檔，由呼叫端串流回應或搬移
+
+只依賴 openpyxl，後端名片匯出與 ace-spider 報表共用。
+"""
+
+import os
+import tempfile
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import NamedStyle
+from openpyxl.utils import get_column_letter
+
+StyleSpec = Union[None, str, Sequence[Optional[str]]]
+
+
+def text_display_width(value: Any) -> int:
+    """估算顯示寬度（全形字元算兩格）"""
+    if value is None:
+        return 0
+    text = str(value)
+    longest = max(text.split("\n"), key=len) if "\n" in text else text
+    return len(longest) + sum(1 for c in longest if ord(c) > 127)
+
+
+class ExcelSheet:
+    """
+    write_only 工作表包裝
+
+    Args:
+        writer: 所屬的 StreamingExcelWriter
+        title: 工作表名稱
+        widths: 指定欄寬 {欄位序號(1 起): 寬度}，其餘欄位取樣估算
+        sample_rows: 取樣估算欄寬的列數（0 表示不取樣）
+        min_width / max_width / padding: 估算欄寬的下限、上限與留白
+    """
+
+    def __init__(self, writer: "StreamingExcelWriter", title: str,
+                 widths: Optional[Dict[int, float]] = None, sample_rows: int = 200,
+                 min_width: float = 6, max_width: float = 45, padding: float = 3):
+        self._writer = writer
+        self.ws = writer.workbook.create_sheet(title)
+        self.widths = dict(widths or {})
+        self.sample_rows = sample_rows
+        self.min_width = min_width
+        self.max_width = max_width
+        self.padding = padding
+        self.row_count = 0
+        self._pending: Optional[List[tuple]] = [] if sample_rows > 0 else None
+        self._sampled_widths: Dict[int, int] = {}
+        self._sampled = 0
+        if self._pending is None:
+            self._apply_widths()
+
+    @property
+    def tab_color(self):
+        return self.ws.sheet_properties.tabColor
+
+    @tab_color.setter
+    def tab_color(self, color: str):
+        self.ws.sheet_properties.tabColor = color
+
+    def freeze(self, cell: str) -> None:
+        """凍結窗格（須在第一列寫出前呼叫）"""
+        self.ws.freeze_panes = cell
+
+    def merge(self, cell_range: str) -> None:
+        self.ws.merged_cells.add(cell_range)
+
+    def auto_filter(self, cell_range: str) -> None:
+        self.ws.auto_filter.ref = cell_range
+
+    def skip_to(self, row_idx: int) -> None:
+        """補空白列，使下一次 append 寫在 row_idx"""
+        while self.row_count < row_idx - 1:
+            self.append([], sample=False)
+
+    def append(self, values: Sequence[Any], style: StyleSpec = None, height: Optional[float] = None,
+               hyperlinks: Optional[Dict[int, str]] = None, sample: bool = True) -> int:
+        """
+        寫入一列，返回列號
+
+        Args:
+            values: 儲存格值
+            style: 具名樣式名稱（整列套用）或逐欄樣式名稱列表
+            height: 列高
+            hyperlinks: {欄位序號(1 起): 連結}
+            sample: 是否納入欄寬取樣（標題列等跨欄文字應設為 False）
+        """
+        self.row_count += 1
+        row = (self.row_count, list(values), style, height, hyperlinks)
+        if self._pending is None:
+            self._write(row)
+            return self.row_count
+
+        if sample:
+            for col_idx, value in enumerate(row[1], 1):
+                if col_idx not in self.widths:
+                    width = text_display_width(value)
+                    if width > self._sampled_widths.get(col_idx, 0):
+                        self._sampled_widths[col_idx] = width
+            self._sampled += 1
+        self._pending.append(row)
+        if self._sampled >= self.sample_rows:
+            self._flush_pending()
+        return self.row_count
+
+    def _apply_widths(self) -> None:
+        widths = dict(self.widths)
+        for col_idx, width in self._sampled_widths.items():
+            widths.setdefault(col_idx, min(max(width + self.padding, self.min_width), self.max_width))
+        for col_idx, width in widths.items():
+            self.ws.column_dimensions[get_column_letter(col_idx)].width = width
+
+    def _flush_pending(self) -> None:
+        pending, self._pending = self._pending, None
+        self._apply_widths()
+        for row in pending or ():
+            self._write(row)
+
+    def _write(self, row: tuple) -> None:
+        row_idx, values, style, height, hyperlinks = row
+        if height is not None:
+            self.ws.row_dimensions[row_idx].height = height
+        if style is None and not hyperlinks:
+            self.ws.append(values)
+            return
+
+        cells = []
+        for col_idx, value in enumerate(values, 1):
+            cell_style = style if isinstance(style, str) or style is None else (
+                style[col_idx - 1] if col_idx - 1 < len(style) else None
+            )
+            link = hyperlinks.get(col_idx) if hyperlinks else None
+            if cell_style is None and link is None:
+                cells.append(value)
+                continue
+            cell = WriteOnlyCell(self.ws, value=value)
+            if cell_style is not None:
+                cell.style = cell_style
+            if link:
+                cell.hyperlink = link
+            cells.append(cell)
+        self.ws.append(cells)
+
+    def close(self) -> None:
+        if self._pending is not None:
+            self._flush_pending()
+
+
+class StreamingExcelWriter:
+    """
+    常數記憶體的 Excel 寫出器
+
+    用法：
+        writer = StreamingExcelWriter()
+        writer.add_style("header", font=..., fill=...)
+        sheet = writer.create_sheet("名片資料")
+        sheet.append([...], style="header")
+        path = writer.save()   # 暫存檔路徑，由呼叫端負責刪除
+    """
+
+    def __init__(self):
+        self.workbook = Workbook(write_only=True)
+        self._sheets: List[ExcelSheet] = []
+        self._styles: Dict[str, NamedStyle] = {}
+
+    def add_style(self, name: str, font=None, fill=None, alignment=None, border=None,
+                  number_format: Optional[str] = None) -> str:
+        """登錄具名樣式（同名只登錄一次），返回樣式名稱"""
+        if name in self._styles:
+            return name
+        style = NamedStyle(name=name)
+        if font is not None:
+            style.font = font
+        if fill is not None:
+            style.fill = fill
+        if alignment is not None:
+            style.alignment = alignment
+        if border is not None:
+            style.border = border
+        if number_format is not None:
+            style.number_format = number_format
+        self.workbook.add_named_style(style)
+        self._styles[name] = style
+        return name
+
+    def create_sheet(self, title: str, **options) -> ExcelSheet:
+        """建立工作表，options 同 ExcelSheet"""
+        sheet = ExcelSheet(self, title, **options)
+        self._sheets.append(sheet)
+        return sheet
+
+    def save(self, path: Optional[str] = None, spool_dir: Optional[str] = None) -> str:
+        """
+        寫出檔案
+
+        Args:
+            path: 輸出路徑；未指定時寫到暫存檔
+            spool_dir: 暫存檔目錄（預設為系統暫存目錄）
+
+        Returns:
+            檔案路徑
+        """
+        for sheet in self._sheets:
+            sheet.close()
+        if path is None:
+            fd, path = tempfile.mkstemp(suffix=".xlsx", dir=spool_dir)
+            os.close(fd)
+        try:
+            self.workbook.save(path)
+        except Exception:
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+        return path
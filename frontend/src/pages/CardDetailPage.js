@@ -402,7 +402,7 @@ const CardDetailPage = () => {
       let croppedPreview = null;
       let cropCorners = null;
       if (cropResponse.data?.success && cropResponse.data?.data) {
-        croppedPreview = cropResponse.data.data.cropped_preview_base64;
+        croppedPreview = cropResponse.data.data.cropped_preview_url;
         cropCorners = cropResponse.data.data.corners;
       }
 
@@ -447,7 +447,7 @@ const CardDetailPage = () => {
         setEditingImage(prev => ({
           ...prev,
           cropCorners: cropResponse.data.data.corners || newCorners,
-          croppedPreview: cropResponse.data.data.cropped_preview_base64 || prev.croppedPreview,
+          croppedPreview: cropResponse.data.data.cropped_preview_url || prev.croppedPreview,
         }));
       }
     } catch (error) {
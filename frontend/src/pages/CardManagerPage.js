@@ -32,6 +32,7 @@ import {
 } from 'antd-mobile-icons';
 import { Image, ImageViewer } from 'antd-mobile';
 import axios from 'axios';
+import { getCardThumbnailUrl } from '../utils/imageHelpers';
 import { Dialog } from 'antd-mobile';
 
 
@@ -380,6 +381,7 @@ const CardManagerPage = () => {
       const currentPageToLoad = isLoadMore ? currentPage + 1 : 0;
       const params = {
           use_pagination: true,
+          view: 'summary',  // 列表不需要 OCR 原文、裁切座標等大欄位
           skip: currentPageToLoad * pageSize,
           limit: pageSize,
           search: searchText || undefined,
@@ -826,6 +828,9 @@ const CardManagerPage = () => {
     // 獲取圖片URL
     const frontImageUrl = getImageUrl(card.front_cropped_image_path || card.front_image_path);
     const backImageUrl = getImageUrl(card.back_cropped_image_path || card.back_image_path);
+    // 列表只載入縮圖，點擊放大時才載入原圖
+    const frontThumbUrl = getCardThumbnailUrl(card, 'front', 320);
+    const backThumbUrl = getCardThumbnailUrl(card, 'back', 320);
     const hasImage = frontImageUrl || backImageUrl;
 
 
@@ -852,7 +857,7 @@ const CardManagerPage = () => {
               <div style={{ flex: 1, maxWidth: '50%' }}>
                 <div style={{ fontSize: '11px', color: '#999', marginBottom: '4px' }}>正面</div>
                 <Image
-                  src={frontImageUrl}
+                  src={frontThumbUrl || frontImageUrl}
                   fit="contain"
                   style={{
                     width: '100%',
@@ -887,7 +892,7 @@ const CardManagerPage = () => {
               <div style={{ flex: 1, maxWidth: '50%' }}>
                 <div style={{ fontSize: '11px', color: '#999', marginBottom: '4px' }}>反面</div>
                 <Image
-                  src={backImageUrl}
+                  src={backThumbUrl || backImageUrl}
                   fit="contain"
                   style={{
                     width: '100%',
@@ -3,6 +3,7 @@ import { useNavigate, useParams } from 'react-router-dom';
 import { Button, Checkbox, Dialog, Toast, NavBar, SpinLoading, ImageViewer } from 'antd-mobile';
 import { LeftOutline, RightOutline, EyeOutline } from 'antd-mobile-icons';
 import axios from 'axios';
+import { getCardThumbnailUrl } from '../utils/imageHelpers';
 import './DuplicateComparePage.css';
 
 function getImageUrl(path) {
@@ -189,7 +190,7 @@ export default function DuplicateComparePage() {
             <div className="duplicate-card-images">
               {card.front_cropped_image_path || card.front_image_path ? (
                 <img
-                  src={getImageUrl(card.front_cropped_image_path || card.front_image_path)}
+                  src={getCardThumbnailUrl(card, 'front', 640)}
                   alt="正面"
                   style={{ cursor: 'pointer' }}
                   onClick={() => ImageViewer.show({ image: getImageUrl(card.front_cropped_image_path || card.front_image_path) })}
@@ -202,7 +203,7 @@ export default function DuplicateComparePage() {
               )}
               {card.back_cropped_image_path || card.back_image_path ? (
                 <img
-                  src={getImageUrl(card.back_cropped_image_path || card.back_image_path)}
+                  src={getCardThumbnailUrl(card, 'back', 640)}
                   alt="背面"
                   style={{ cursor: 'pointer' }}
                   onClick={() => ImageViewer.show({ image: getImageUrl(card.back_cropped_image_path || card.back_image_path) })}
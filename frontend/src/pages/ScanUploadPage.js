@@ -545,7 +545,7 @@ const ScanUploadPage = () => {
             if (prev.file !== rotatedFile) return prev;
             return {
               ...prev,
-              croppedPreview: cropData.cropped_preview_base64 || null,
+              croppedPreview: cropData.cropped_preview_url || null,
               cropCorners: cropData.corners || null,
             };
           });
@@ -589,7 +589,7 @@ const ScanUploadPage = () => {
           return {
             ...prev,
             cropCorners: cropData.corners || null,
-            croppedPreview: cropData.cropped_preview_base64 || null
+            croppedPreview: cropData.cropped_preview_url || null
           };
         });
       } catch (error) {
@@ -17,6 +17,6 @@ module.exports = function (app) {
   });
 
   // Avoid /static/js, /static/css which belong to React dev server
-  ['/api', '/health', '/config', '/static/card_data', '/static/uploads']
+  ['/api', '/health', '/config', '/images', '/static/card_data', '/static/uploads']
     .forEach(path => app.use(path, proxy));
 };
@@ -44,3 +44,23 @@ export const getCardImages = (card) => {
     back: getImageUrl(card?.back_image_path)
   };
 };
+
+/**
+ * 名片圖片縮圖URL（後端 /images 衍生圖服務，依寬度產生 WebP 並快取）
+ * 路徑與 /static 相同（/static/uploads/... → /images/uploads/...），有裁切圖時優先使用裁切圖
+ * 圖片庫檔名為內容雜湊，圖片更新即換路徑，不需額外的版本參數
+ * @param {Object} card - 名片對象
+ * @param {'front'|'back'} side - 正面或反面
+ * @param {number} width - 縮圖寬度（後端對齊到允許寬度）
+ * @returns {string|null} 縮圖URL，該面沒有圖片時返回null
+ *
+ * @example
+ * getCardThumbnailUrl(card, 'front', 320)  // => '/images/uploads/ab/cd/abcd….jpg?w=320&fmt=webp'
+ */
+export const getCardThumbnailUrl = (card, side, width = 320) => {
+  const imageUrl = getImageUrl(card?.[`${side}_cropped_image_path`] || card?.[`${side}_image_path`]);
+  if (!imageUrl || !imageUrl.startsWith('/static/')) return imageUrl;
+
+  const params = new URLSearchParams({ w: String(width), fmt: 'webp' });
+  return `${imageUrl.replace(/^\/static\//, '/images/')}?${params.toString()}`;
+};
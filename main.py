@@ -2,11 +2,12 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
+import asyncio
 import os
 import sys
 import logging
 
-from backend.api.v1 import card, ocr, auth
+from backend.api.v1 import card, ocr, auth, image
 from backend.core.config import *
 from backend.core.middleware import ErrorHandlingMiddleware, LoggingMiddleware
 
@@ -30,15 +31,38 @@ async def lifespan(app: FastAPI):
     # 初始化數據庫
     from backend.models.db import Base, engine
     Base.metadata.create_all(bind=engine)
+    from backend.services.card_search_service import ensure_search_index
+    ensure_search_index(engine)
+    from backend.services.card_service import backfill_card_created_at
+    backfill_card_created_at(engine)
     
     # 創建必要的目錄
     os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+    # 預先啟動圖片處理進程（載入 cv2），避免第一批裁切請求付出啟動成本；
+    # 失敗時不阻擋服務啟動，進程池改在第一次提交工作時建立
+    from backend.services.image_executor import image_executor
+    try:
+        await asyncio.to_thread(image_executor.warm_up)
+    except Exception as e:
+        logging.warning(f"圖片處理進程預熱失敗，改為按需啟動: {e}")
+
+    # 定期清理未被名片引用的圖片（未保存的裁切預覽、被取代的裁切圖等）
+    image_gc_task = None
+    if IMAGE_GC_INTERVAL_HOURS > 0:
+        from backend.services.image_gc_service import run_image_gc_periodically
+        image_gc_task = asyncio.create_task(run_image_gc_periodically())
     
     logging.info("✅ 後端服務啟動完成")
     yield
     
     # 關閉時
     logging.info("🔄 後端服務正在關閉...")
+    from backend.services.ocr_service import close_batch_http_client
+    await close_batch_http_client()
+    if image_gc_task:
+        image_gc_task.cancel()
+    image_executor.shutdown()
 
 # 創建 FastAPI 應用
 app = FastAPI(
@@ -79,6 +103,12 @@ app.include_router(
     tags=["Authentication"]
 )
 
+app.include_router(
+    image.router,
+    prefix="/images",
+    tags=["Card Images"]
+)
+
 app.mount("/spider", spider_app)
 
 # 掛載靜態文件目錄
@@ -61,6 +61,7 @@ async def cardocr_search_contacts(
     industry: Optional[str] = None,
     limit: int = 20,
     skip: int = 0,
+    cursor: Optional[str] = None,
 ) -> str:
     """搜尋客戶資料池。依姓名、公司、電話、Email 等模糊搜尋名片資料庫。
 
@@ -72,12 +73,13 @@ async def cardocr_search_contacts(
         query: 搜尋關鍵字 — 姓名/公司/電話/Email (e.g. '國泰', '王大明', '0912')
         industry: 產業篩選 (e.g. '科技', '防詐', '旅宿')
         limit: 最大回傳筆數 (1-100, 預設 20)
-        skip: 分頁偏移量 (預設 0)
+        skip: 分頁偏移量 (預設 0，建議改用 cursor)
+        cursor: 上一次回傳的 next_cursor，用於取得下一頁
 
     Returns:
-        JSON: {total, count, has_more, next_skip, contacts: [{完整名片欄位}]}
+        JSON: {total, count, has_more, next_cursor, next_skip, contacts: [{完整名片欄位}]}
     """
-    return await search_contacts_impl(query, industry, limit, skip)
+    return await search_contacts_impl(query, industry, limit, skip, cursor)
 
 
 @mcp.tool(
@@ -34,20 +34,28 @@ async def search_contacts_impl(
     industry: Optional[str] = None,
     limit: int = 20,
     skip: int = 0,
+    cursor: Optional[str] = None,
 ) -> str:
     """搜尋客戶資料池。依姓名、公司、電話、Email 等模糊搜尋名片資料庫。
 
     回傳完整 25 欄位，但向用戶呈現時預設只顯示：
     姓名 (name_zh)、公司 (company_name_zh)、職稱 (position_zh)、手機 (mobile_phone)、Email (email)。
     用戶追問其他資訊時，直接從已回傳的資料中取用，不需重新查詢。
+
+    翻頁時優先傳入上一頁的 next_cursor（游標分頁，深頁不變慢）；skip 僅為相容保留。
     """
     try:
         query_params: dict = {
             "search": query,
             "limit": limit,
-            "skip": skip,
-            "use_pagination": True,
         }
+        if cursor or not skip:
+            query_params["use_cursor"] = True
+            if cursor:
+                query_params["cursor"] = cursor
+        else:
+            query_params["skip"] = skip
+            query_params["use_pagination"] = True
         if industry:
             query_params["industry"] = industry
 
@@ -58,15 +66,23 @@ async def search_contacts_impl(
 
         payload = data["data"]
         items = payload.get("items", [])
-        total = payload.get("total", 0)
+        total = payload.get("total")
+
+        if "next_cursor" in payload:
+            has_more = bool(payload.get("has_more"))
+            next_skip = None
+        else:
+            has_more = (total or 0) > skip + len(items)
+            next_skip = skip + len(items) if has_more else None
 
         return json.dumps(
             {
                 "total": total,
                 "count": len(items),
                 "skip": skip,
-                "has_more": total > skip + len(items),
-                "next_skip": skip + len(items) if total > skip + len(items) else None,
+                "has_more": has_more,
+                "next_cursor": payload.get("next_cursor"),
+                "next_skip": next_skip,
                 "contacts": items,
             },
             ensure_ascii=False,